@@ -0,0 +1,410 @@
+"""
+Storage codec for grievance documents.
+
+Grievances can be stored in two forms, selected by ``GRIEVANCE_STORAGE_FORMAT``:
+
+- ``full``: the historical layout (long field names, string enums)
+- ``compact``: short field names, small-integer codes for department,
+  priority and status (also as the keys of ``status_reached_at`` and
+  ``time_in_state``), fallback explanations stored as a code, and
+  ``user_id`` as an ObjectId. Compact documents carry ``_v: 1``.
+
+``created_at`` and ``updated_at`` keep their names in both forms, so
+listings sorted by them merge across forms during a migration, and so
+does ``tenant_id``, which is part of the shard key.
+
+Application code always works with full-form documents, filters and
+updates; ``GrievanceCollection`` translates them to the stored form and
+decodes what it reads. In ``migrating`` mode new writes are compact while
+reads and updates match both forms, so ``scripts/migrate_grievance_storage.py``
+can convert existing documents in batches while the API is serving.
+
+Enum code tables are append-only: stored documents refer to positions.
+"""
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import InsertOne, UpdateMany, UpdateOne
+
+FORMAT_FULL = "full"
+FORMAT_MIGRATING = "migrating"
+FORMAT_COMPACT = "compact"
+STORAGE_FORMATS = (FORMAT_FULL, FORMAT_MIGRATING, FORMAT_COMPACT)
+
+VERSION_FIELD = "_v"
+COMPACT_VERSION = 1
+
+FIELD_NAMES = {
+    "user_id": "u",
+    "message": "m",
+    "predicted_department": "d",
+    "priority": "p",
+    "confidence": "c",
+    "explanation": "e",
+    "status": "s",
+    "status_changed_at": "sc",
+    "status_reached_at": "sr",
+    "time_in_state": "t",
+    "location": "l",
+    "location_name": "ln",
+    "incident_id": "i",
+    "source": "o",
+    "reference": "r",
+    "archived_at": "a",
+}
+FULL_NAMES = {short: full for full, short in FIELD_NAMES.items()}
+
+DEPARTMENTS = ("water", "sanitation", "roads", "electricity", "health", "police", "housing", "general", "miscellaneous")
+PRIORITIES = ("high", "medium", "low")
+STATUSES = ("submitted", "in_progress", "resolved", "rejected")
+# Explanations produced by the keyword fallback, the bulk of repeated text
+FALLBACK_EXPLANATIONS = ("fallback: unclear classification",) + tuple(
+    f"fallback: matched {department} keywords" for department in DEPARTMENTS
+)
+
+
+class _Enum:
+    """Known values as their index; anything else stored unchanged."""
+
+    def __init__(self, values: Tuple[str, ...]):
+        self.values = values
+        self.codes = {value: code for code, value in enumerate(values)}
+
+    def encode(self, value):
+        return self.codes.get(value, value) if isinstance(value, str) else value
+
+    def decode(self, value):
+        if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < len(self.values):
+            return self.values[value]
+        return value
+
+
+class _ObjectIdString:
+    """User ids as 12-byte ObjectIds instead of 24-character strings."""
+
+    @staticmethod
+    def encode(value):
+        return ObjectId(value) if isinstance(value, str) and ObjectId.is_valid(value) else value
+
+    @staticmethod
+    def decode(value):
+        return str(value) if isinstance(value, ObjectId) else value
+
+
+class _KeyedByStatus:
+    """Subdocuments keyed by status name (``status_reached_at``, ``time_in_state``)."""
+
+    @staticmethod
+    def encode_key(key: str) -> str:
+        code = _STATUS.codes.get(key)
+        return key if code is None else str(code)
+
+    @staticmethod
+    def decode_key(key: str) -> str:
+        return _STATUS.values[int(key)] if key.isdigit() and int(key) < len(_STATUS.values) else key
+
+    @classmethod
+    def encode(cls, value):
+        return {cls.encode_key(k): v for k, v in value.items()} if isinstance(value, dict) else value
+
+    @classmethod
+    def decode(cls, value):
+        return {cls.decode_key(k): v for k, v in value.items()} if isinstance(value, dict) else value
+
+
+_STATUS = _Enum(STATUSES)
+
+VALUE_CODECS = {
+    "user_id": _ObjectIdString,
+    "predicted_department": _Enum(DEPARTMENTS),
+    "priority": _Enum(PRIORITIES),
+    "status": _STATUS,
+    "explanation": _Enum(FALLBACK_EXPLANATIONS),
+    "status_reached_at": _KeyedByStatus,
+    "time_in_state": _KeyedByStatus,
+}
+
+_VALUE_OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte")
+_LIST_OPERATORS = ("$in", "$nin", "$all")
+_LOGICAL_OPERATORS = ("$and", "$or", "$nor")
+
+
+def encode_path(path: str) -> Tuple[str, Optional[object]]:
+    """Stored path for a full-form field path, and the codec for values at that path."""
+    field, dot, rest = path.partition(".")
+    short = FIELD_NAMES.get(field, field)
+    if not dot:
+        return short, VALUE_CODECS.get(field)
+    if VALUE_CODECS.get(field) is _KeyedByStatus:
+        key, dot, rest = rest.partition(".")
+        rest = _KeyedByStatus.encode_key(key) + dot + rest
+    return f"{short}.{rest}", None
+
+
+def _encode_condition(condition, codec):
+    if codec is None:
+        return condition
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        encoded = {}
+        for operator, operand in condition.items():
+            if operator in _VALUE_OPERATORS:
+                encoded[operator] = codec.encode(operand)
+            elif operator in _LIST_OPERATORS:
+                encoded[operator] = [codec.encode(value) for value in operand]
+            elif operator == "$not":
+                encoded[operator] = _encode_condition(operand, codec)
+            else:
+                encoded[operator] = operand  # $exists, $type, ...
+        return encoded
+    return codec.encode(condition)
+
+
+def encode_filter(query: Optional[dict]) -> dict:
+    """Compact-form equivalent of a full-form query filter."""
+    encoded = {}
+    for key, value in (query or {}).items():
+        if key in _LOGICAL_OPERATORS:
+            encoded[key] = [encode_filter(clause) for clause in value]
+        elif key.startswith("$"):
+            encoded[key] = value
+        else:
+            path, codec = encode_path(key)
+            encoded[path] = _encode_condition(value, codec)
+    return encoded
+
+
+def _check_update(update) -> None:
+    if not isinstance(update, dict):
+        # Field references inside pipeline stages ("$status") can't be translated to compact names
+        raise TypeError(
+            f"Grievance updates must be an update document, not {type(update).__name__}; "
+            "aggregation pipeline updates are not supported"
+        )
+
+
+def encode_update(update: dict) -> dict:
+    """Compact-form equivalent of a full-form update (operators or replacement)."""
+    _check_update(update)
+    if not any(key.startswith("$") for key in update):
+        return encode_document(update)
+    encoded = {}
+    for operator, fields in update.items():
+        encoded[operator] = {}
+        for key, value in fields.items():
+            path, codec = encode_path(key)
+            if codec is not None and operator in ("$set", "$setOnInsert"):
+                value = codec.encode(value)
+            encoded[operator][path] = value
+    return encoded
+
+
+def encode_projection(projection):
+    """Compact-form projection (dict or list of fields), including the version marker."""
+    if projection is None:
+        return None
+    if not isinstance(projection, dict):
+        projection = {field: 1 for field in projection}
+    encoded = {encode_path(key)[0]: value for key, value in projection.items()}
+    if any(value for key, value in projection.items() if key != "_id"):
+        encoded[VERSION_FIELD] = 1
+    return encoded
+
+
+def encode_document(doc: dict) -> dict:
+    """Compact form of a full-form grievance document."""
+    encoded = {}
+    for field, value in doc.items():
+        codec = VALUE_CODECS.get(field)
+        encoded[FIELD_NAMES.get(field, field)] = codec.encode(value) if codec is not None else value
+    encoded[VERSION_FIELD] = COMPACT_VERSION
+    return encoded
+
+
+def decode_document(doc: Optional[dict]) -> Optional[dict]:
+    """Full form of a stored grievance document (either form)."""
+    if doc is None or VERSION_FIELD not in doc:
+        return doc
+    decoded = {}
+    for key, value in doc.items():
+        if key == VERSION_FIELD:
+            continue
+        field = FULL_NAMES.get(key, key)
+        codec = VALUE_CODECS.get(field)
+        decoded[field] = codec.decode(value) if codec is not None else value
+    return decoded
+
+
+def index_keys(keys: List[Tuple[str, object]]) -> List[Tuple[str, object]]:
+    """Compact-form index key specification."""
+    return [(encode_path(field)[0], direction) for field, direction in keys]
+
+
+class _Cursor:
+    """Wraps a Motor cursor, decoding documents as they are read."""
+
+    def __init__(self, cursor, storage_format: str):
+        self._cursor = cursor
+        self._format = storage_format
+
+    def sort(self, key, direction=None):
+        keys = [(key, direction)] if isinstance(key, str) else list(key)
+        stored = []
+        for field, order in keys:
+            path = encode_path(field)[0] if self._format != FORMAT_FULL else field
+            if self._format == FORMAT_MIGRATING and path != field:
+                raise ValueError(f"Cannot sort on {field} while grievances are being migrated")
+            stored.append((path, order if order is not None else 1))
+        self._cursor = self._cursor.sort(stored)
+        return self
+
+    def skip(self, count: int):
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count: int):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    def batch_size(self, size: int):
+        self._cursor = self._cursor.batch_size(size)
+        return self
+
+    async def to_list(self, length: Optional[int]):
+        return [decode_document(doc) for doc in await self._cursor.to_list(length=length)]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return decode_document(await self._cursor.__anext__())
+
+
+class GrievanceCollection:
+    """
+    A grievance collection seen through the codec.
+
+    Supports the operations the API uses, taking and returning full-form
+    documents. ``raw`` is the underlying Motor collection.
+    """
+
+    def __init__(self, collection, storage_format: str):
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown grievance storage format: {storage_format}")
+        self.raw = collection
+        self.storage_format = storage_format
+
+    @property
+    def name(self) -> str:
+        return self.raw.name
+
+    # Translation
+
+    def query(self, query: Optional[dict]) -> dict:
+        """Stored-form filter matching documents in any form in use."""
+        query = query or {}
+        if self.storage_format == FORMAT_FULL:
+            return query
+        compact = encode_filter(query)
+        if self.storage_format == FORMAT_COMPACT:
+            return compact
+        if compact == query:
+            return query  # only unrenamed fields, e.g. _id
+        return {"$or": [
+            {**query, VERSION_FIELD: {"$exists": False}},
+            {**compact, VERSION_FIELD: COMPACT_VERSION},
+        ]}
+
+    def projection(self, projection):
+        if projection is None or self.storage_format == FORMAT_FULL:
+            return projection
+        compact = encode_projection(projection)
+        if self.storage_format == FORMAT_COMPACT:
+            return compact
+        full = projection if isinstance(projection, dict) else {field: 1 for field in projection}
+        return {**full, **compact}
+
+    def expr(self, path: str):
+        """Aggregation expression for a full-form field path."""
+        stored = encode_path(path)[0]
+        if self.storage_format == FORMAT_FULL or stored == path:
+            return f"${path}"
+        if self.storage_format == FORMAT_COMPACT:
+            return f"${stored}"
+        return {"$ifNull": [f"${stored}", f"${path}"]}
+
+    def values(self, field: str, *values) -> list:
+        """Stored representations of ``values`` of ``field``, for ``$in`` in aggregations."""
+        codec = VALUE_CODECS.get(field)
+        if codec is None or self.storage_format == FORMAT_FULL:
+            return list(values)
+        compact = [codec.encode(value) for value in values]
+        if self.storage_format == FORMAT_COMPACT:
+            return compact
+        return list(values) + [value for value in compact if value not in values]
+
+    def _document(self, doc: dict) -> dict:
+        doc.setdefault("_id", ObjectId())  # callers read the id back from the document, as with insert_one
+        return doc if self.storage_format == FORMAT_FULL else encode_document(doc)
+
+    def _update_operations(self, operation_class, query: dict, update: dict) -> list:
+        _check_update(update)  # in every format, so a pipeline doesn't only fail after a migration
+        if self.storage_format == FORMAT_FULL:
+            return [operation_class(query, update)]
+        compact_query, compact_update = encode_filter(query), encode_update(update)
+        if self.storage_format == FORMAT_COMPACT:
+            return [operation_class(compact_query, compact_update)]
+        if compact_query == query and compact_update == update:
+            return [operation_class(query, update)]
+        # One operation per form; the version marker ensures each document matches only its own
+        return [
+            operation_class({**query, VERSION_FIELD: {"$exists": False}}, update),
+            operation_class({**compact_query, VERSION_FIELD: COMPACT_VERSION}, compact_update),
+        ]
+
+    def _translate_operation(self, operation) -> list:
+        if isinstance(operation, (UpdateOne, UpdateMany)):
+            return self._update_operations(type(operation), operation._filter, operation._doc)
+        if isinstance(operation, InsertOne):
+            return [InsertOne(self._document(operation._doc))]
+        raise TypeError(f"Unsupported bulk operation for grievances: {type(operation).__name__}")
+
+    # Reads
+
+    def find(self, query: Optional[dict] = None, projection=None) -> _Cursor:
+        return _Cursor(self.raw.find(self.query(query), self.projection(projection)), self.storage_format)
+
+    async def find_one(self, query: Optional[dict] = None, projection=None) -> Optional[dict]:
+        return decode_document(await self.raw.find_one(self.query(query), self.projection(projection)))
+
+    async def count_documents(self, query: dict, **kwargs) -> int:
+        return await self.raw.count_documents(self.query(query), **kwargs)
+
+    def aggregate(self, pipeline: list, **kwargs):
+        """Run a pipeline already built with ``query``, ``expr`` and ``values``."""
+        return self.raw.aggregate(pipeline, **kwargs)
+
+    # Writes
+
+    async def insert_one(self, doc: dict):
+        return await self.raw.insert_one(self._document(doc))
+
+    async def insert_many(self, docs: list, ordered: bool = True):
+        return await self.raw.insert_many([self._document(doc) for doc in docs], ordered=ordered)
+
+    async def update_one(self, query: dict, update: dict):
+        operations = self._update_operations(UpdateOne, query, update)
+        if len(operations) == 1:
+            return await self.raw.update_one(operations[0]._filter, operations[0]._doc)
+        return await self.raw.bulk_write(operations, ordered=False)
+
+    async def update_many(self, query: dict, update: dict):
+        operations = self._update_operations(UpdateMany, query, update)
+        if len(operations) == 1:
+            return await self.raw.update_many(operations[0]._filter, operations[0]._doc)
+        return await self.raw.bulk_write(operations, ordered=False)
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        translated = [stored for operation in operations for stored in self._translate_operation(operation)]
+        return await self.raw.bulk_write(translated, ordered=ordered)
+
+    async def delete_many(self, query: dict):
+        return await self.raw.delete_many(self.query(query))
@@ -0,0 +1,171 @@
+"""
+Response compression.
+
+Pure ASGI middleware compressing responses of at least
+``COMPRESSION_MINIMUM_SIZE`` bytes with brotli when the optional
+``brotli`` package is installed and the client accepts it, otherwise
+gzip. Small responses go out as-is: below about a kilobyte the saving is
+a few hundred bytes at most and not worth the CPU.
+
+Single-message responses (every JSON route) are compressed in one call
+and keep an accurate ``Content-Length``; streamed responses are
+compressed chunk by chunk. Compressing changes the bytes of the body, so
+strong ETags are downgraded to weak ones (``W/"..."``), which still match
+``If-None-Match``.
+"""
+import zlib
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.timing import timed
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSION_INPUT_BYTES = Counter(
+    "http_compression_input_bytes_total",
+    "Response bytes before compression, by content encoding",
+    ("encoding",)
+)
+COMPRESSION_OUTPUT_BYTES = Counter(
+    "http_compression_output_bytes_total",
+    "Response bytes after compression, by content encoding",
+    ("encoding",)
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported encoding from an ``Accept-Encoding`` header, or None."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    def allowed(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Incremental compressor for one response."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip container
+        self.input_bytes = 0
+        self.output_bytes = 0
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data) + (self._brotli.finish() if finish else self._brotli.flush())
+        else:
+            out = self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+        self.input_bytes += len(data)
+        self.output_bytes += len(out)
+        if finish:
+            COMPRESSION_INPUT_BYTES.labels(self.encoding).inc(self.input_bytes)
+            COMPRESSION_OUTPUT_BYTES.labels(self.encoding).inc(self.output_bytes)
+        return out
+
+
+def _response_headers(headers, encoding: str, content_length: Optional[int]):
+    updated = []
+    vary = None
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered == b"content-length":
+            continue
+        if lowered == b"vary":
+            vary = value
+            continue
+        if lowered == b"etag" and not value.startswith(b"W/"):
+            value = b"W/" + value
+        updated.append((name, value))
+    updated.append((b"content-encoding", encoding.encode("latin-1")))
+    updated.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+    if content_length is not None:
+        updated.append((b"content-length", str(content_length).encode("latin-1")))
+    return updated
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies (see module docstring)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                # Already encoded by the route (or nothing to compress)
+                if any(name.lower() == b"content-encoding" for name, _ in headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                with timed("compress", encoding):
+                    compressed = compressor.compress(body, finish=not more_body)
+                headers = _response_headers(
+                    start_message.get("headers", []), encoding, None if more_body else len(compressed)
+                )
+                await send({**start_message, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+                return
+
+            with timed("compress", encoding):
+                compressed = compressor.compress(body, finish=not more_body)
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
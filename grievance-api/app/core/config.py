@@ -7,16 +7,128 @@ class Settings(BaseSettings):
     # MongoDB settings
     MONGO_URI: str = "mongodb://localhost:27017"
     MONGO_DB: str = "grievance_db"
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int = 300000
+    # Read preference for admin listings, analytics and exports
+    # ("secondaryPreferred" offloads them from the primary on a replica set)
+    MONGO_ANALYTICS_READ_PREFERENCE: str = "secondaryPreferred"
+    MONGO_MAX_STALENESS_SECONDS: int = 90  # -1 disables; MongoDB requires >= 90
     
     # JWT settings
     JWT_SECRET: str = "change_me_in_production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    REVOCATION_SYNC_INTERVAL: float = 5.0  # seconds; how soon other workers see a revocation
+    
+    # Multi-tenancy: municipality assumed for tokens, users and documents that carry no tenant_id
+    DEFAULT_TENANT: str = "default"
     
     # Groq LLM settings
     GROQ_API_KEY: str = ""
     GROQ_MODEL: str = "llama-3.1-8b-instant"
     GROQ_TIMEOUT: int = 30
+    GROQ_BASE_URL: str = ""  # override the API endpoint, e.g. the stub LLM used for load tests
+    GROQ_MAX_TOKENS: int = 200  # hard cap on completion length; a classification needs about 60
+    GROQ_STREAMING: bool = True  # stream completions and stop reading once the JSON object is complete
+    
+    # LLM backends (comma-separated, in order of preference until latencies are known): groq, local
+    LLM_BACKENDS: str = "groq"
+    LOCAL_LLM_BASE_URL: str = ""  # OpenAI-compatible server without /v1, e.g. llama.cpp on http://localhost:8080
+    LOCAL_LLM_MODEL: str = "local"
+    LOCAL_LLM_API_KEY: str = ""
+    LOCAL_LLM_TIMEOUT: float = 30.0
+    LOCAL_LLM_MAX_TOKENS: int = 200
+    LOCAL_LLM_STREAMING: bool = True
+    
+    # Latency-aware routing between LLM backends
+    LLM_ROUTER_WINDOW: int = 50  # recent calls per backend used for latency and error rate
+    LLM_ROUTER_MIN_SAMPLES: int = 5
+    LLM_ROUTER_MAX_ERROR_RATE: float = 0.5  # above this a backend is skipped for the cooldown
+    LLM_ROUTER_COOLDOWN_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_QUANTILE: float = 0.9  # a call slower than this quantile of its backend's recent calls is hedged
+    LLM_HEDGE_MIN_DELAY_MS: float = 100.0
+    
+    # Adaptive (AIMD) concurrency limit for outbound LLM calls
+    LLM_CONCURRENCY_INITIAL: int = 4
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 32
+    LLM_LATENCY_TARGET: float = 2.0  # seconds; slower calls stop the limit from growing
+    LLM_BACKOFF_RATIO: float = 0.5  # multiplier applied on 429s/timeouts
+    LLM_QUEUE_MAX_SIZE: int = 50  # overflow goes straight to fallback classification
+    LLM_QUEUE_TIMEOUT: float = 5.0  # seconds a request may wait for a slot
+    LLM_URGENT_RESERVED_SLOTS: int = 1  # slots only danger-flagged grievances may use; the limit stays above this
+    
+    # Submission rate limiting (token bucket)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (single process) or "mongo" (shared across workers)
+    RATE_LIMIT_USER_CAPACITY: float = 5
+    RATE_LIMIT_USER_REFILL_PER_SECOND: float = 0.1  # 6 per minute sustained
+    RATE_LIMIT_TENANT_CAPACITY: float = 50  # per municipality, so one tenant can't use up the global bucket
+    RATE_LIMIT_TENANT_REFILL_PER_SECOND: float = 10
+    RATE_LIMIT_GLOBAL_CAPACITY: float = 100
+    RATE_LIMIT_GLOBAL_REFILL_PER_SECOND: float = 20
+    
+    # Grievance storage layout: "full", "migrating" (reads both, writes compact) or "compact"; see app/core/codec.py
+    GRIEVANCE_STORAGE_FORMAT: str = "full"
+    
+    # Location extraction (JSON place list; empty = bundled sample gazetteer)
+    GAZETTEER_PATH: str = ""
+    
+    # Incident grouping: grievances for the same department and place within the window
+    INCIDENTS_ENABLED: bool = True
+    INCIDENT_WINDOW_MINUTES: int = 120
+    
+    # Group-commit buffer for grievance inserts (coalesces submissions into insert_many)
+    GRIEVANCE_WRITE_BUFFER_ENABLED: bool = False
+    GRIEVANCE_WRITE_BUFFER_MAX_BATCH: int = 100
+    GRIEVANCE_WRITE_BUFFER_MAX_DELAY_MS: float = 5.0
+    
+    # Department notifications (outbox relayed and sent by a background dispatcher in each worker)
+    NOTIFICATIONS_ENABLED: bool = False
+    NOTIFICATION_IMMEDIATE_PRIORITIES: str = "high"  # comma-separated; other priorities go into digests
+    NOTIFICATION_DIGEST_INTERVAL_MINUTES: float = 60.0  # a recipient's digest is sent this long after its oldest item
+    NOTIFICATION_POLL_INTERVAL: float = 2.0  # seconds between dispatcher cycles
+    NOTIFICATION_BATCH_SIZE: int = 100
+    NOTIFICATION_MAX_ATTEMPTS: int = 8
+    NOTIFICATION_RETRY_BASE_SECONDS: float = 30.0  # doubled after each failed attempt
+    NOTIFICATION_RETENTION_DAYS: int = 7  # sent/failed outbox records are kept this long
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_STARTTLS: bool = False
+    SMTP_FROM: str = "grievances@municipal.gov"
+    SMTP_TIMEOUT: float = 10.0
+    
+    # Archival of closed grievances (scripts/archive_grievances.py)
+    ARCHIVE_AFTER_DAYS: int = 90  # resolved/rejected grievances untouched this long are archived
+    ARCHIVE_BATCH_SIZE: int = 1000
+    
+    # Bulk ingestion
+    BULK_MAX_ROWS: int = 5000  # rows accepted per batch request
+    BULK_CLASSIFY_CONCURRENCY: int = 8  # keep below LLM_QUEUE_MAX_SIZE so interactive submissions still get LLM slots
+    BULK_INSERT_BATCH_SIZE: int = 500
+    
+    # Serving (used by `python -m app.server`)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 1  # 0 = one worker per available CPU
+    SHUTDOWN_DRAIN_TIMEOUT: float = 20.0  # seconds to wait for in-flight requests on shutdown
+    
+    # Response compression (brotli when the optional package is installed, else gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller responses are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the writer thread; overflow is dropped and counted
+    
+    # Diagnostics
+    SERVER_TIMING_ENABLED: bool = True  # per-phase Server-Timing header and timing log line
     
     class Config:
         env_file = ".env"
@@ -1,14 +1,28 @@
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, HASHED
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import ReadPreference, read_pref_mode_from_name, make_read_preference
 from app.core.config import settings
+from app.core.codec import FORMAT_FULL, FORMAT_MIGRATING, FORMAT_COMPACT, GrievanceCollection, index_keys
+from app.core.metrics import MongoCommandMetrics
 
-# MongoDB client
+logger = logging.getLogger(__name__)
+
+# MongoDB client (created per process in the lifespan hook, never at import/fork time)
 client: AsyncIOMotorClient = None
 
 
 async def connect_to_mongo():
     """Connect to MongoDB on startup."""
     global client
-    client = AsyncIOMotorClient(settings.MONGO_URI)
+    client = AsyncIOMotorClient(
+        settings.MONGO_URI,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        event_listeners=[MongoCommandMetrics()]
+    )
 
 
 async def close_mongo_connection():
@@ -36,16 +50,217 @@ def get_users_collection():
 
 
 def get_departments_collection():
-    """Get departments collection."""
+    """Get departments collection (per-tenant department configuration)."""
     return get_database()["departments"]
 
 
-def get_grievances_collection():
-    """Get grievances collection."""
-    return get_database()["grievances"]
+def get_tenants_collection():
+    """Get tenants collection (municipalities hosted by this deployment)."""
+    return get_database()["tenants"]
+
+
+def analytics_read_preference():
+    """
+    Read preference for admin listings, analytics and exports.
+    
+    These reads tolerate slightly stale data, so on a replica set they can be
+    served by secondaries (bounded by MONGO_MAX_STALENESS_SECONDS) instead of
+    competing with submission writes on the primary.
+    """
+    mode = read_pref_mode_from_name(settings.MONGO_ANALYTICS_READ_PREFERENCE)
+    if mode == ReadPreference.PRIMARY.mode:  # primary does not accept max staleness
+        return make_read_preference(mode, None)
+    return make_read_preference(mode, None, settings.MONGO_MAX_STALENESS_SECONDS)
+
+
+def get_grievances_collection(analytics: bool = False) -> GrievanceCollection:
+    """
+    Get grievances collection.
+    
+    Reads default to the primary so citizens always see their own writes.
+    Pass analytics=True for admin listings and reporting queries.
+    Documents are stored as GRIEVANCE_STORAGE_FORMAT (see app.core.codec).
+    """
+    collection = get_database()["grievances"]
+    if analytics:
+        collection = collection.with_options(read_preference=analytics_read_preference())
+    return GrievanceCollection(collection, settings.GRIEVANCE_STORAGE_FORMAT)
+
+
+def get_grievances_archive_collection() -> GrievanceCollection:
+    """
+    Get the archive of long-closed grievances.
+    
+    Holds resolved/rejected grievances moved out of the live collection by
+    the archival job; documents keep their original ``_id``.
+    """
+    return GrievanceCollection(get_database()["grievances_archive"], settings.GRIEVANCE_STORAGE_FORMAT)
+
+
+def get_grievance_events_collection(analytics: bool = False):
+    """
+    Get the append-only log of grievance status transitions.
+    
+    Pass analytics=True for reporting queries.
+    """
+    collection = get_database()["grievance_events"]
+    if analytics:
+        return collection.with_options(read_preference=analytics_read_preference())
+    return collection
+
+
+def get_resolution_sketches_collection(analytics: bool = False):
+    """Get per-day time-to-resolution sketches (see resolution_stats_service)."""
+    collection = get_database()["resolution_sketches"]
+    if analytics:
+        return collection.with_options(read_preference=analytics_read_preference())
+    return collection
+
+
+def get_incidents_collection():
+    """Get incidents collection (groups of related grievances)."""
+    return get_database()["incidents"]
+
+
+def get_notification_outbox_collection():
+    """Get notifications waiting to be sent (see app.services.notification_service)."""
+    return get_database()["notification_outbox"]
+
+
+def get_revoked_tokens_collection():
+    """Get revoked access tokens and per-user token cutoffs (see app.core.revocation)."""
+    return get_database()["revoked_tokens"]
+
+
+def grievance_index_forms(keys):
+    """Index key specifications for each grievance storage form in use."""
+    return {
+        FORMAT_FULL: [keys],
+        FORMAT_MIGRATING: [keys, index_keys(keys)],
+        FORMAT_COMPACT: [index_keys(keys)],
+    }[settings.GRIEVANCE_STORAGE_FORMAT]
+
+
+# Every tenant-scoped index leads with tenant_id, so each tenant's queries scan only its own range
+GRIEVANCE_INDEXES = [
+    ([("tenant_id", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ([("tenant_id", ASCENDING), ("predicted_department", ASCENDING), ("created_at", DESCENDING)], {}),
+    ([("tenant_id", ASCENDING), ("predicted_department", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)], {}),
+    ([("tenant_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    # Hotspots: grievances with an extracted location (2dsphere skips documents without one)
+    ([("tenant_id", ASCENDING), ("location", GEOSPHERE), ("predicted_department", ASCENDING), ("created_at", DESCENDING)], {}),
+    ([("tenant_id", ASCENDING), ("incident_id", ASCENDING)], {"sparse": True}),
+    # Archival job: closed grievances by age, across tenants
+    ([("status", ASCENDING), ("updated_at", ASCENDING)], {}),
+    # Urgent (danger-flagged) listing: only urgent grievances are indexed
+    ([("tenant_id", ASCENDING), ("urgent", ASCENDING), ("created_at", DESCENDING)], {"partialFilterExpression": {"urgent": True}}),
+    # Notification relay: only grievances not yet copied to the outbox are indexed
+    ([("notification_pending", ASCENDING)], {"partialFilterExpression": {"notification_pending": True}}),
+    # Shard key index (see SHARD_KEYS)
+    ([("tenant_id", ASCENDING), ("_id", HASHED)], {}),
+]
+GRIEVANCE_ARCHIVE_INDEXES = [
+    ([("tenant_id", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ([("tenant_id", ASCENDING), ("_id", HASHED)], {}),
+]
+
+# Shard keys for collections that grow with usage. Ranged on tenant_id, so a
+# tenant's queries target only the shards holding its chunks, and hashed
+# within a tenant, so a large municipality still spreads across shards.
+# Unique indexes on sharded collections are prefixed with their shard key.
+SHARD_KEYS = {
+    "grievances": {"tenant_id": 1, "_id": "hashed"},
+    "grievances_archive": {"tenant_id": 1, "_id": "hashed"},
+    "grievance_events": {"tenant_id": 1, "grievance_id": "hashed"},
+    "incidents": {"tenant_id": 1, "key": 1},
+    "users": {"tenant_id": 1, "email": 1},
+}
+
+# Collections whose documents predate tenancy and belong to the default tenant
+TENANT_SCOPED_COLLECTIONS = (
+    "grievances", "grievances_archive", "grievance_events", "incidents", "users", "resolution_sketches", "departments"
+)
+
+
+async def ensure_indexes():
+    """Create the indexes used by the API's queries (idempotent)."""
+    for collection, indexes in (
+        (get_grievances_collection().raw, GRIEVANCE_INDEXES),
+        (get_grievances_archive_collection().raw, GRIEVANCE_ARCHIVE_INDEXES),
+    ):
+        for keys, options in indexes:
+            for stored_keys in grievance_index_forms(keys):
+                await collection.create_index(stored_keys, **options)
+    
+    events_col = get_grievance_events_collection()
+    # Transition-time analytics: first arrival in a status, per department, by time
+    await events_col.create_index([
+        ("tenant_id", ASCENDING), ("department", ASCENDING), ("to_status", ASCENDING), ("first", ASCENDING), ("at", ASCENDING)
+    ])
+    await events_col.create_index([("tenant_id", ASCENDING), ("grievance_id", HASHED)])
+    await events_col.create_index([("grievance_id", ASCENDING), ("at", ASCENDING)])
+    
+    await get_resolution_sketches_collection().create_index([
+        ("tenant_id", ASCENDING), ("status", ASCENDING), ("department", ASCENDING), ("priority", ASCENDING), ("day", ASCENDING)
+    ])
+    
+    incidents_col = get_incidents_collection()
+    # At most one incident per tenant, department and place accepting new grievances
+    await incidents_col.create_index(
+        [("tenant_id", ASCENDING), ("key", ASCENDING)], unique=True, partialFilterExpression={"accepting": True}
+    )
+    await incidents_col.create_index([
+        ("tenant_id", ASCENDING), ("department", ASCENDING), ("status", ASCENDING), ("last_reported_at", DESCENDING)
+    ])
+    
+    outbox_col = get_notification_outbox_collection()
+    await outbox_col.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+    await outbox_col.create_index("claim", sparse=True)
+    await outbox_col.create_index([
+        ("tenant_id", ASCENDING), ("recipient", ASCENDING), ("kind", ASCENDING), ("status", ASCENDING)
+    ])
+    # Sent and failed notifications are dropped after NOTIFICATION_RETENTION_DAYS
+    await outbox_col.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Rate limit buckets are dropped once they have refilled completely
+    await get_database()["rate_limits"].create_index("expires_at", expireAfterSeconds=0)
+    
+    revoked_col = get_revoked_tokens_collection()
+    # Entries are dropped once every token they could match has expired
+    await revoked_col.create_index("expires_at", expireAfterSeconds=0)
+    await revoked_col.create_index("updated_at")
+    
+    users_col = get_users_collection()
+    try:
+        await users_col.create_index([("tenant_id", ASCENDING), ("email", ASCENDING)], unique=True)
+    except OperationFailure as e:
+        logger.warning(f"Could not create unique email index (duplicate emails?): {e}")
+    # Pre-tenancy unique indexes: the same email (or place) may now exist in several municipalities
+    for collection, legacy_index in ((users_col, "email_1"), (incidents_col, "key_1")):
+        if legacy_index in await collection.index_information():
+            await collection.drop_index(legacy_index)
+
+
+async def backfill_default_tenant():
+    """Assign documents created before tenancy to the default tenant (idempotent)."""
+    for name in TENANT_SCOPED_COLLECTIONS:
+        result = await get_database()[name].update_many(
+            {"tenant_id": {"$exists": False}},
+            {"$set": {"tenant_id": settings.DEFAULT_TENANT}}
+        )
+        if result.modified_count:
+            logger.info(f"Assigned {result.modified_count} {name} documents to tenant {settings.DEFAULT_TENANT}")
 
 
 # Export shortcuts
 users = get_users_collection
 departments = get_departments_collection
+tenants = get_tenants_collection
 grievances = get_grievances_collection
+grievances_archive = get_grievances_archive_collection
+incidents = get_incidents_collection
+grievance_events = get_grievance_events_collection
+resolution_sketches = get_resolution_sketches_collection
+notification_outbox = get_notification_outbox_collection
+revoked_tokens = get_revoked_tokens_collection
+
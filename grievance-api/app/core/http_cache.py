@@ -0,0 +1,59 @@
+"""
+Conditional GET support for grievance reads.
+
+Responses built from grievance documents carry an ETag derived from the
+documents' ids, ``updated_at`` and status, plus the response schema's
+field names so a deploy that changes the representation invalidates old
+tags. Every status change bumps ``updated_at``, so the tag changes exactly
+when the response would.
+
+Clients revalidate with ``If-None-Match``; on a match the route returns
+``304 Not Modified`` without building or serializing the response models.
+Responses are per user (``private``) and must be revalidated on every use
+(``no-cache``), so a cached page never shows a stale status.
+"""
+import hashlib
+from typing import Iterable
+from fastapi import Request, Response
+from app.schemas import GrievanceResponse
+
+CACHE_CONTROL = "private, no-cache"
+
+_SCHEMA = ",".join(GrievanceResponse.model_fields).encode()
+
+
+def grievance_etag(grievances: Iterable[dict]) -> str:
+    """Weak ETag for a response built from ``grievances``, in order."""
+    digest = hashlib.blake2b(_SCHEMA, digest_size=16)
+    for grievance in grievances:
+        updated_at = grievance.get("updated_at") or grievance["created_at"]
+        digest.update(f"{grievance['_id']}|{updated_at.isoformat()}|{grievance.get('status')};".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether the request's ``If-None-Match`` matches ``etag`` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in header.split(","))
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["Vary"] = "Authorization"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
@@ -0,0 +1,186 @@
+"""
+Structured JSON logging with formatting and I/O off the event loop.
+
+- ``JsonFormatter`` renders each record as a real JSON object, including
+  the request context (request id, route, user role) and any ``extra``
+  fields passed to the logger.
+- ``setup_logging`` installs a bounded ``QueueHandler`` on the root logger.
+  The calling thread only merges the message arguments and enqueues the
+  record; a ``QueueListener`` thread formats and writes it. When the queue
+  is full, records are dropped and counted instead of blocking the caller.
+- ``RequestContextMiddleware`` binds a request id (taken from
+  ``X-Request-ID`` or generated) for the duration of each request.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the logging queue was full"
+)
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName", "color_message"}
+
+
+class RequestContext:
+    """Per-request fields attached to every log record emitted during the request."""
+
+    __slots__ = ("request_id", "scope", "user_role")
+
+    def __init__(self, request_id: str, scope: dict):
+        self.request_id = request_id
+        self.scope = scope
+        self.user_role: Optional[str] = None
+
+    @property
+    def route(self) -> Optional[str]:
+        route = self.scope.get("route")
+        return route.path if route is not None else None
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def set_user_role(role: str) -> None:
+    """Record the authenticated user's role on the current request context."""
+    context = _request_context.get()
+    if context is not None:
+        context.user_role = role
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+
+        context = getattr(record, "request_context", None)
+        if context is not None:
+            entry["request_id"] = context.request_id
+            entry["route"] = context.route
+            if context.user_role:
+                entry["user_role"] = context.user_role
+
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != "request_context":
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks and leaves formatting to the listener.
+
+    Only the message arguments are merged on the calling thread, so later
+    mutation of those arguments can't change the logged text.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_context = _request_context.get()
+        return record
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue is lock-free on put; the size bound is approximate
+        if self.queue.qsize() >= self.max_size:
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self.queue.put_nowait(record)
+
+
+_listener: Optional[QueueListener] = None
+_queue: Optional[queue.SimpleQueue] = None
+
+LOG_QUEUE_DEPTH = Gauge(
+    "log_queue_depth",
+    "Log records waiting to be written",
+    function=lambda: _queue.qsize() if _queue is not None else 0
+)
+
+
+def setup_logging() -> None:
+    """Route all logging through a bounded queue to a JSON stdout writer thread."""
+    global _listener, _queue
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    _queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [BoundedQueueHandler(_queue, settings.LOG_QUEUE_SIZE)]
+    root.setLevel(settings.LOG_LEVEL)
+
+    _listener = QueueListener(_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestContextMiddleware:
+    """ASGI middleware binding a request id to logs and echoing it as ``X-Request-ID``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+                }
+            await send(message)
+
+        token = _request_context.set(RequestContext(request_id, scope))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_context.reset(token)
@@ -0,0 +1,113 @@
+"""
+On-demand sampling profiler for the event loop thread.
+
+While active, a background thread samples the event loop thread's stack at
+a fixed interval and aggregates identical stacks. The result is exported in
+the collapsed ("folded") stack format understood by flamegraph.pl,
+speedscope and similar tools: one ``frame;frame;frame count`` line per
+distinct stack.
+
+The profiler is idle by default; when inactive the only cost on the request
+path is a single attribute check.
+"""
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class SamplingProfiler:
+    """Stack-sampling profiler limited by duration and/or request count."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.active = False
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._deadline: Optional[float] = None
+        self._remaining_requests: Optional[int] = None
+        self._target_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, duration_seconds: Optional[float] = None, max_requests: Optional[int] = None) -> None:
+        """
+        Start sampling the calling thread (the event loop thread).
+
+        Sampling stops after ``duration_seconds`` or once ``max_requests``
+        requests have completed, whichever comes first.
+        """
+        with self._lock:
+            if self.active:
+                raise RuntimeError("Profiler is already running")
+            self._stacks = Counter()
+            self.samples = 0
+            self._target_thread_id = threading.get_ident()
+            self._deadline = time.monotonic() + duration_seconds if duration_seconds else None
+            self._remaining_requests = max_requests
+            self.started_at = datetime.utcnow()
+            self.finished_at = None
+            self.active = True
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling; collected stacks remain available."""
+        with self._lock:
+            if self.active:
+                self.active = False
+                self.finished_at = datetime.utcnow()
+
+    def request_finished(self) -> None:
+        """Count a completed request towards the request limit."""
+        if self._remaining_requests is None:
+            return
+        self._remaining_requests -= 1
+        if self._remaining_requests <= 0:
+            self.stop()
+
+    def _run(self) -> None:
+        while self.active:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                self.stop()
+                break
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is not None:
+                stack = self._collapse(frame)
+                with self._lock:
+                    self._stacks[stack] += 1
+                    self.samples += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def status(self) -> Dict:
+        """Current profiler state."""
+        return {
+            "active": self.active,
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "remaining_requests": self._remaining_requests,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def collapsed(self) -> str:
+        """Collected samples in collapsed stack format."""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,198 @@
+"""
+Token-bucket admission control for expensive endpoints.
+
+Each bucket holds up to ``capacity`` tokens and refills at ``refill_rate``
+tokens per second. A request consumes one token; when the bucket is empty
+the caller is rejected with 429 and a ``Retry-After`` hint. A request
+checked against several buckets gets back the tokens it took from the
+earlier ones when a later one rejects it.
+
+A bucket that has refilled completely is the same as no bucket, so idle
+buckets are dropped: in memory by a periodic sweep, in MongoDB by a TTL
+index on ``expires_at`` (the time the bucket will be full again).
+
+Two backends are provided:
+- ``InMemoryRateLimitBackend`` for single-process deployments
+- ``MongoRateLimitBackend`` which keeps bucket state in MongoDB so that
+  several workers share the same limits
+"""
+import asyncio
+import math
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+from fastapi import Depends, HTTPException, status
+from pymongo import ReturnDocument
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.security import get_current_user
+from app.schemas import TokenData
+
+GLOBAL_BUCKET_KEY = "global"
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class RateLimitBackend:
+    """Interface for token-bucket storage backends."""
+
+    async def acquire(self, key: str, capacity: float, refill_rate: float) -> float:
+        """
+        Try to take one token from the bucket identified by ``key``.
+
+        Returns 0.0 when the token was granted, otherwise the number of
+        seconds until a token becomes available.
+        """
+        raise NotImplementedError
+
+    async def release(self, key: str, capacity: float, refill_rate: float) -> None:
+        """Return a token taken by ``acquire`` for a request that was rejected elsewhere."""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local buckets stored as ``key -> (tokens, last_refill, full_at)``."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = asyncio.Lock()
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+
+    def _store(self, key: str, tokens: float, now: float, capacity: float, refill_rate: float) -> None:
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_rate)
+
+    def _refilled(self, key: str, now: float, capacity: float, refill_rate: float) -> float:
+        tokens, last_refill, _ = self._buckets.get(key, (capacity, now, now))
+        return min(capacity, tokens + (now - last_refill) * refill_rate)
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets that have refilled completely."""
+        self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+    async def acquire(self, key: str, capacity: float, refill_rate: float) -> float:
+        async with self._lock:
+            now = time.monotonic()
+            if now >= self._next_sweep:
+                self._sweep(now)
+            tokens = self._refilled(key, now, capacity, refill_rate)
+
+            if tokens >= 1.0:
+                self._store(key, tokens - 1.0, now, capacity, refill_rate)
+                return 0.0
+
+            self._store(key, tokens, now, capacity, refill_rate)
+            return (1.0 - tokens) / refill_rate
+
+    async def release(self, key: str, capacity: float, refill_rate: float) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            self._store(key, min(capacity, self._refilled(key, now, capacity, refill_rate) + 1.0), now, capacity, refill_rate)
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """
+    Buckets shared across workers through the ``rate_limits`` collection.
+
+    The refill-and-take step is a single pipeline update, so concurrent
+    workers never grant the same token twice.
+    """
+
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+
+    async def acquire(self, key: str, capacity: float, refill_rate: float) -> float:
+        now = datetime.utcnow()
+        elapsed_seconds = {
+            "$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]
+        }
+        pipeline = [
+            {"$set": {
+                "tokens": {"$min": [
+                    capacity,
+                    {"$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [elapsed_seconds, refill_rate]}
+                    ]}
+                ]},
+                "updated_at": now
+            }},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            self._expiry(now, capacity, refill_rate),
+        ]
+
+        bucket = await get_database()[self.collection_name].find_one_and_update(
+            {"_id": key},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        if bucket["allowed"]:
+            return 0.0
+        return (1.0 - bucket["tokens"]) / refill_rate
+
+    async def release(self, key: str, capacity: float, refill_rate: float) -> None:
+        now = datetime.utcnow()
+        await get_database()[self.collection_name].update_one(
+            {"_id": key},
+            [
+                {"$set": {"tokens": {"$min": [capacity, {"$add": ["$tokens", 1]}]}}},
+                self._expiry(now, capacity, refill_rate),
+            ]
+        )
+
+    @staticmethod
+    def _expiry(now: datetime, capacity: float, refill_rate: float) -> dict:
+        """Pipeline stage setting ``expires_at`` to when the bucket will be full again (TTL-indexed)."""
+        full_in_ms = {"$multiply": [{"$divide": [{"$subtract": [capacity, "$tokens"]}, refill_rate]}, 1000]}
+        return {"$set": {"expires_at": {"$add": [now, full_in_ms]}}}
+
+
+def _create_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimitBackend()
+    return InMemoryRateLimitBackend()
+
+
+backend: RateLimitBackend = _create_backend()
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many grievance submissions, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+async def limit_grievance_submission(current_user: TokenData = Depends(get_current_user)) -> TokenData:
+    """
+    Dependency enforcing per-user, per-tenant and global submission limits.
+
+    Runs before the route body, so rejected requests never reach
+    the classifier. The tenant bucket is smaller than the global one, so
+    a burst from one municipality leaves capacity for the others. Tokens
+    taken from earlier buckets are returned when a later bucket rejects.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return current_user
+
+    buckets = [
+        # User ids are only unique within a tenant
+        (f"user:{current_user.tenant_id}:{current_user.sub}", settings.RATE_LIMIT_USER_CAPACITY, settings.RATE_LIMIT_USER_REFILL_PER_SECOND),
+        (f"tenant:{current_user.tenant_id}", settings.RATE_LIMIT_TENANT_CAPACITY, settings.RATE_LIMIT_TENANT_REFILL_PER_SECOND),
+        (GLOBAL_BUCKET_KEY, settings.RATE_LIMIT_GLOBAL_CAPACITY, settings.RATE_LIMIT_GLOBAL_REFILL_PER_SECOND),
+    ]
+    taken: List[Tuple[str, float, float]] = []
+    for bucket in buckets:
+        retry_after = await backend.acquire(*bucket)
+        if retry_after:
+            # Rejected here: the request shouldn't cost the earlier buckets anything
+            for earlier in taken:
+                await backend.release(*earlier)
+            raise _too_many_requests(retry_after)
+        taken.append(bucket)
+
+    return current_user
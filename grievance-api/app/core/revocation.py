@@ -0,0 +1,131 @@
+"""
+Access token revocation.
+
+Tokens carry a unique ``jti`` and their issue time (``iat``). Two kinds of
+revocation are stored in the ``revoked_tokens`` collection:
+
+- a single token (logout), by ``jti``
+- every token of a user issued before a cutoff (log out everywhere, or
+  an admin whose access was removed)
+
+Each worker keeps the unexpired revocations in memory and polls the
+collection for changes every ``REVOCATION_SYNC_INTERVAL`` seconds, so
+checking a token is a set/dict lookup with no database round trip.
+Revocations made by a worker apply to it immediately and to the other
+workers within one sync interval. Entries expire (TTL index) once every
+token they could match has expired anyway, so the in-memory state stays
+proportional to recent revocations.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.database import get_revoked_tokens_collection
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Re-read this much history on each poll, for writes from workers with a slightly different clock
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class RevocationList:
+    """In-memory view of ``revoked_tokens``, kept in sync by polling."""
+
+    def __init__(self):
+        self._tokens: Dict[str, datetime] = {}  # jti -> when the token expires
+        self._user_cutoffs: Dict[str, datetime] = {}  # user id -> tokens issued before this are revoked
+        self._watermark: Optional[datetime] = None
+        self.synced_at: Optional[float] = None  # monotonic time of the last successful sync
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._user_cutoffs)
+
+    def is_revoked(self, user_id: str, jti: Optional[str], issued_at: Optional[datetime]) -> bool:
+        if jti is not None and jti in self._tokens:
+            return True
+        cutoff = self._user_cutoffs.get(user_id)
+        return cutoff is not None and (issued_at is None or issued_at < cutoff)
+
+    def _apply(self, doc: dict) -> None:
+        if doc["kind"] == "token":
+            self._tokens[doc["jti"]] = doc["expires_at"]
+        else:
+            current = self._user_cutoffs.get(doc["user_id"])
+            if current is None or doc["not_before"] > current:
+                self._user_cutoffs[doc["user_id"]] = doc["not_before"]
+
+    def _prune(self, now: datetime) -> None:
+        self._tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+        lifetime = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        self._user_cutoffs = {
+            user_id: cutoff for user_id, cutoff in self._user_cutoffs.items() if cutoff + lifetime > now
+        }
+
+    async def sync(self) -> int:
+        """Load revocations changed since the last sync. Returns the number read."""
+        query = {}
+        if self._watermark is not None:
+            query["updated_at"] = {"$gte": self._watermark - SYNC_OVERLAP}
+        read = 0
+        async for doc in get_revoked_tokens_collection().find(query):
+            self._apply(doc)
+            if self._watermark is None or doc["updated_at"] > self._watermark:
+                self._watermark = doc["updated_at"]
+            read += 1
+        self._prune(datetime.utcnow())
+        self.synced_at = time.monotonic()
+        return read
+
+    async def revoke_token(self, jti: str, user_id: str, expires_at: datetime) -> None:
+        """Revoke one token until it expires."""
+        doc = {"kind": "token", "jti": jti, "user_id": user_id, "expires_at": expires_at, "updated_at": datetime.utcnow()}
+        await get_revoked_tokens_collection().update_one({"_id": f"token:{jti}"}, {"$set": doc}, upsert=True)
+        self._apply(doc)
+
+    async def revoke_user(self, user_id: str) -> datetime:
+        """Revoke every token issued to ``user_id`` until now. Returns the cutoff."""
+        now = datetime.utcnow()
+        await get_revoked_tokens_collection().update_one(
+            {"_id": f"user:{user_id}"},
+            {
+                "$set": {"kind": "user", "user_id": user_id, "updated_at": now},
+                "$max": {
+                    "not_before": now,
+                    "expires_at": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+                }
+            },
+            upsert=True
+        )
+        self._apply({"kind": "user", "user_id": user_id, "not_before": now})
+        return now
+
+    async def run(self, interval: float) -> None:
+        """Background task: sync every ``interval`` seconds until cancelled."""
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                # Keep serving with the last known revocations
+                logger.warning(f"Token revocation sync failed: {e}")
+            await asyncio.sleep(interval)
+
+
+revocations = RevocationList()
+
+REVOKED_TOKEN_REJECTIONS = Counter(
+    "revoked_token_rejections_total",
+    "Requests rejected because their access token was revoked"
+)
+REVOCATION_LIST_SIZE = Gauge(
+    "revocation_list_entries",
+    "Revoked tokens and per-user cutoffs held in memory",
+    function=lambda: len(revocations)
+)
+REVOCATION_SYNC_AGE = Gauge(
+    "revocation_sync_age_seconds",
+    "Seconds since the revocation list was last synced (-1 before the first sync)",
+    function=lambda: time.monotonic() - revocations.synced_at if revocations.synced_at is not None else -1
+)
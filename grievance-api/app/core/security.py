@@ -1,3 +1,5 @@
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,6 +7,9 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
+from app.core.timing import timed
+from app.core.logging_config import set_user_role
+from app.core.revocation import revocations, REVOKED_TOKEN_REJECTIONS
 from app.schemas import TokenData
 
 # Password hashing
@@ -25,25 +30,32 @@ def get_password_hash(password: str) -> str:
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token."""
+    """Create a JWT access token with a unique id (``jti``) and issue time, for revocation."""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # Sub-second iat, so a token issued right after a per-user revocation isn't caught by it
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> TokenData:
-    """Decode and validate a JWT token."""
+    """
+    Decode and validate a JWT token.
+    
+    Revoked tokens are rejected; the check is in memory (see app.core.revocation).
+    """
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         user_id: str = payload.get("sub")
         role: str = payload.get("role")
         department_ids: list = payload.get("department_ids", [])
+        # Tokens issued before tenancy belong to the default municipality
+        tenant_id: str = payload.get("tenant_id") or settings.DEFAULT_TENANT
         
         if user_id is None:
             raise HTTPException(
@@ -51,18 +63,46 @@ def decode_token(token: str) -> TokenData:
                 detail="Invalid token"
             )
         
-        return TokenData(sub=user_id, role=role, department_ids=department_ids)
+        expires_at = datetime.utcfromtimestamp(payload["exp"]) if "exp" in payload else None
+        if "iat" in payload:
+            issued_at = datetime.utcfromtimestamp(payload["iat"])
+        elif expires_at is not None:
+            # Tokens issued before iat was added
+            issued_at = expires_at - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        else:
+            issued_at = None
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
+    
+    jti = payload.get("jti")
+    if revocations.is_revoked(user_id, jti, issued_at):
+        REVOKED_TOKEN_REJECTIONS.inc()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    
+    return TokenData(
+        sub=user_id,
+        role=role,
+        department_ids=department_ids,
+        tenant_id=tenant_id,
+        jti=jti,
+        iat=issued_at,
+        exp=expires_at
+    )
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
     """Dependency to get current authenticated user from JWT."""
     token = credentials.credentials
-    return decode_token(token)
+    with timed("auth"):
+        current_user = decode_token(token)
+    set_user_role(current_user.role)
+    return current_user
 
 
 async def require_role(*allowed_roles: str):
@@ -0,0 +1,64 @@
+"""
+Coordination of one-time startup tasks across worker processes.
+
+Each worker runs the FastAPI lifespan hook, so anything started there runs
+once per process. Tasks that only need to run once per deployment (such as
+index creation) take a short lease in the ``startup_locks`` collection
+first; workers that find a live lease skip the task. A lease is released
+if its task fails, so the next worker or restart retries it, and records
+``completed_at`` once the task has succeeded.
+"""
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from pymongo.errors import DuplicateKeyError
+from app.core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+
+async def run_once(name: str, task: Callable[[], Awaitable[None]], lease_seconds: int = 600) -> bool:
+    """
+    Run ``task`` unless another process is running it or completed it within
+    the last ``lease_seconds``.
+
+    Returns True if this process ran the task. If the task raises, the lease
+    is released and the error propagates.
+    """
+    locks = get_database()["startup_locks"]
+    now = datetime.utcnow()
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    lease = {
+        "owner": owner,
+        "acquired_at": now,
+        "expires_at": now + timedelta(seconds=lease_seconds),
+    }
+
+    try:
+        await locks.insert_one({"_id": name, **lease})
+    except DuplicateKeyError:
+        result = await locks.update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": lease, "$unset": {"completed_at": ""}}
+        )
+        if result.modified_count == 0:
+            held = await locks.find_one({"_id": name}) or {}
+            if held.get("completed_at"):
+                logger.info(f"Startup task {name} already completed by {held.get('owner')}, skipping")
+            else:
+                logger.info(f"Startup task {name} is running in {held.get('owner')}, skipping")
+            return False
+
+    logger.info(f"Running startup task {name}")
+    try:
+        await task()
+    except BaseException:
+        try:
+            await locks.delete_one({"_id": name, "owner": owner})
+        except Exception as e:
+            logger.warning(f"Could not release the lease for startup task {name}: {e}")
+        raise
+    await locks.update_one({"_id": name, "owner": owner}, {"$set": {"completed_at": datetime.utcnow()}})
+    return True
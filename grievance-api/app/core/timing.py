@@ -0,0 +1,146 @@
+"""
+Per-request phase timings reported through the ``Server-Timing`` header.
+
+``ServerTimingMiddleware`` attaches a ``RequestTimings`` collector to the
+request context. Code on the request path records phases with ``timed()``
+(or ``record_phase()`` for durations measured elsewhere, such as the MongoDB
+command listener). When the response starts, the collected phases are sent
+as a ``Server-Timing`` header and logged as one structured line.
+
+Outside a request (scripts, background tasks) recording is a no-op.
+"""
+import time
+import logging
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.profiler import profiler
+
+logger = logging.getLogger("app.timing")
+
+
+# Keeps headers and log lines bounded for requests doing many operations (bulk ingestion)
+MAX_PHASES = 50
+
+
+class RequestTimings:
+    """Phases recorded for a single request as ``(name, description, seconds)``."""
+
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: List[Tuple[str, str, float]] = []
+
+    def add(self, name: str, seconds: float, description: str = "") -> None:
+        if len(self.phases) < MAX_PHASES:
+            self.phases.append((name, description, seconds))
+
+    def header_value(self, total_seconds: float) -> str:
+        entries = []
+        for name, description, seconds in self.phases:
+            if description:
+                entries.append(f'{name};desc="{description}";dur={seconds * 1000:.2f}')
+            else:
+                entries.append(f"{name};dur={seconds * 1000:.2f}")
+        entries.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_phase(name: str, seconds: float, description: str = "") -> None:
+    """Record a phase measured elsewhere on the current request, if any."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds, description)
+
+
+class timed:
+    """
+    Context manager timing a block as a named phase of the current request.
+
+    Usage:
+        with timed("classify"):
+            ...
+    """
+
+    __slots__ = ("name", "description", "_timings", "_started")
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+
+    def __enter__(self):
+        self._timings = _current_timings.get()
+        if self._timings is not None:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._timings is not None:
+            self._timings.add(self.name, time.perf_counter() - self._started, self.description)
+        return False
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON response recording its serialization time as the ``encode`` phase."""
+
+    def render(self, content) -> bytes:
+        with timed("encode"):
+            return super().render(content)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware collecting phase timings and emitting ``Server-Timing``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            if profiler.active:
+                profiler.request_finished()
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    timings.header_value(time.perf_counter() - started).encode("latin-1")
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timings.reset(token)
+            total = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            logger.info(
+                f"{scope['method']} {route_path} {status_code} {total * 1000:.1f}ms",
+                extra={
+                    "method": scope["method"],
+                    "route": route_path,
+                    "status_code": status_code,
+                    "latency_ms": round(total * 1000, 2),
+                    "phases": [
+                        {"name": name, "desc": description, "ms": round(seconds * 1000, 2)}
+                        for name, description, seconds in timings.phases
+                    ],
+                }
+            )
+            if profiler.active:
+                profiler.request_finished()
@@ -1,31 +1,75 @@
+import asyncio
 import logging
-import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import connect_to_mongo, close_mongo_connection
-from app.routes import auth, grievance, admin
-
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='{"timestamp":"%(asctime)s","level":"%(levelname)s","name":"%(name)s","message":"%(message)s"}',
-    stream=sys.stdout
-)
+from fastapi.responses import Response
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
+from app.core.logging_config import setup_logging, RequestContextMiddleware
+from app.core.timing import ServerTimingMiddleware, TimedJSONResponse
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, ensure_indexes, backfill_default_tenant
+from app.core.revocation import revocations
+from app.core.startup import run_once
+from app.routes import auth, grievance, admin, departments
+from app.services.department_service import load_departments
+from app.services.notification_service import notifications
+from app.services.write_buffer import grievance_writes
+
+# Configure structured JSON logging (formatted and written on a background thread)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
 
+async def run_startup_tasks():
+    """
+    Background startup work, so a slow or unavailable database doesn't block serving.
+    
+    Assigning pre-tenancy documents to the default tenant and index creation
+    run once per deployment (coordinated across workers); the department
+    cache is per process. Each task runs even if an earlier one failed.
+    """
+    tasks = (
+        ("backfill_default_tenant", lambda: run_once("backfill_default_tenant", backfill_default_tenant)),
+        ("ensure_indexes", lambda: run_once("ensure_indexes", ensure_indexes)),
+        ("load_departments", load_departments),
+    )
+    for name, task in tasks:
+        try:
+            await task()
+        except Exception as e:
+            logger.error(f"Startup task {name} failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan context manager for startup and shutdown events."""
+    """
+    Lifespan context manager for startup and shutdown events.
+    
+    Runs in every worker process after it has started, so the Motor client
+    and caches are created per process rather than inherited across fork.
+    """
     # Startup
     logger.info("Starting grievance-api service")
     await connect_to_mongo()
     logger.info("Connected to MongoDB")
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+    revocation_sync = asyncio.create_task(revocations.run(settings.REVOCATION_SYNC_INTERVAL))
+    startup_tasks = asyncio.create_task(run_startup_tasks())
+    notification_dispatch = None
+    if settings.NOTIFICATIONS_ENABLED:
+        notification_dispatch = asyncio.create_task(notifications.run(settings.NOTIFICATION_POLL_INTERVAL))
     yield
     # Shutdown
     logger.info("Shutting down grievance-api service")
+    startup_tasks.cancel()
+    if notification_dispatch is not None:
+        notification_dispatch.cancel()
+    revocation_sync.cancel()
+    lag_monitor.cancel()
+    await grievance_writes.close()
     await close_mongo_connection()
     logger.info("Closed MongoDB connection")
 
@@ -34,7 +78,8 @@ app = FastAPI(
     title="Grievance Portal API",
     description="Municipal grievance management system with AI classification",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
 # CORS middleware
@@ -46,10 +91,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression (inside timing, so compression shows up as a phase)
+app.add_middleware(CompressionMiddleware)
+
+# Per-request phase timings (Server-Timing header) and profiler request counting
+app.add_middleware(ServerTimingMiddleware)
+
+# Request id for log correlation (outside timing, so its log line carries the id)
+app.add_middleware(RequestContextMiddleware)
+
+# Request metrics (outermost, so the timing covers all other middleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(grievance.router)
 app.include_router(admin.router)
+app.include_router(departments.router)
 
 
 @app.get("/health", tags=["Health"])
@@ -62,6 +120,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information."""
@@ -69,5 +133,6 @@ async def root():
         "service": "Grievance Portal API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "metrics": "/metrics"
     }
@@ -1,10 +1,36 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response, UploadFile, File
+from fastapi.responses import PlainTextResponse
 from bson import ObjectId
-from app.schemas import GrievanceResponse, GrievanceStatusUpdate, TokenData
+from bson.errors import InvalidId
+from app.schemas import (
+    GrievanceResponse,
+    GrievanceStatusUpdate,
+    TokenData,
+    ProfilerStartRequest,
+    ProfilerStatus,
+    LLMBackendStatus,
+    BulkGrievanceResponse,
+    HotspotCell,
+    HotspotResponse,
+    IncidentResponse,
+    IncidentStatusUpdateResponse,
+    TransitionTimes,
+    ResolutionPercentiles
+)
 from app.core.security import get_current_user
-from app.core.database import get_grievances_collection
+from app.core.database import get_grievances_collection, get_incidents_collection, get_users_collection
+from app.core.revocation import revocations
+from app.core.http_cache import grievance_etag, is_not_modified, not_modified, set_cache_headers
+from app.core.profiler import profiler
+from app.services import bulk_ingest_service
+from app.services.grievance_service import to_grievance_response
+from app.services.hotspot_service import find_hotspots
+from app.services.incident_service import RANK_PRIORITY, update_incident_status
+from app.services.llm_router import llm_router
+from app.services.status_service import StatusConflict, change_status, transition_durations
+from app.services.resolution_stats_service import resolution_sketch
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -19,10 +45,24 @@ async def require_admin(current_user: TokenData = Depends(get_current_user)) ->
     return current_user
 
 
+async def require_superadmin(current_user: TokenData = Depends(get_current_user)) -> TokenData:
+    """Dependency to require superadmin role."""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Superadmin access required"
+        )
+    return current_user
+
+
 @router.get("/grievances", response_model=List[GrievanceResponse])
 async def get_grievances(
+    request: Request,
+    response: Response,
     dept: Optional[str] = Query(None, description="Filter by department"),
     status_filter: Optional[str] = Query(None, alias="status", description="Filter by status"),
+    incident: Optional[str] = Query(None, description="Only grievances in this incident"),
+    urgent: bool = Query(False, description="Only grievances flagged as possible emergencies"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=10000),
     current_user: TokenData = Depends(require_admin)
@@ -31,13 +71,16 @@ async def get_grievances(
     Get grievances for admin (filtered by department and status).
     
     - Admin can only see grievances for departments they manage
-    - Superadmin can see all grievances
+    - Superadmin can see all grievances of their tenant
     - Supports pagination (limit increased to 10000 for analytics)
+    - Served from replica-set secondaries when available, except `urgent=true`
+      listings, which read the primary so new emergencies show up at once
+    - Returns an ETag; 304 Not Modified when `If-None-Match` matches
     """
-    grievances_col = get_grievances_collection()
+    grievances_col = get_grievances_collection(analytics=not urgent)
     
     # Build query filter
-    query = {}
+    query = {"tenant_id": current_user.tenant_id}
     
     # Department filter
     if dept:
@@ -62,23 +105,25 @@ async def get_grievances(
     if status_filter:
         query["status"] = status_filter
     
+    # Incident filter
+    if incident:
+        query["incident_id"] = _object_id(incident, "incident")
+    
+    # Urgent filter
+    if urgent:
+        query["urgent"] = True
+    
     # Execute query
     cursor = grievances_col.find(query).skip(skip).limit(limit).sort("created_at", -1)
     grievances = await cursor.to_list(length=limit)
     
+    etag = grievance_etag(grievances)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    
     return [
-        GrievanceResponse(
-            id=str(g["_id"]),
-            user_id=g["user_id"],
-            message=g["message"],
-            predicted_department=g["predicted_department"],
-            priority=g["priority"],
-            confidence=g["confidence"],
-            explanation=g["explanation"],
-            status=g["status"],
-            created_at=g["created_at"],
-            updated_at=g["updated_at"]
-        )
+        to_grievance_response(g)
         for g in grievances
     ]
 
@@ -93,17 +138,13 @@ async def update_grievance_status(
     Update grievance status (admin only).
     
     - Admin can only update grievances for their departments
-    - Superadmin can update any grievance
+    - Superadmin can update any grievance of their tenant
+    - Each change is appended to the status event log
     """
     grievances_col = get_grievances_collection()
     
-    try:
-        grievance = await grievances_col.find_one({"_id": ObjectId(grievance_id)})
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid grievance ID"
-        )
+    object_id = _object_id(grievance_id, "grievance")
+    grievance = await grievances_col.find_one({"tenant_id": current_user.tenant_id, "_id": object_id})
     
     if not grievance:
         raise HTTPException(
@@ -119,35 +160,376 @@ async def update_grievance_status(
                 detail="Access denied to this grievance's department"
             )
     
-    # Update status
-    update_result = await grievances_col.update_one(
-        {"_id": ObjectId(grievance_id)},
-        {
-            "$set": {
-                "status": status_update.status,
-                "updated_at": datetime.utcnow()
-            }
-        }
+    # Update status (also records the transition in grievance_events)
+    try:
+        updated_grievance = await change_status(grievance, status_update.status, current_user.sub)
+    except StatusConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Grievance status was changed concurrently, retry"
+        )
+    
+    return to_grievance_response(updated_grievance)
+
+
+def _object_id(value: str, kind: str) -> ObjectId:
+    try:
+        return ObjectId(value)
+    except InvalidId:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {kind} ID"
+        )
+
+
+def _incident_response(incident: dict) -> dict:
+    return {
+        **incident,
+        "id": str(incident["_id"]),
+        "priority": RANK_PRIORITY.get(incident["priority_rank"], "low"),
+    }
+
+
+def _department_scope(dept: Optional[str], current_user: TokenData):
+    """predicted_department/department filter for the admin's request, or None for all."""
+    if dept:
+        if current_user.role == "admin" and dept not in current_user.department_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Access denied to department: {dept}"
+            )
+        return dept
+    if current_user.role == "admin":
+        return {"$in": current_user.department_ids}
+    return None
+
+
+@router.get("/incidents", response_model=List[IncidentResponse])
+async def get_incidents(
+    dept: Optional[str] = Query(None, description="Filter by department"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: TokenData = Depends(require_admin)
+) -> List[IncidentResponse]:
+    """
+    Get incidents (groups of related grievances), most recently reported first.
+    
+    - Admin can only see incidents for departments they manage
+    - Superadmin can see all incidents of their tenant
+    - List member grievances with `GET /api/admin/grievances?incident={id}`
+    """
+    query = {"tenant_id": current_user.tenant_id}
+    department_filter = _department_scope(dept, current_user)
+    if department_filter is not None:
+        query["department"] = department_filter
+    if status_filter:
+        query["status"] = status_filter
+    
+    incidents_col = get_incidents_collection()
+    cursor = incidents_col.find(query).sort("last_reported_at", -1).skip(skip).limit(limit)
+    incidents = await cursor.to_list(length=limit)
+    
+    return [IncidentResponse(**_incident_response(i)) for i in incidents]
+
+
+@router.patch("/incidents/{incident_id}/status", response_model=IncidentStatusUpdateResponse)
+async def update_incident(
+    incident_id: str,
+    status_update: GrievanceStatusUpdate,
+    current_user: TokenData = Depends(require_admin)
+) -> IncidentStatusUpdateResponse:
+    """
+    Update the status of an incident and all of its grievances.
+    
+    - Admin can only update incidents for their departments
+    - Resolving or rejecting an incident stops new grievances joining it
+    """
+    incident_oid = _object_id(incident_id, "incident")
+    incident = await get_incidents_collection().find_one(
+        {"tenant_id": current_user.tenant_id, "_id": incident_oid}, {"tenant_id": 1, "key": 1, "department": 1}
     )
     
-    if update_result.modified_count == 0:
+    if not incident:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Incident not found"
+        )
+    
+    if current_user.role == "admin" and incident["department"] not in current_user.department_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this incident's department"
+        )
+    
+    updated = await update_incident_status(incident, status_update.status, current_user.sub)
+    if updated is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update grievance"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Incident not found"
         )
     
-    # Fetch updated grievance
-    updated_grievance = await grievances_col.find_one({"_id": ObjectId(grievance_id)})
-    
-    return GrievanceResponse(
-        id=str(updated_grievance["_id"]),
-        user_id=updated_grievance["user_id"],
-        message=updated_grievance["message"],
-        predicted_department=updated_grievance["predicted_department"],
-        priority=updated_grievance["priority"],
-        confidence=updated_grievance["confidence"],
-        explanation=updated_grievance["explanation"],
-        status=updated_grievance["status"],
-        created_at=updated_grievance["created_at"],
-        updated_at=updated_grievance["updated_at"]
+    return IncidentStatusUpdateResponse(**_incident_response(updated))
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+@router.get("/analytics/transition-times", response_model=TransitionTimes)
+async def get_transition_times(
+    to_status: str = Query("in_progress", pattern="^(in_progress|resolved|rejected)$"),
+    dept: Optional[str] = Query(None, description="Filter by department"),
+    start: Optional[datetime] = Query(None, description="Transitions at or after (default: 30 days ago)"),
+    end: Optional[datetime] = Query(None, description="Transitions before (default: now)"),
+    current_user: TokenData = Depends(require_admin)
+) -> TransitionTimes:
+    """
+    Time from submission until grievances first reached a status.
+    
+    E.g. median time to `in_progress` for roads last month. Computed from
+    the status event log with an index range scan.
+    """
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    durations = await transition_durations(
+        current_user.tenant_id, to_status, _department_scope(dept, current_user), start, end
     )
+    
+    return TransitionTimes(
+        to_status=to_status,
+        department=dept,
+        start=start,
+        end=end,
+        count=len(durations),
+        mean_seconds=sum(durations) / len(durations) if durations else None,
+        p50_seconds=_percentile(durations, 0.50),
+        p90_seconds=_percentile(durations, 0.90),
+        p99_seconds=_percentile(durations, 0.99)
+    )
+
+
+@router.get("/analytics/resolution-percentiles", response_model=ResolutionPercentiles)
+async def get_resolution_percentiles(
+    status_filter: str = Query("resolved", alias="status", pattern="^(resolved|rejected)$"),
+    dept: Optional[str] = Query(None, description="Filter by department"),
+    priority: Optional[str] = Query(None, pattern="^(high|medium|low)$"),
+    start: Optional[datetime] = Query(None, description="First UTC day of closure (default: 30 days ago)"),
+    end: Optional[datetime] = Query(None, description="Last UTC day of closure, inclusive (default: today)"),
+    current_user: TokenData = Depends(require_admin)
+) -> ResolutionPercentiles:
+    """
+    Time-to-resolution percentiles per department and priority over any date range.
+    
+    Merged from per-day sketches, so the cost doesn't grow with the number of
+    grievances. Estimates are within `relative_accuracy` of the exact values.
+    """
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    sketch = await resolution_sketch(
+        current_user.tenant_id, status_filter, _department_scope(dept, current_user), priority, start, end
+    )
+    
+    return ResolutionPercentiles(
+        status=status_filter,
+        department=dept,
+        priority=priority,
+        start=start,
+        end=end,
+        count=sketch.count,
+        relative_accuracy=sketch.relative_accuracy,
+        mean_seconds=sketch.mean,
+        p50_seconds=sketch.quantile(0.50),
+        p90_seconds=sketch.quantile(0.90),
+        p99_seconds=sketch.quantile(0.99)
+    )
+
+
+def _parse_bbox(bbox: Optional[str]):
+    if not bbox:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lng,min_lat,max_lng,max_lat"
+        )
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox is out of range or empty"
+        )
+    return min_lng, min_lat, max_lng, max_lat
+
+
+@router.get("/hotspots", response_model=HotspotResponse)
+async def get_hotspots(
+    dept: Optional[str] = Query(None, description="Filter by department"),
+    hours: int = Query(168, ge=1, le=24 * 365, description="Time window, ending now"),
+    cell_km: float = Query(0.5, gt=0, le=50, description="Grid cell size in kilometres"),
+    min_count: int = Query(3, ge=1, description="Smallest cluster returned"),
+    limit: int = Query(200, ge=1, le=5000),
+    bbox: Optional[str] = Query(None, description="Map viewport as min_lng,min_lat,max_lng,max_lat"),
+    current_user: TokenData = Depends(require_admin)
+) -> HotspotResponse:
+    """
+    Get clusters of grievances by location for map display.
+    
+    - Grievances are grouped into a grid of `cell_km` cells, busiest first
+    - Only grievances whose message named a known place are included
+    - Admin can only see their own departments; superadmin sees all
+    """
+    department_filter = _department_scope(dept, current_user)
+    since = datetime.utcnow() - timedelta(hours=hours)
+    cells = await find_hotspots(current_user.tenant_id, department_filter, since, cell_km, min_count, limit, _parse_bbox(bbox))
+    
+    return HotspotResponse(
+        department=dept,
+        since=since,
+        cell_km=cell_km,
+        cells=[HotspotCell(**cell) for cell in cells]
+    )
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _unsupported_format() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send a JSON array (application/json), NDJSON (application/x-ndjson) or CSV (text/csv)"
+    )
+
+
+@router.post("/grievances/batch", response_model=BulkGrievanceResponse)
+async def bulk_create_grievances(
+    request: Request,
+    current_user: TokenData = Depends(require_admin)
+) -> BulkGrievanceResponse:
+    """
+    Submit a batch of grievances from a partner channel (admin only).
+    
+    - Body is a JSON array, NDJSON or CSV (with a `message` column), chosen by Content-Type
+    - Each row has a `message` and an optional `reference` echoed back in its result
+    - The body is parsed as it streams in; rows beyond BULK_MAX_ROWS are not processed
+    - Returns per-row results; invalid rows don't affect the others
+    """
+    upload_format = bulk_ingest_service.detect_format(request.headers.get("content-type"))
+    if upload_format is None:
+        raise _unsupported_format()
+    
+    rows = bulk_ingest_service.parse_rows(upload_format, request.stream())
+    return await bulk_ingest_service.ingest(current_user.tenant_id, current_user.sub, rows)
+
+
+@router.post("/grievances/batch/upload", response_model=BulkGrievanceResponse)
+async def upload_grievances_file(
+    file: UploadFile = File(..., description="JSON array, NDJSON (.ndjson/.jsonl) or CSV file"),
+    current_user: TokenData = Depends(require_admin)
+) -> BulkGrievanceResponse:
+    """
+    Submit a batch of grievances as an uploaded file (admin only).
+    
+    Same row format and results as `/grievances/batch`; the file is read in chunks.
+    """
+    upload_format = bulk_ingest_service.detect_format(None, file.filename) or bulk_ingest_service.detect_format(file.content_type)
+    if upload_format is None:
+        raise _unsupported_format()
+    
+    async def chunks():
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+    
+    rows = bulk_ingest_service.parse_rows(upload_format, chunks())
+    return await bulk_ingest_service.ingest(current_user.tenant_id, current_user.sub, rows)
+
+
+@router.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_tokens(
+    user_id: str,
+    current_user: TokenData = Depends(require_superadmin)
+) -> None:
+    """
+    Revoke every access token issued to a user so far (superadmin only).
+    
+    Use after removing a user's role or departments so existing tokens stop
+    working before they expire. The user can log in again for a new token.
+    Limited to users of the superadmin's tenant.
+    """
+    user = await get_users_collection().find_one(
+        {"tenant_id": current_user.tenant_id, "_id": _object_id(user_id, "user")}, {"_id": 1}
+    )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    await revocations.revoke_user(user_id)
+
+
+@router.post("/profiler/start", response_model=ProfilerStatus)
+async def start_profiler(
+    request: ProfilerStartRequest,
+    current_user: TokenData = Depends(require_superadmin)
+) -> ProfilerStatus:
+    """
+    Start the sampling profiler (superadmin only).
+    
+    Samples the event loop for the given number of seconds and/or until the
+    given number of requests has completed, whichever comes first.
+    """
+    if request.duration_seconds is None and request.requests is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify duration_seconds and/or requests"
+        )
+    
+    try:
+        profiler.start(duration_seconds=request.duration_seconds, max_requests=request.requests)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    return ProfilerStatus(**profiler.status())
+
+
+@router.post("/profiler/stop", response_model=ProfilerStatus)
+async def stop_profiler(current_user: TokenData = Depends(require_superadmin)) -> ProfilerStatus:
+    """Stop the sampling profiler early (superadmin only)."""
+    profiler.stop()
+    return ProfilerStatus(**profiler.status())
+
+
+@router.get("/profiler", response_model=ProfilerStatus)
+async def get_profiler_status(current_user: TokenData = Depends(require_superadmin)) -> ProfilerStatus:
+    """Get sampling profiler state (superadmin only)."""
+    return ProfilerStatus(**profiler.status())
+
+
+@router.get("/profiler/profile", response_class=PlainTextResponse)
+async def download_profile(current_user: TokenData = Depends(require_superadmin)) -> PlainTextResponse:
+    """
+    Download the last profile in collapsed stack format (superadmin only).
+    
+    Render with flamegraph.pl or load into speedscope.
+    """
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'}
+    )
+
+
+@router.get("/llm-backends", response_model=List[LLMBackendStatus])
+async def get_llm_backends(current_user: TokenData = Depends(require_superadmin)) -> List[LLMBackendStatus]:
+    """
+    LLM backend routing state in this worker (superadmin only).
+    
+    - Backends are listed in the order the next classification would try them
+    - Latencies and error rate cover the last LLM_ROUTER_WINDOW calls
+    """
+    return [LLMBackendStatus(**backend) for backend in llm_router.snapshot()]
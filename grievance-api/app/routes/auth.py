@@ -6,14 +6,29 @@ from app.core.security import (
     verify_password,
     get_password_hash,
     create_access_token,
-    decode_token
+    decode_token,
+    get_current_user
 )
-from app.core.database import get_users_collection
+from app.core.config import settings
+from app.core.database import get_users_collection, get_tenants_collection
+from app.core.revocation import revocations
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 optional_security = HTTPBearer(auto_error=False)
 
 
+async def _resolve_tenant(tenant_id: Optional[str]) -> str:
+    """The requested tenant, or the default one; unknown tenants are rejected."""
+    tenant_id = tenant_id or settings.DEFAULT_TENANT
+    if tenant_id != settings.DEFAULT_TENANT:
+        if await get_tenants_collection().find_one({"_id": tenant_id}, {"_id": 1}) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown tenant: {tenant_id}"
+            )
+    return tenant_id
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
@@ -23,17 +38,11 @@ async def register(
     Register a new user.
     
     - Citizens can self-register with role='citizen'
-    - Only superadmin can create admin or superadmin users
+    - Only superadmin can create admin or superadmin users, in their own tenant
+    - Emails are unique per tenant
     """
     users_col = get_users_collection()
-    
-    # Check if email already exists
-    existing = await users_col.find_one({"email": user_data.email})
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    tenant_id = user_data.tenant_id
     
     # Role validation: only superadmin can create admin/superadmin users
     if user_data.role in ["admin", "superadmin"]:
@@ -48,9 +57,26 @@ async def register(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only superadmin can create admin or superadmin users"
             )
+        if tenant_id is None:
+            tenant_id = current_user.tenant_id
+        elif tenant_id != current_user.tenant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Superadmin can only create users in their own tenant"
+            )
+    tenant_id = await _resolve_tenant(tenant_id)
+    
+    # Check if email already exists
+    existing = await users_col.find_one({"tenant_id": tenant_id, "email": user_data.email})
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     # Create user document
     user_doc = {
+        "tenant_id": tenant_id,
         "email": user_data.email,
         "hashed_password": get_password_hash(user_data.password),
         "role": user_data.role,
@@ -65,7 +91,8 @@ async def register(
         data={
             "sub": user_id,
             "role": user_data.role,
-            "department_ids": user_doc["departments"]
+            "department_ids": user_doc["departments"],
+            "tenant_id": tenant_id
         }
     )
     
@@ -77,13 +104,14 @@ async def login(credentials: UserLogin) -> Token:
     """
     Login to get JWT access token with role-based access.
     
-    Users select their role and department at login time.
+    Users select their tenant, role and department at login time.
     The system validates if they have permission for that role/department.
     """
     users_col = get_users_collection()
+    tenant_id = await _resolve_tenant(credentials.tenant_id)
     
-    # Find user by email
-    user = await users_col.find_one({"email": credentials.email})
+    # Find user by tenant and email
+    user = await users_col.find_one({"tenant_id": tenant_id, "email": credentials.email})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -149,9 +177,29 @@ async def login(credentials: UserLogin) -> Token:
         data={
             "sub": str(user["_id"]),
             "role": selected_role,
-            "department_ids": department_ids
+            "department_ids": department_ids,
+            "tenant_id": tenant_id
         }
     )
     
     return Token(access_token=access_token)
 
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(current_user: TokenData = Depends(get_current_user)) -> None:
+    """
+    Revoke the token used for this request.
+    
+    - Takes effect immediately on this worker and within REVOCATION_SYNC_INTERVAL on others
+    - Tokens issued before revocation support have no id; all of the user's tokens are revoked instead
+    """
+    if current_user.jti and current_user.exp:
+        await revocations.revoke_token(current_user.jti, current_user.sub, current_user.exp)
+    else:
+        await revocations.revoke_user(current_user.sub)
+
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(current_user: TokenData = Depends(get_current_user)) -> None:
+    """Revoke every token issued to the current user so far (log out on all devices)."""
+    await revocations.revoke_user(current_user.sub)
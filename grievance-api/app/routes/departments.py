@@ -0,0 +1,28 @@
+from typing import List, Optional
+from fastapi import APIRouter, Query
+from app.core.config import settings
+from app.schemas import Department
+from app.services.department_service import list_departments, department_key
+
+router = APIRouter(prefix="/api/departments", tags=["Departments"])
+
+
+@router.get("", response_model=List[Department])
+async def get_departments(
+    tenant: Optional[str] = Query(None, description="Municipality (default: DEFAULT_TENANT)")
+) -> List[Department]:
+    """
+    List a municipality's departments.
+    
+    Served from the per-process department cache loaded at startup.
+    Tenants without their own configuration get the default departments.
+    """
+    return [
+        Department(
+            id=department_key(d),
+            name=d["name"],
+            sla_hours=d["sla_hours"],
+            contact_email=d.get("contact_email")
+        )
+        for d in list_departments(tenant or settings.DEFAULT_TENANT)
+    ]
@@ -1,11 +1,15 @@
-from datetime import datetime
 from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from bson import ObjectId
+from bson.errors import InvalidId
 from app.schemas import GrievanceCreate, GrievanceResponse, TokenData
 from app.core.security import get_current_user
-from app.core.database import get_grievances_collection
+from app.core.rate_limit import limit_grievance_submission
+from app.core.http_cache import grievance_etag, is_not_modified, not_modified, set_cache_headers
 from app.services.classification_service import classify_grievance
+from app.services.danger_service import detect_danger
+from app.services.grievance_service import new_grievance_doc, insert_grievance, to_grievance_response
+from app.services.archive_service import find_grievance, find_user_grievances
 
 router = APIRouter(prefix="/api/grievances", tags=["Grievances"])
 
@@ -13,64 +17,55 @@ router = APIRouter(prefix="/api/grievances", tags=["Grievances"])
 @router.post("", response_model=GrievanceResponse, status_code=status.HTTP_201_CREATED)
 async def create_grievance(
     grievance_data: GrievanceCreate,
-    current_user: TokenData = Depends(get_current_user)
+    current_user: TokenData = Depends(limit_grievance_submission)
 ) -> GrievanceResponse:
     """
     Submit a new grievance (citizen authentication required).
     
     Automatically classifies the grievance using ML service.
+    Submissions are rate limited per user, per tenant and globally before classification.
+    Reports of immediate danger (gas leaks, fires, assaults, ...) are marked urgent and
+    high priority, and are classified ahead of other submissions.
     """
+    # Cheap keyword pre-screen first, so emergencies get the reserved LLM slots
+    danger = detect_danger(grievance_data.message)
+    
     # Classify the grievance
-    classification = await classify_grievance(grievance_data.message)
+    classification = await classify_grievance(grievance_data.message, urgent=danger is not None)
     
     # Create grievance document
-    now = datetime.utcnow()
-    grievance_doc = {
-        "user_id": current_user.sub,
-        "message": grievance_data.message,
-        "predicted_department": classification.department,
-        "priority": classification.priority,
-        "confidence": classification.confidence,
-        "explanation": classification.explanation,
-        "status": "submitted",
-        "created_at": now,
-        "updated_at": now
-    }
+    grievance_doc = new_grievance_doc(
+        current_user.tenant_id, current_user.sub, grievance_data.message, classification, danger=danger
+    )
     
-    grievances_col = get_grievances_collection()
-    result = await grievances_col.insert_one(grievance_doc)
+    await insert_grievance(grievance_doc)
     
-    grievance_doc["id"] = str(result.inserted_id)
-    return GrievanceResponse(**grievance_doc)
+    return to_grievance_response(grievance_doc)
 
 
 @router.get("/my-grievances", response_model=List[GrievanceResponse])
 async def get_my_grievances(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     current_user: TokenData = Depends(get_current_user)
 ) -> List[GrievanceResponse]:
     """
     Get all grievances submitted by the current user (paginated).
+    
+    - Includes archived grievances
+    - Returns an ETag; 304 Not Modified when `If-None-Match` matches
     """
-    grievances_col = get_grievances_collection()
+    grievances = await find_user_grievances(current_user.tenant_id, current_user.sub, skip, limit)
     
-    cursor = grievances_col.find({"user_id": current_user.sub}).skip(skip).limit(limit).sort("created_at", -1)
-    grievances = await cursor.to_list(length=limit)
+    etag = grievance_etag(grievances)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
     
     return [
-        GrievanceResponse(
-            id=str(g["_id"]),
-            user_id=g["user_id"],
-            message=g["message"],
-            predicted_department=g["predicted_department"],
-            priority=g["priority"],
-            confidence=g["confidence"],
-            explanation=g["explanation"],
-            status=g["status"],
-            created_at=g["created_at"],
-            updated_at=g["updated_at"]
-        )
+        to_grievance_response(g)
         for g in grievances
     ]
 
@@ -78,6 +73,8 @@ async def get_my_grievances(
 @router.get("/{grievance_id}", response_model=GrievanceResponse)
 async def get_grievance(
     grievance_id: str,
+    request: Request,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ) -> GrievanceResponse:
     """
@@ -86,17 +83,18 @@ async def get_grievance(
     - Owner can always view their own grievance
     - Admin can view grievances for their departments
     - Superadmin can view all grievances
+    - Archived grievances are returned as well
+    - Returns an ETag; 304 Not Modified when `If-None-Match` matches
     """
-    grievances_col = get_grievances_collection()
-    
     try:
-        grievance = await grievances_col.find_one({"_id": ObjectId(grievance_id)})
-    except:
+        object_id = ObjectId(grievance_id)
+    except InvalidId:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid grievance ID"
         )
     
+    grievance = await find_grievance(current_user.tenant_id, object_id)
     if not grievance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,15 +115,9 @@ async def get_grievance(
             detail="Access denied to this grievance"
         )
     
-    return GrievanceResponse(
-        id=str(grievance["_id"]),
-        user_id=grievance["user_id"],
-        message=grievance["message"],
-        predicted_department=grievance["predicted_department"],
-        priority=grievance["priority"],
-        confidence=grievance["confidence"],
-        explanation=grievance["explanation"],
-        status=grievance["status"],
-        created_at=grievance["created_at"],
-        updated_at=grievance["updated_at"]
-    )
+    etag = grievance_etag([grievance])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    
+    return to_grievance_response(grievance)
@@ -10,6 +10,7 @@ class UserRegister(BaseModel):
     password: str = Field(min_length=6)
     role: Optional[Literal["citizen", "admin", "superadmin"]] = "citizen"
     departments: Optional[List[str]] = []
+    tenant_id: Optional[str] = None  # municipality; defaults to DEFAULT_TENANT
 
 
 class UserLogin(BaseModel):
@@ -18,6 +19,7 @@ class UserLogin(BaseModel):
     password: str
     role: Literal["citizen", "admin", "superadmin"]
     department: Optional[str] = None
+    tenant_id: Optional[str] = None
 
 
 class Token(BaseModel):
@@ -31,6 +33,10 @@ class TokenData(BaseModel):
     sub: str  # user_id
     role: str
     department_ids: List[str]
+    tenant_id: str  # municipality; every query is scoped to it
+    jti: Optional[str] = None  # token id, for revocation
+    iat: Optional[datetime] = None
+    exp: Optional[datetime] = None
 
 
 # Grievance schemas
@@ -57,15 +63,118 @@ class GrievanceResponse(BaseModel):
     confidence: float
     explanation: str
     status: Literal["submitted", "in_progress", "resolved", "rejected"]
+    location_name: Optional[str] = None
+    urgent: bool = False
+    danger: Optional[str] = None
+    incident_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
 
+class IncidentResponse(BaseModel):
+    """Group of related grievances (same department and place, reported close together)."""
+    id: str
+    department: str
+    location_name: str
+    status: Literal["submitted", "in_progress", "resolved", "rejected"]
+    priority: str
+    grievance_count: int
+    accepting: bool
+    first_reported_at: datetime
+    last_reported_at: datetime
+    updated_at: datetime
+
+
+class IncidentStatusUpdateResponse(IncidentResponse):
+    """Incident after a status change, with the number of member grievances changed."""
+    updated_grievances: int
+
+
+class TransitionTimes(BaseModel):
+    """Time from submission to first reaching a status, in seconds."""
+    to_status: str
+    department: Optional[str]
+    start: datetime
+    end: datetime
+    count: int
+    mean_seconds: Optional[float]
+    p50_seconds: Optional[float]
+    p90_seconds: Optional[float]
+    p99_seconds: Optional[float]
+
+
+class ResolutionPercentiles(BaseModel):
+    """Time from submission to closure, in seconds, estimated from sketches."""
+    status: str
+    department: Optional[str]
+    priority: Optional[str]
+    start: datetime
+    end: datetime
+    count: int
+    relative_accuracy: float
+    mean_seconds: Optional[float]
+    p50_seconds: Optional[float]
+    p90_seconds: Optional[float]
+    p99_seconds: Optional[float]
+
+
+class HotspotCell(BaseModel):
+    """Grid cell with a cluster of grievances; lat/lng is the centroid of its grievances."""
+    lat: float
+    lng: float
+    count: int
+    high_priority: int
+    locations: List[str]
+
+
+class HotspotResponse(BaseModel):
+    """Grievance hotspots for a department and time window."""
+    department: Optional[str]
+    since: datetime
+    cell_km: float
+    cells: List[HotspotCell]
+
+
+class BulkGrievanceItem(GrievanceCreate):
+    """One row of a bulk upload; ``reference`` is the partner's own id, echoed back."""
+    reference: Optional[str] = Field(default=None, max_length=100)
+
+
+class BulkGrievanceResult(BaseModel):
+    """Outcome of one bulk upload row (rows are numbered from 1)."""
+    row: int
+    reference: Optional[str] = None
+    status: Literal["created", "failed"]
+    id: Optional[str] = None
+    predicted_department: Optional[str] = None
+    priority: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkGrievanceResponse(BaseModel):
+    """Bulk upload summary with per-row results."""
+    total: int
+    created: int
+    failed: int
+    truncated: bool = False
+    error: Optional[str] = None
+    results: List[BulkGrievanceResult]
+
+
 class GrievanceStatusUpdate(BaseModel):
     """Admin status update request."""
     status: Literal["in_progress", "resolved", "rejected"]
 
 
+# Department schema
+class Department(BaseModel):
+    """Municipal department."""
+    id: str
+    name: str
+    sla_hours: int
+    contact_email: Optional[str] = None
+
+
 # User schema
 class User(BaseModel):
     """User model."""
@@ -73,3 +182,32 @@ class User(BaseModel):
     email: EmailStr
     role: str
     departments: List[str]
+
+
+# Diagnostics schemas
+class ProfilerStartRequest(BaseModel):
+    """Start the sampling profiler for a number of seconds and/or requests."""
+    duration_seconds: Optional[float] = Field(default=None, gt=0, le=600)
+    requests: Optional[int] = Field(default=None, ge=1, le=100000)
+
+
+class ProfilerStatus(BaseModel):
+    """Sampling profiler state."""
+    active: bool
+    samples: int
+    interval_ms: float
+    remaining_requests: Optional[int]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+class LLMBackendStatus(BaseModel):
+    """Routing state of one LLM backend."""
+    backend: str
+    model: str
+    healthy: bool
+    calls: int
+    error_rate: float
+    latency_p50_ms: Optional[float]
+    latency_p90_ms: Optional[float]
+    hedge_after_ms: Optional[float]
@@ -0,0 +1,76 @@
+"""
+Production entry point: serve the API with multiple worker processes.
+
+Uvicorn's supervisor starts ``WORKERS`` processes that each import the app
+and run its lifespan hook, so the Motor client, background tasks and
+caches are created inside each worker after it starts (nothing
+event-loop- or socket-bound is shared across the process boundary).
+
+One worker is the default. Metrics, the profiler, the adaptive LLM
+limiter and its urgent slots stay per process, so more workers
+(``WORKERS=N``, or ``WORKERS=0`` for one per CPU) are an explicit
+opt-in and require the MongoDB rate-limit backend.
+
+Usage:
+    python -m app.server
+    WORKERS=4 RATE_LIMIT_BACKEND=mongo python -m app.server
+"""
+import logging
+import math
+import os
+import uvicorn
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity masks and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # cgroup v2 CPU quota, e.g. "200000 100000" for 2 CPUs or "max 100000"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+
+def worker_count() -> int:
+    """Configured worker count, or one per available CPU when WORKERS is 0."""
+    return settings.WORKERS if settings.WORKERS > 0 else available_cpus()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    workers = worker_count()
+
+    if workers > 1 and settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_BACKEND == "memory":
+        raise SystemExit(
+            f"WORKERS={settings.WORKERS} starts {workers} workers, but the in-memory rate limiter "
+            "would apply its limits per worker. Set RATE_LIMIT_BACKEND=mongo to share them."
+        )
+
+    logger.info(f"Starting {workers} worker(s) on {settings.HOST}:{settings.PORT}")
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        # Uvicorn stops accepting connections and waits this long for
+        # in-flight requests (and the classifications they await) before
+        # running the lifespan shutdown that closes the database client.
+        timeout_graceful_shutdown=int(settings.SHUTDOWN_DRAIN_TIMEOUT),
+        log_config=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Hot/cold tiering of grievances.
+
+Resolved and rejected grievances untouched for ``ARCHIVE_AFTER_DAYS`` are
+moved from ``grievances`` to ``grievances_archive``, keeping the live
+collection (and every index on it) proportional to open work. Citizen
+reads fall back to the archive, so archived grievances remain visible.
+
+Each batch is copied before it is deleted, and re-running after an
+interruption is safe: documents already in the archive are skipped.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.core.database import get_database, get_grievances_collection, get_grievances_archive_collection
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = ["resolved", "rejected"]
+DUPLICATE_KEY = 11000
+
+
+def archivable_query(older_than: timedelta) -> dict:
+    """Filter for closed grievances last updated before ``older_than`` ago."""
+    return {
+        "status": {"$in": CLOSED_STATUSES},
+        "updated_at": {"$lt": datetime.utcnow() - older_than}
+    }
+
+
+async def archive_closed_grievances(older_than: timedelta, batch_size: int) -> int:
+    """Move archivable grievances to the archive in batches. Returns the number moved."""
+    live = get_grievances_collection()
+    archive = get_grievances_archive_collection()
+    query = archivable_query(older_than)
+    moved = 0
+
+    while True:
+        batch = await live.find(query).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        archived_at = datetime.utcnow()
+        for doc in batch:
+            doc["archived_at"] = archived_at
+        try:
+            await archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Already archived by an earlier, interrupted run
+            if any(error["code"] != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+
+        ids = [doc["_id"] for doc in batch]
+        # Re-check the filter so a grievance reopened meanwhile stays live
+        result = await live.delete_many({"_id": {"$in": ids}, **query})
+        moved += result.deleted_count
+
+        if result.deleted_count < len(ids):
+            reopened = [doc["_id"] async for doc in live.find({"_id": {"$in": ids}}, {"_id": 1})]
+            if reopened:
+                await archive.delete_many({"_id": {"$in": reopened}})
+                logger.info(f"Kept {len(reopened)} grievances live that changed during archival")
+
+        logger.info(f"Archived {moved} grievances so far")
+
+    return moved
+
+
+async def collection_stats(name: str) -> dict:
+    """Document count, data size, storage size and index size of a collection, in bytes."""
+    stats = await get_database().command("collStats", name)
+    return {
+        "count": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "storage_size": stats.get("storageSize", 0),
+        "total_index_size": stats.get("totalIndexSize", 0),
+    }
+
+
+async def find_grievance(tenant_id: str, grievance_id: ObjectId) -> Optional[dict]:
+    """Get a tenant's grievance from the live collection, falling back to the archive."""
+    query = {"tenant_id": tenant_id, "_id": grievance_id}
+    grievance = await get_grievances_collection().find_one(query)
+    if grievance is None:
+        grievance = await get_grievances_archive_collection().find_one(query)
+    return grievance
+
+
+async def find_user_grievances(tenant_id: str, user_id: str, skip: int, limit: int) -> List[dict]:
+    """A user's grievances across live and archive, newest first."""
+    query = {"tenant_id": tenant_id, "user_id": user_id}
+    window = skip + limit
+    live = await get_grievances_collection().find(query).sort("created_at", -1).limit(window).to_list(length=window)
+    archived = await get_grievances_archive_collection().find(query).sort("created_at", -1).limit(window).to_list(length=window)
+    merged = sorted(live + archived, key=lambda g: g["created_at"], reverse=True)
+    return merged[skip:window]
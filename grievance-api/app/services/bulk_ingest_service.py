@@ -0,0 +1,347 @@
+"""
+Bulk grievance ingestion for partner channels (call centre, ward offices).
+
+Rows are parsed incrementally from the request body or an uploaded file
+(JSON array, NDJSON or CSV), so a batch is never buffered whole. Each row
+is validated against ``BulkGrievanceItem``, classified with bounded
+concurrency and inserted in chunks with ``insert_many(ordered=False)``,
+so one bad row never fails its neighbours.
+
+Classification goes through the shared LLM limiter; keep
+``BULK_CLASSIFY_CONCURRENCY`` below ``LLM_QUEUE_MAX_SIZE`` so interactive
+submissions are not pushed onto the fallback by a large upload.
+"""
+import asyncio
+import codecs
+import csv
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.core.config import settings
+from app.core.database import get_grievances_collection
+from app.core.metrics import Counter
+from app.schemas import BulkGrievanceItem, BulkGrievanceResult, BulkGrievanceResponse
+from app.services.classification_service import classify_grievance
+from app.services.danger_service import detect_danger
+from app.services.grievance_service import new_grievance_doc
+from app.services.incident_service import attach_incident, detach_incident
+from app.services.status_service import record_inherited_status
+
+logger = logging.getLogger(__name__)
+
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+
+BULK_ROWS = Counter(
+    "bulk_ingest_rows_total",
+    "Bulk upload rows by outcome",
+    ["outcome"]
+)
+
+
+class BulkParseError(Exception):
+    """The upload is malformed at the given row; earlier rows are still ingested."""
+
+    def __init__(self, row: int, message: str):
+        super().__init__(f"Row {row}: {message}" if row else f"Header: {message}")
+        self.row = row
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    """Map a content type or file extension to an upload format."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return FORMAT_NDJSON
+    if content_type in ("text/csv", "application/csv"):
+        return FORMAT_CSV
+    if content_type == "application/json":
+        return FORMAT_JSON
+
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    return {"json": FORMAT_JSON, "ndjson": FORMAT_NDJSON, "jsonl": FORMAT_NDJSON, "csv": FORMAT_CSV}.get(extension)
+
+
+# Parsing
+
+async def _decode(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = ""
+    async for text in _decode(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    row = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise BulkParseError(row, f"invalid JSON ({e.msg})")
+
+
+async def _json_array_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """Yield the elements of a top-level JSON array as they arrive."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    expect_value = False  # after a ',' another element must follow
+    row = 0
+    text_iter = _decode(chunks).__aiter__()
+    exhausted = False
+
+    async def fill() -> bool:
+        nonlocal buffer, position, exhausted
+        try:
+            text = await text_iter.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+            return False
+        buffer = buffer[position:] + text
+        position = 0
+        return True
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position >= len(buffer):
+            if exhausted or not await fill():
+                raise BulkParseError(row + 1, "unexpected end of JSON array")
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != "[":
+                raise BulkParseError(1, "expected a JSON array")
+            started = True
+            position += 1
+        elif char == "]" and not expect_value:
+            return
+        elif char == "," and not expect_value:
+            expect_value = True
+            position += 1
+        elif row > 0 and not expect_value:
+            raise BulkParseError(row + 1, "expected ',' or ']' between array elements")
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Possibly an element split across chunks; read more and retry
+                if not exhausted and await fill():
+                    continue
+                raise BulkParseError(row + 1, f"invalid JSON ({e.msg})")
+            if end == len(buffer) and not exhausted and not isinstance(value, (dict, list, str)):
+                # A bare number or literal may continue in the next chunk
+                if await fill():
+                    continue
+            row += 1
+            position = end
+            expect_value = False
+            yield value
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """Yield CSV records as dicts keyed by the header row; quoted fields may span lines."""
+    header: Optional[List[str]] = None
+    pending = ""
+    row = 0
+    async for line in _lines(chunks):
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue  # inside a quoted field
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            if "message" not in header:
+                raise BulkParseError(0, "CSV must include a 'message' column")
+            continue
+        row += 1
+        yield dict(zip(header, values))
+    if pending:
+        raise BulkParseError(row + 1, "unterminated quoted field")
+
+
+def parse_rows(upload_format: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """Incrementally parse raw upload chunks into row objects."""
+    if upload_format == FORMAT_NDJSON:
+        return _ndjson_rows(chunks)
+    if upload_format == FORMAT_CSV:
+        return _csv_rows(chunks)
+    return _json_array_rows(chunks)
+
+
+# Ingestion
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"]) or "row"
+    return f"{field}: {first['msg']}"
+
+
+class BulkIngestion:
+    """Classifies and inserts the rows of one upload on behalf of ``user_id`` in ``tenant_id``."""
+
+    def __init__(self, tenant_id: str, user_id: str):
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.results: Dict[int, BulkGrievanceResult] = {}
+        self._semaphore = asyncio.Semaphore(settings.BULK_CLASSIFY_CONCURRENCY)
+        self._pending: List[Tuple[int, Optional[str], dict]] = []
+        self._tasks: set = set()
+        self._collection = get_grievances_collection()
+
+    def _fail(self, row: int, reference: Optional[str], error: str) -> None:
+        self.results[row] = BulkGrievanceResult(row=row, reference=reference, status="failed", error=error)
+
+    async def add(self, row: int, raw: object) -> None:
+        """Validate a row and schedule its classification; waits when concurrency is exhausted."""
+        if not isinstance(raw, dict):
+            self._fail(row, None, "Row must be an object")
+            return
+        try:
+            item = BulkGrievanceItem(**raw)
+        except ValidationError as e:
+            reference = raw.get("reference")
+            self._fail(row, reference if isinstance(reference, str) else None, _validation_message(e))
+            return
+
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._classify(row, item))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _classify(self, row: int, item: BulkGrievanceItem) -> None:
+        try:
+            classification = await classify_grievance(item.message)
+        except Exception as e:
+            logger.error(f"Bulk classification failed for row {row}: {e}")
+            self._fail(row, item.reference, "Classification failed")
+            return
+        finally:
+            self._semaphore.release()
+
+        try:
+            # Flagged like interactive submissions, but classified at bulk pace
+            doc = new_grievance_doc(
+                self.tenant_id, self.user_id, item.message, classification, danger=detect_danger(item.message)
+            )
+            doc["source"] = "bulk"
+            if item.reference:
+                doc["reference"] = item.reference
+            await attach_incident(doc)
+        except Exception as e:
+            logger.error(f"Bulk row {row} could not be prepared: {e}")
+            self._fail(row, item.reference, "Database error")
+            return
+        self._pending.append((row, item.reference, doc))
+        if len(self._pending) >= settings.BULK_INSERT_BATCH_SIZE:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        failed: Dict[int, str] = {}
+        try:
+            await self._collection.insert_many([doc for _, _, doc in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error.get("errmsg", "Insert failed")
+        except PyMongoError as e:
+            logger.error(f"Bulk insert of {len(batch)} grievances failed: {e}")
+            failed = {index: "Database error" for index in range(len(batch))}
+        except Exception as e:
+            logger.error(f"Bulk insert of {len(batch)} grievances failed: {e}")
+            failed = {index: "Insert failed" for index in range(len(batch))}
+
+        for index, (row, reference, doc) in enumerate(batch):
+            if index in failed:
+                if doc.get("incident_id"):
+                    try:
+                        await detach_incident(doc)
+                    except Exception as e:
+                        logger.warning(f"Could not detach bulk row {row} from its incident: {e}")
+                self._fail(row, reference, failed[index])
+            else:
+                if doc["status"] != "submitted":
+                    # The grievance is stored; a missing event must not report the row as failed
+                    try:
+                        await record_inherited_status(doc, "submitted")
+                    except Exception as e:
+                        logger.error(f"Could not record the inherited status of bulk row {row}: {e}")
+                self.results[row] = BulkGrievanceResult(
+                    row=row,
+                    reference=reference,
+                    status="created",
+                    id=str(doc["_id"]),
+                    predicted_department=doc["predicted_department"],
+                    priority=doc["priority"]
+                )
+
+    async def finish(self) -> None:
+        """Wait for scheduled rows and insert the remainder."""
+        while self._tasks:
+            for outcome in await asyncio.gather(*list(self._tasks), return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Bulk row task failed: {outcome}")
+        await self._flush()
+
+
+async def ingest(tenant_id: str, user_id: str, rows: AsyncIterator[object]) -> BulkGrievanceResponse:
+    """Ingest parsed rows into ``tenant_id``, returning per-row results in row order."""
+    ingestion = BulkIngestion(tenant_id, user_id)
+    truncated = False
+    error = None
+    row = 0
+
+    try:
+        async for raw in rows:
+            if row >= settings.BULK_MAX_ROWS:
+                truncated = True
+                break
+            row += 1
+            await ingestion.add(row, raw)
+    except BulkParseError as e:
+        error = str(e)
+    finally:
+        await ingestion.finish()
+
+    results = [ingestion.results[r] for r in sorted(ingestion.results)]
+    created = sum(1 for r in results if r.status == "created")
+    BULK_ROWS.labels("created").inc(created)
+    BULK_ROWS.labels("failed").inc(len(results) - created)
+    logger.info(f"Bulk upload by {user_id} (tenant {tenant_id}): {created}/{len(results)} rows created")
+
+    return BulkGrievanceResponse(
+        total=len(results),
+        created=created,
+        failed=len(results) - created,
+        truncated=truncated,
+        error=error,
+        results=results
+    )
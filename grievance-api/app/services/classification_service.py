@@ -1,14 +1,36 @@
 """
-Grievance classification service using ChatGroq with deterministic fallback.
+Grievance classification service using LLM backends with deterministic fallback.
+
+Calls go through the LLM router (``llm_router``), which picks among the
+backends in LLM_BACKENDS (Groq, OpenAI-compatible local servers) by
+recent latency and error rate, and hedges slow calls. Client libraries
+are imported on first LLM use, so deployments without a backend
+(fallback only) never pay their import time or memory.
+
+Streamed completions are fed to an incremental JSON scanner; as soon as a
+complete object with the required keys has arrived the stream is closed,
+which also ends the generation on the server, so text the model adds
+after the object is neither waited for nor generated.
 """
 import json
-import re
+import time
 import logging
-from typing import Dict
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
-from app.core.config import settings
+from contextlib import aclosing
+from typing import Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from app.core.metrics import Counter, Histogram
+from app.core.timing import record_phase
 from app.schemas import GrievanceClassification
+from app.services.llm_backends import LLMBackend
+from app.services.llm_router import llm_router
+from app.services.llm_limiter import (
+    llm_limiter,
+    LimiterQueueFull,
+    overload_kind,
+    OUTCOME_OK,
+    OUTCOME_OVERLOAD,
+    OUTCOME_ERROR
+)
 
 logger = logging.getLogger(__name__)
 
@@ -50,81 +72,186 @@ def fallback_classify(message: str) -> Dict:
     }
 
 
-def extract_json_from_response(text: str) -> Dict:
-    """Extract JSON from response, handling markdown code blocks."""
-    # Try direct parse first
-    try:
-        return json.loads(text.strip())
-    except json.JSONDecodeError:
-        pass
+REQUIRED_KEYS = {"department", "priority", "confidence", "explanation"}
+VALID_DEPARTMENTS = {"water", "sanitation", "roads", "electricity", "health", "police", "housing", "general", "miscellaneous"}
+
+
+class JsonObjectScanner:
+    """
+    Incremental scanner for the first complete JSON object in streamed text.
     
-    # Try to find JSON in markdown code block
-    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
-    if json_match:
-        try:
-            return json.loads(json_match.group(1))
-        except json.JSONDecodeError:
-            pass
+    Tracks brace depth outside string literals, so each character is looked
+    at once and ``json.loads`` only runs when an object closes. Text around
+    the object (markdown fences, prose) is skipped; an object that doesn't
+    parse or lacks ``required_keys`` is discarded and scanning continues.
+    """
     
-    # Try to find raw JSON object
-    json_match = re.search(r'\{[^{}]*"department"[^{}]*\}', text, re.DOTALL)
-    if json_match:
-        try:
-            return json.loads(json_match.group(0))
-        except json.JSONDecodeError:
-            pass
+    def __init__(self, required_keys=REQUIRED_KEYS):
+        self.required_keys = required_keys
+        self.result: Optional[Dict] = None
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
     
+    def feed(self, text: str) -> Optional[Dict]:
+        """Consume the next piece of text; returns the object once it is complete."""
+        if self.result is not None:
+            return self.result
+        start = 0
+        for i, char in enumerate(text):
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    start = i
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start:i + 1])
+                    candidate, self._parts = "".join(self._parts), []
+                    try:
+                        parsed = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(parsed, dict) and self.required_keys.issubset(parsed.keys()):
+                        self.result = parsed
+                        return parsed
+        if self._depth:
+            self._parts.append(text[start:])
+        return None
+
+
+def _validated(result_dict: Optional[Dict]) -> Optional[GrievanceClassification]:
+    """The classification if the parsed response has every key and valid values."""
+    if result_dict and REQUIRED_KEYS.issubset(result_dict.keys()):
+        if result_dict["department"] in VALID_DEPARTMENTS:
+            try:
+                return GrievanceClassification(**result_dict)
+            except ValidationError:
+                return None
     return None
 
 
-async def classify_grievance(message: str) -> GrievanceClassification:
+TIER_LLM = "llm"
+TIER_FALLBACK = "fallback"
+
+CLASSIFICATION_DURATION = Histogram(
+    "classification_duration_seconds",
+    "Grievance classification latency by tier",
+    ("tier",)
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "LLM classification failures by kind",
+    ("kind",)
+)
+LLM_STREAM_STOPS = Counter(
+    "llm_stream_stops_total",
+    "Streamed completions by how reading ended (object_complete = closed early, stream_end = read to the end)",
+    ("reason",)
+)
+LLM_COMPLETION_CHARS = Histogram(
+    "llm_completion_chars",
+    "Characters of completion read per LLM call",
+    buckets=(50, 100, 150, 200, 300, 500, 800, 1200, 2000, 4000)
+)
+
+
+async def _read_completion(backend: LLMBackend, message: str) -> Tuple[Optional[GrievanceClassification], str]:
+    """
+    Read a completion from ``backend`` until it holds a valid classification.
+    
+    Returns ``(classification or None, text read)``. Leaving the loop early
+    closes the backend's stream.
+    """
+    scanner = JsonObjectScanner()
+    pieces: List[str] = []
+    async with aclosing(backend.stream(SYSTEM_PROMPT, message)) as chunks:
+        async for text in chunks:
+            pieces.append(text)
+            if scanner.feed(text) is not None:
+                if backend.streaming:
+                    LLM_STREAM_STOPS.labels("object_complete").inc()
+                break
+        else:
+            if backend.streaming:
+                LLM_STREAM_STOPS.labels("stream_end").inc()
+    response_text = "".join(pieces)
+    LLM_COMPLETION_CHARS.observe(len(response_text))
+    return _validated(scanner.result), response_text
+
+
+def _fallback(message: str) -> Tuple[GrievanceClassification, str]:
+    return GrievanceClassification(**fallback_classify(message)), TIER_FALLBACK
+
+
+async def classify_grievance(message: str, urgent: bool = False) -> GrievanceClassification:
     """
-    Classify grievance using ChatGroq, with fallback to keyword-based classification.
+    Classify grievance using the LLM backends, with fallback to keyword-based classification.
     
-    Returns strict JSON with: department, priority, confidence, explanation
+    Returns strict JSON with: department, priority, confidence, explanation.
+    ``urgent`` calls (danger-flagged grievances) are admitted to the LLM first.
     """
-    if not settings.GROQ_API_KEY:
-        logger.warning("GROQ_API_KEY not set, using fallback")
-        result = fallback_classify(message)
-        return GrievanceClassification(**result)
+    started = time.perf_counter()
+    classification, tier = await _classify(message, urgent)
+    elapsed = time.perf_counter() - started
+    CLASSIFICATION_DURATION.labels(tier).observe(elapsed)
+    record_phase("classify", elapsed, f"{tier} urgent" if urgent else tier)
+    return classification
+
+
+async def _classify(message: str, urgent: bool = False) -> Tuple[GrievanceClassification, str]:
+    """
+    Run the classification and report which tier produced the result.
     
+    LLM calls are admitted by the adaptive concurrency limiter; when no slot
+    is available the keyword fallback is used straight away. Urgent calls
+    use the limiter's reserved slots and are admitted ahead of others.
+    """
+    if not llm_router.backends:
+        logger.warning("No LLM backend configured, using fallback")
+        return _fallback(message)
+    
+    try:
+        await llm_limiter.acquire(urgent=urgent)
+    except LimiterQueueFull as e:
+        logger.warning(f"LLM concurrency limit reached ({e}), using fallback")
+        LLM_ERRORS.labels("queue_full").inc()
+        return _fallback(message)
+    
+    started = time.monotonic()
+    outcome = OUTCOME_ERROR
     try:
-        # Initialize ChatGroq
-        llm = ChatGroq(
-            groq_api_key=settings.GROQ_API_KEY,
-            model_name=settings.GROQ_MODEL,
-            temperature=0.0,
-            timeout=settings.GROQ_TIMEOUT
+        _, classification, response_text = await llm_router.run(
+            lambda backend: _read_completion(backend, message)
         )
+        outcome = OUTCOME_OK
+        if classification:
+            return classification, TIER_LLM
         
-        # Create messages
-        messages = [
-            SystemMessage(content=SYSTEM_PROMPT),
-            HumanMessage(content=message)
-        ]
-        
-        # Call LLM
-        response = llm.invoke(messages)
-        response_text = response.content.strip()
-        
-        # Extract JSON
-        result_dict = extract_json_from_response(response_text)
-        
-        if result_dict:
-            # Validate required keys
-            required_keys = {"department", "priority", "confidence", "explanation"}
-            if required_keys.issubset(result_dict.keys()):
-                # Validate department value
-                valid_departments = {"water", "sanitation", "roads", "electricity", "health", "police", "housing", "general", "miscellaneous"}
-                if result_dict["department"] in valid_departments:
-                    return GrievanceClassification(**result_dict)
-        
-        # If we got here, LLM response was invalid
+        # If we got here, every backend's response was invalid
         logger.warning(f"Invalid LLM response format: {response_text[:200]}")
-        result = fallback_classify(message)
-        return GrievanceClassification(**result)
+        LLM_ERRORS.labels("invalid_response").inc()
+        return _fallback(message)
         
     except Exception as e:
+        kind = overload_kind(e)
+        if kind:
+            outcome = OUTCOME_OVERLOAD
+        LLM_ERRORS.labels(kind or "error").inc()
         logger.error(f"Classification error: {e}")
-        result = fallback_classify(message)
-        return GrievanceClassification(**result)
+        return _fallback(message)
+    finally:
+        llm_limiter.release(time.monotonic() - started, outcome)
@@ -0,0 +1,56 @@
+"""
+Per-process cache of department configuration.
+
+Departments change rarely, so each worker loads them once at startup and
+serves lookups from memory. Each tenant configures its own departments
+(names, SLAs, contacts) under the classifier's department keys; a tenant
+with no departments of its own uses the default tenant's. Departments
+created before tenancy have their key as ``_id`` and belong to the
+default tenant.
+"""
+import logging
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import get_departments_collection
+
+logger = logging.getLogger(__name__)
+
+_departments: Dict[str, Dict[str, dict]] = {}  # tenant -> department key -> department
+
+
+def department_doc_id(tenant_id: str, key: str) -> str:
+    """``_id`` of a tenant's department document."""
+    return key if tenant_id == settings.DEFAULT_TENANT else f"{tenant_id}:{key}"
+
+
+def department_key(doc: dict) -> str:
+    return doc.get("key", doc["_id"])
+
+
+async def load_departments() -> None:
+    """(Re)load all departments into the cache."""
+    global _departments
+    cursor = get_departments_collection().find({})
+    departments: Dict[str, Dict[str, dict]] = {}
+    for d in await cursor.to_list(length=None):
+        departments.setdefault(d.get("tenant_id", settings.DEFAULT_TENANT), {})[department_key(d)] = d
+    _departments = departments
+    logger.info(f"Loaded {sum(len(d) for d in departments.values())} departments for {len(departments)} tenants")
+
+
+def departments_loaded() -> bool:
+    return bool(_departments)
+
+
+def _tenant_departments(tenant_id: str) -> Dict[str, dict]:
+    return _departments.get(tenant_id) or _departments.get(settings.DEFAULT_TENANT, {})
+
+
+def get_department(department_id: str, tenant_id: str = settings.DEFAULT_TENANT) -> Optional[dict]:
+    """Get a tenant's cached department by key."""
+    return _tenant_departments(tenant_id).get(department_id)
+
+
+def list_departments(tenant_id: str = settings.DEFAULT_TENANT) -> List[dict]:
+    """Get a tenant's cached departments."""
+    return list(_tenant_departments(tenant_id).values())
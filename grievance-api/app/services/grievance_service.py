@@ -0,0 +1,105 @@
+"""
+Creation of grievance documents shared by single and bulk submission, and
+their conversion to API responses.
+"""
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from app.core.config import settings
+from app.core.database import get_grievances_collection
+from app.schemas import GrievanceClassification, GrievanceResponse
+from app.services.incident_service import attach_incident, detach_incident
+from app.services.location_service import extract_location
+from app.services.notification_service import notifications
+from app.services.status_service import record_inherited_status
+from app.services.write_buffer import grievance_writes
+
+
+def new_grievance_doc(
+    tenant_id: str,
+    user_id: str,
+    message: str,
+    classification: GrievanceClassification,
+    now: Optional[datetime] = None,
+    danger: Optional[str] = None
+) -> dict:
+    """
+    Build a newly submitted grievance document.
+    
+    ``danger`` is the category found by the danger pre-screen; such
+    grievances are stored as urgent and high priority whatever the
+    classifier said.
+    """
+    now = now or datetime.utcnow()
+    doc = {
+        "tenant_id": tenant_id,
+        "user_id": user_id,
+        "message": message,
+        "predicted_department": classification.department,
+        "priority": classification.priority,
+        "confidence": classification.confidence,
+        "explanation": classification.explanation,
+        "status": "submitted",
+        "created_at": now,
+        "updated_at": now,
+        "status_changed_at": now,
+        "status_reached_at": {"submitted": now}
+    }
+    
+    location = extract_location(message)
+    if location:
+        doc["location"] = location["point"]
+        doc["location_name"] = location["name"]
+    if danger:
+        doc["urgent"] = True
+        doc["danger"] = danger
+        doc["priority"] = "high"
+    if settings.NOTIFICATIONS_ENABLED:
+        # Written with the grievance itself, so it's notified exactly when it is stored
+        doc["notification_pending"] = True
+    return doc
+
+
+async def insert_grievance(doc: dict) -> ObjectId:
+    """
+    Group a new grievance into an incident and insert it (through the group-commit buffer when enabled).
+    
+    If the grievance took its incident's status, the transition from
+    ``submitted`` is recorded in the event log.
+    """
+    submitted_status = doc["status"]
+    await attach_incident(doc)
+    try:
+        if settings.GRIEVANCE_WRITE_BUFFER_ENABLED:
+            inserted_id = await grievance_writes.insert(doc)
+        else:
+            inserted_id = (await get_grievances_collection().insert_one(doc)).inserted_id
+    except Exception:
+        if doc.get("incident_id"):
+            await detach_incident(doc)
+        raise
+    if doc["status"] != submitted_status:
+        await record_inherited_status({**doc, "_id": inserted_id}, submitted_status)
+    if doc.get("notification_pending") and (doc.get("urgent") or notifications.is_immediate(doc["priority"])):
+        notifications.wake()
+    return inserted_id
+
+
+def to_grievance_response(doc: dict) -> GrievanceResponse:
+    """Convert a stored grievance document to its API response."""
+    return GrievanceResponse(
+        id=str(doc["_id"]),
+        user_id=doc["user_id"],
+        message=doc["message"],
+        predicted_department=doc["predicted_department"],
+        priority=doc["priority"],
+        confidence=doc["confidence"],
+        explanation=doc["explanation"],
+        status=doc["status"],
+        location_name=doc.get("location_name"),
+        urgent=doc.get("urgent", False),
+        danger=doc.get("danger"),
+        incident_id=str(doc["incident_id"]) if doc.get("incident_id") else None,
+        created_at=doc["created_at"],
+        updated_at=doc["updated_at"]
+    )
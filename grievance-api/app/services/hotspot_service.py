@@ -0,0 +1,86 @@
+"""
+Geospatial hotspot clustering of grievances.
+
+Grievances with an extracted location are bucketed server-side into a
+square grid of ``cell_km`` cells with a single aggregation; only cells
+with at least ``min_count`` grievances are returned, busiest first, each
+with the centroid of its grievances. An optional viewport bounding box is
+matched through the ``2dsphere`` index, so map views only scan what they
+display.
+"""
+import math
+from datetime import datetime
+from typing import List, Optional, Tuple
+from app.core.database import get_grievances_collection
+from app.services.location_service import reference_latitude
+
+KM_PER_DEGREE_LATITUDE = 111.32
+
+
+async def find_hotspots(
+    tenant_id: str,
+    department_filter: Optional[object],
+    since: datetime,
+    cell_km: float,
+    min_count: int,
+    limit: int,
+    bbox: Optional[Tuple[float, float, float, float]] = None
+) -> List[dict]:
+    """
+    Cluster a tenant's grievances created since ``since`` into grid cells.
+    
+    ``department_filter`` is matched against ``predicted_department`` (a
+    department id or a ``$in`` clause); ``bbox`` is
+    ``(min_lng, min_lat, max_lng, max_lat)``.
+    """
+    query = {"tenant_id": tenant_id, "created_at": {"$gte": since}, "location": {"$exists": True}}
+    if department_filter is not None:
+        query["predicted_department"] = department_filter
+
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        query["location"] = {"$geoWithin": {"$geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]
+            ]]
+        }}}
+        latitude = (min_lat + max_lat) / 2
+    else:
+        latitude = reference_latitude()
+
+    # Degrees per cell; longitude degrees shrink with latitude
+    lat_step = cell_km / KM_PER_DEGREE_LATITUDE
+    lng_step = cell_km / (KM_PER_DEGREE_LATITUDE * max(math.cos(math.radians(latitude)), 0.01))
+
+    collection = get_grievances_collection(analytics=True)
+    # Field references go through the collection's codec (grievances may be stored compact)
+    pipeline = [
+        {"$match": collection.query(query)},
+        {"$project": {
+            "_id": 0,
+            "lng": {"$arrayElemAt": [collection.expr("location.coordinates"), 0]},
+            "lat": {"$arrayElemAt": [collection.expr("location.coordinates"), 1]},
+            "high_priority": {"$in": [collection.expr("priority"), collection.values("priority", "high")]},
+            "location_name": collection.expr("location_name")
+        }},
+        {"$group": {
+            "_id": {
+                "x": {"$floor": {"$divide": ["$lng", lng_step]}},
+                "y": {"$floor": {"$divide": ["$lat", lat_step]}}
+            },
+            "count": {"$sum": 1},
+            "high_priority": {"$sum": {"$cond": ["$high_priority", 1, 0]}},
+            "lat": {"$avg": "$lat"},
+            "lng": {"$avg": "$lng"},
+            "locations": {"$addToSet": "$location_name"}
+        }},
+        {"$match": {"count": {"$gte": min_count}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit}
+    ]
+
+    cells = await collection.aggregate(pipeline).to_list(length=limit)
+    for cell in cells:
+        cell["locations"] = sorted(cell["locations"])
+    return cells
@@ -0,0 +1,152 @@
+"""
+Grouping of related grievances into incidents.
+
+A burst pipe produces dozens of grievances for the same department and
+place within a short time. When a grievance with an extracted location is
+submitted, it joins the open incident for its department and location
+whose last report is within ``INCIDENT_WINDOW_MINUTES``, or starts a new
+one. Admins can then list incidents instead of individual grievances and
+change the status of every member with one bulk write.
+
+Each (tenant, department, location) has at most one incident accepting
+new members, enforced by a unique partial index on ``(tenant_id, key)``,
+so concurrent submissions can't create duplicates.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.database import get_incidents_collection
+from app.services.status_service import change_status_many
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {"low": 1, "medium": 2, "high": 3}
+RANK_PRIORITY = {rank: priority for priority, rank in PRIORITY_RANK.items()}
+CLOSED_STATUSES = ("resolved", "rejected")
+
+
+def incident_key(department: str, location_name: str) -> str:
+    return f"{department}:{location_name}"
+
+
+async def attach_incident(doc: dict) -> Optional[ObjectId]:
+    """
+    Assign a new grievance document to an incident, setting ``incident_id``.
+
+    Grievances without a location are not grouped. A grievance joining an
+    incident already being worked on takes its status; ``insert_grievance``
+    records that transition once the grievance is stored, and calls
+    ``detach_incident`` if it can't be. Returns the incident id.
+    """
+    if not settings.INCIDENTS_ENABLED or not doc.get("location_name"):
+        return None
+
+    incidents = get_incidents_collection()
+    tenant_id = doc["tenant_id"]
+    key = incident_key(doc["predicted_department"], doc["location_name"])
+    now = doc["created_at"]
+    cutoff = now - timedelta(minutes=settings.INCIDENT_WINDOW_MINUTES)
+    rank = PRIORITY_RANK.get(doc["priority"], 1)
+
+    for _ in range(3):
+        incident = await incidents.find_one_and_update(
+            {"tenant_id": tenant_id, "key": key, "accepting": True, "last_reported_at": {"$gte": cutoff}},
+            {
+                "$inc": {"grievance_count": 1},
+                "$max": {"last_reported_at": now, "priority_rank": rank},
+                "$set": {"updated_at": now}
+            },
+            projection={"_id": 1, "status": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if incident:
+            doc["incident_id"] = incident["_id"]
+            # Joining an incident already being worked on
+            if incident["status"] != doc["status"]:
+                doc["status"] = incident["status"]
+                doc.setdefault("status_reached_at", {})[incident["status"]] = now
+            return incident["_id"]
+
+        # The previous incident for this place has gone quiet; stop extending it
+        await incidents.update_many(
+            {"tenant_id": tenant_id, "key": key, "accepting": True, "last_reported_at": {"$lt": cutoff}},
+            {"$set": {"accepting": False}}
+        )
+        try:
+            result = await incidents.insert_one({
+                "tenant_id": tenant_id,
+                "key": key,
+                "accepting": True,
+                "department": doc["predicted_department"],
+                "location_name": doc["location_name"],
+                "location": doc.get("location"),
+                "status": "submitted",
+                "priority_rank": rank,
+                "grievance_count": 1,
+                "first_reported_at": now,
+                "last_reported_at": now,
+                "created_at": now,
+                "updated_at": now
+            })
+        except DuplicateKeyError:
+            continue  # another submission opened it first; join that one
+        doc["incident_id"] = result.inserted_id
+        return result.inserted_id
+
+    logger.warning(f"Could not assign an incident for {key} (tenant {tenant_id})")
+    return None
+
+
+async def detach_incident(doc: dict) -> None:
+    """
+    Undo ``attach_incident`` for a grievance that could not be stored.
+
+    An incident left without members by this is deleted.
+    """
+    query = {
+        "tenant_id": doc["tenant_id"],
+        "key": incident_key(doc["predicted_department"], doc["location_name"]),
+        "_id": doc["incident_id"]
+    }
+    incidents = get_incidents_collection()
+    incident = await incidents.find_one_and_update(
+        query, {"$inc": {"grievance_count": -1}},
+        projection={"grievance_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if incident is not None and incident["grievance_count"] <= 0:
+        await incidents.delete_one({**query, "grievance_count": {"$lte": 0}})
+
+
+async def update_incident_status(incident: dict, new_status: str, actor: str) -> Optional[dict]:
+    """
+    Set the status of an incident and all of its grievances.
+
+    ``incident`` needs ``_id``, ``tenant_id`` and ``key``; the update is
+    addressed by the full shard key, so it targets one shard. Member
+    grievances change in one bulk write, with a status event each.
+    Closed incidents stop accepting new grievances. Returns the updated
+    incident with ``updated_grievances`` set, or None if it doesn't exist.
+    """
+    now = datetime.utcnow()
+    update = {"status": new_status, "updated_at": now}
+    if new_status in CLOSED_STATUSES:
+        update["accepting"] = False
+
+    tenant_id = incident["tenant_id"]
+    updated = await get_incidents_collection().find_one_and_update(
+        {"tenant_id": tenant_id, "key": incident["key"], "_id": incident["_id"]},
+        {"$set": update},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        return None
+
+    updated["updated_grievances"] = await change_status_many(
+        {"tenant_id": tenant_id, "incident_id": incident["_id"]}, new_status, actor
+    )
+    return updated
@@ -0,0 +1,181 @@
+"""
+Chat-completion backends for grievance classification.
+
+A backend turns a system prompt and a grievance into completion text,
+yielded piece by piece as it arrives. Closing the iterator early closes
+the HTTP response, which ends the generation on the server. Backends
+don't parse the text; the classifier does, so it can stop reading as soon
+as the JSON object is complete.
+
+- ``groq``: Groq through the LangChain client (GROQ_* settings)
+- ``local``: any server speaking the OpenAI chat completions API, e.g.
+  llama.cpp, vLLM or Ollama (LOCAL_LLM_* settings), over httpx
+
+Client libraries are imported on first use, so fallback-only deployments
+never load them.
+"""
+import json
+import logging
+from typing import AsyncIterator, List
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend:
+    """A chat-completion provider the router can send classifications to."""
+
+    def __init__(self, name: str, model: str, max_tokens: int, streaming: bool):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.streaming = streaming
+
+    def stream(self, system_prompt: str, message: str) -> AsyncIterator[str]:
+        """Completion text in the order it arrives (one piece when not streaming)."""
+        raise NotImplementedError
+
+    def _messages(self, system_prompt: str, message: str) -> List[dict]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message}
+        ]
+
+
+class GroqBackend(LLMBackend):
+    """
+    Groq via ChatGroq.
+
+    Streaming uses the Groq SDK client that ChatGroq builds: LangChain's
+    ``astream`` can't close the underlying response, and closing it is
+    what stops the generation once the classifier has what it needs.
+    """
+
+    def __init__(self, name: str, api_key: str, model: str, base_url: str, timeout: float,
+                 max_tokens: int, streaming: bool):
+        super().__init__(name, model, max_tokens, streaming)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self._llm = None
+
+    def _client(self):
+        """Create the ChatGroq client on first use and reuse it afterwards."""
+        if self._llm is None:
+            from langchain_groq import ChatGroq
+            self._llm = ChatGroq(
+                groq_api_key=self.api_key,
+                model_name=self.model,
+                temperature=0.0,
+                max_tokens=self.max_tokens,
+                timeout=self.timeout,
+                base_url=self.base_url or None
+            )
+        return self._llm
+
+    async def stream(self, system_prompt: str, message: str) -> AsyncIterator[str]:
+        if not self.streaming:
+            from langchain_core.messages import HumanMessage, SystemMessage
+            response = await self._client().ainvoke([
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=message)
+            ])
+            yield response.content.strip()
+            return
+
+        stream = await self._client().async_client.create(
+            messages=self._messages(system_prompt, message),
+            model=self.model,
+            temperature=0.0,
+            max_tokens=self.max_tokens,
+            stream=True
+        )
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server implementing ``POST /v1/chat/completions``, over httpx."""
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: str, timeout: float,
+                 max_tokens: int, streaming: bool):
+        super().__init__(name, model, max_tokens, streaming)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self._http = None
+
+    def _client(self):
+        """Create the HTTP client on first use; it keeps connections to the server open."""
+        if self._http is None:
+            import httpx
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._http = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=self.timeout)
+        return self._http
+
+    async def stream(self, system_prompt: str, message: str) -> AsyncIterator[str]:
+        body = {
+            "model": self.model,
+            "messages": self._messages(system_prompt, message),
+            "temperature": 0.0,
+            "max_tokens": self.max_tokens,
+            "stream": self.streaming
+        }
+        if not self.streaming:
+            response = await self._client().post("/v1/chat/completions", json=body)
+            response.raise_for_status()
+            yield (response.json()["choices"][0]["message"].get("content") or "").strip()
+            return
+
+        async with self._client().stream("POST", "/v1/chat/completions", json=body) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices")
+                if choices and (choices[0].get("delta") or {}).get("content"):
+                    yield choices[0]["delta"]["content"]
+
+
+def configured_backends() -> List[LLMBackend]:
+    """Backends named in LLM_BACKENDS that have the settings they need, in that order."""
+    backends: List[LLMBackend] = []
+    for name in (n.strip() for n in settings.LLM_BACKENDS.split(",")):
+        if not name:
+            continue
+        if name == "groq":
+            if not settings.GROQ_API_KEY:
+                logger.warning("LLM backend 'groq' skipped: GROQ_API_KEY not set")
+                continue
+            backends.append(GroqBackend(
+                "groq",
+                api_key=settings.GROQ_API_KEY,
+                model=settings.GROQ_MODEL,
+                base_url=settings.GROQ_BASE_URL,
+                timeout=settings.GROQ_TIMEOUT,
+                max_tokens=settings.GROQ_MAX_TOKENS,
+                streaming=settings.GROQ_STREAMING
+            ))
+        elif name == "local":
+            if not settings.LOCAL_LLM_BASE_URL:
+                logger.warning("LLM backend 'local' skipped: LOCAL_LLM_BASE_URL not set")
+                continue
+            backends.append(OpenAICompatibleBackend(
+                "local",
+                base_url=settings.LOCAL_LLM_BASE_URL,
+                model=settings.LOCAL_LLM_MODEL,
+                api_key=settings.LOCAL_LLM_API_KEY,
+                timeout=settings.LOCAL_LLM_TIMEOUT,
+                max_tokens=settings.LOCAL_LLM_MAX_TOKENS,
+                streaming=settings.LOCAL_LLM_STREAMING
+            ))
+        else:
+            logger.warning(f"Unknown LLM backend in LLM_BACKENDS: {name}")
+    return backends
@@ -0,0 +1,214 @@
+"""
+Adaptive (AIMD) concurrency limiter for outbound LLM requests.
+
+The allowed concurrency grows additively while calls complete quickly and
+shrinks multiplicatively when the provider signals overload (HTTP 429 or
+timeouts). Callers that cannot get a slot wait in a bounded queue; when the
+queue is full, or the wait exceeds its timeout, ``LimiterQueueFull`` is
+raised so the caller can fall back to keyword classification.
+
+Urgent calls (grievances flagged by the danger pre-screen) have their own
+queue, served first, and ``urgent_reserved`` slots of the limit that
+regular calls can't take, so they don't wait behind a backlog. The limit
+never drops below ``urgent_reserved + 1``, so the reserved slots exist at
+any limit and regular calls always keep at least one slot.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import Gauge, Histogram
+
+OUTCOME_OK = "ok"
+OUTCOME_OVERLOAD = "overload"
+OUTCOME_ERROR = "error"
+
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time spent waiting for an LLM concurrency slot"
+)
+LLM_URGENT_QUEUE_WAIT = Histogram(
+    "llm_urgent_queue_wait_seconds",
+    "Time urgent calls spent waiting for an LLM concurrency slot"
+)
+
+
+class LimiterQueueFull(Exception):
+    """Raised when no concurrency slot can be obtained."""
+
+
+class AdaptiveConcurrencyLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limiter."""
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        max_queue: int,
+        queue_timeout: float,
+        latency_target: float,
+        backoff_ratio: float,
+        urgent_reserved: int = 0
+    ):
+        # Floor above the reservation, so backing off can't shrink the limit into the reserved slots
+        self.min_limit = max(float(min_limit), urgent_reserved + 1.0)
+        self.max_limit = max(float(max_limit), self.min_limit)
+        self.limit = min(self.max_limit, max(float(initial_limit), self.min_limit))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.urgent_reserved = urgent_reserved
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._urgent_waiters: Deque[asyncio.Future] = deque()
+        self._last_backoff = 0.0
+
+        # Metrics
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_max_seconds = 0.0
+        self.queued_total = 0
+        self.rejected_total = 0
+        self.backoffs_total = 0
+        self.urgent_total = 0
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters) + len(self._urgent_waiters)
+
+    def _has_capacity(self, urgent: bool = False) -> bool:
+        limit = int(self.limit)
+        if not urgent:
+            # Regular calls leave the reserved slots free (min_limit keeps at least one for them)
+            limit -= self.urgent_reserved
+        return self.in_flight < limit
+
+    async def acquire(self, urgent: bool = False) -> None:
+        """Wait for a concurrency slot, raising ``LimiterQueueFull`` on overflow."""
+        waiters = self._urgent_waiters if urgent else self._waiters
+        if urgent:
+            self.urgent_total += 1
+        if self._has_capacity(urgent) and not waiters:
+            self.in_flight += 1
+            return
+
+        if len(waiters) >= self.max_queue:
+            self.rejected_total += 1
+            raise LimiterQueueFull("LLM wait queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # Slot was handed over just as we gave up; pass it on.
+                self.in_flight -= 1
+                self._wake_waiters()
+            else:
+                waiter.cancel()
+                waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_total += 1
+            raise LimiterQueueFull("Timed out waiting for an LLM slot")
+        finally:
+            waited = time.monotonic() - started
+            LLM_QUEUE_WAIT.observe(waited)
+            if urgent:
+                LLM_URGENT_QUEUE_WAIT.observe(waited)
+            self.queued_total += 1
+            self.queue_wait_seconds_total += waited
+            self.queue_wait_max_seconds = max(self.queue_wait_max_seconds, waited)
+
+    def try_acquire(self) -> bool:
+        """Take a regular slot only if one is free and nobody is waiting; never queues."""
+        if self.queued or not self._has_capacity():
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, outcome: str) -> None:
+        """Return a slot and adapt the limit based on the call outcome."""
+        self.in_flight -= 1
+
+        if outcome == OUTCOME_OVERLOAD:
+            # Back off at most once per latency window so a burst of
+            # failures from the same wave doesn't collapse the limit.
+            now = time.monotonic()
+            if now - self._last_backoff >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_backoff = now
+                self.backoffs_total += 1
+        elif outcome == OUTCOME_OK and latency <= self.latency_target:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        for waiters, urgent in ((self._urgent_waiters, True), (self._waiters, False)):
+            while waiters and self._has_capacity(urgent):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current limiter state and counters."""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "urgent_queued": len(self._urgent_waiters),
+            "urgent_total": self.urgent_total,
+            "queued_total": self.queued_total,
+            "queue_wait_seconds_total": self.queue_wait_seconds_total,
+            "queue_wait_max_seconds": self.queue_wait_max_seconds,
+            "rejected_total": self.rejected_total,
+            "backoffs_total": self.backoffs_total,
+        }
+
+
+def overload_kind(error: Exception) -> Optional[str]:
+    """Classify provider overload errors as "timeout" or "rate_limited", else None."""
+    name = type(error).__name__
+    if isinstance(error, asyncio.TimeoutError) or "Timeout" in name:
+        return "timeout"
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status_code == 429 or "RateLimit" in name:
+        return "rate_limited"
+    return None
+
+
+llm_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=settings.LLM_CONCURRENCY_INITIAL,
+    min_limit=settings.LLM_CONCURRENCY_MIN,
+    max_limit=settings.LLM_CONCURRENCY_MAX,
+    max_queue=settings.LLM_QUEUE_MAX_SIZE,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+    latency_target=settings.LLM_LATENCY_TARGET,
+    backoff_ratio=settings.LLM_BACKOFF_RATIO,
+    urgent_reserved=settings.LLM_URGENT_RESERVED_SLOTS
+)
+
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "llm_concurrency_limit",
+    "Current adaptive concurrency limit for LLM calls",
+    function=lambda: llm_limiter.limit
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_requests_in_flight",
+    "LLM calls currently holding a concurrency slot",
+    function=lambda: llm_limiter.in_flight
+)
+LLM_QUEUED = Gauge(
+    "llm_requests_queued",
+    "Requests waiting for an LLM concurrency slot",
+    function=lambda: llm_limiter.queued
+)
@@ -0,0 +1,297 @@
+"""
+Latency-aware routing of LLM calls across backends, with hedging.
+
+Each backend keeps a window of its recent calls (LLM_ROUTER_WINDOW). A
+call goes to the healthy backend with the lowest median latency; backends
+without enough samples yet are tried first so their latency gets learned.
+A backend whose error rate in the window exceeds LLM_ROUTER_MAX_ERROR_RATE
+is skipped for LLM_ROUTER_COOLDOWN_SECONDS, then gets live traffic again;
+a single failure at that point sends it straight back to cooldown.
+
+When a call takes longer than the LLM_HEDGE_QUANTILE latency of its
+backend, the same request is also sent to the next backend and whichever
+answers first is used; the other is cancelled, which closes its stream.
+A hedge holds a concurrency slot of its own and is only sent when the
+limiter has one free without queueing, so hedging never takes in-flight
+calls past the adaptive limit or ahead of waiting requests.
+A failed call is retried on the next backend straight away. Cancelled
+calls count as samples of their elapsed time, a lower bound, so a backend
+that keeps losing hedges still looks slow.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+from app.services.llm_backends import LLMBackend, configured_backends
+from app.services.llm_limiter import (
+    AdaptiveConcurrencyLimiter, OUTCOME_ERROR, OUTCOME_OK, OUTCOME_OVERLOAD, llm_limiter, overload_kind
+)
+
+logger = logging.getLogger(__name__)
+
+# An attempt returns (result, completion text); a None result means the answer was unusable
+Attempt = Callable[[LLMBackend], Awaitable[Tuple[Optional[Any], str]]]
+
+LLM_BACKEND_CALLS = Counter(
+    "llm_backend_calls_total",
+    "LLM calls per backend by outcome (ok, invalid, error, cancelled)",
+    ("backend", "outcome")
+)
+LLM_BACKEND_DURATION = Histogram(
+    "llm_backend_duration_seconds",
+    "LLM call latency per backend (completed calls)",
+    ("backend",)
+)
+LLM_BACKEND_HEALTHY = Gauge(
+    "llm_backend_healthy",
+    "1 while a backend receives traffic, 0 during its cooldown",
+    ("backend",)
+)
+LLM_HEDGES = Counter(
+    "llm_hedges_total",
+    "Hedged LLM calls by which attempt answered first (hedge or primary)",
+    ("winner",)
+)
+LLM_HEDGES_SKIPPED = Counter(
+    "llm_hedges_skipped_total",
+    "Hedges not sent because no LLM concurrency slot was free"
+)
+
+
+class NoBackendAvailable(Exception):
+    """Raised when no LLM backend is configured."""
+
+
+class BackendStats:
+    """Rolling latency and error rate of one backend."""
+
+    def __init__(self, window: int):
+        self.calls: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self.down_until = 0.0
+        self.probing = False
+
+    def record(self, latency: float, ok: bool, min_samples: int, max_error_rate: float, cooldown: float) -> None:
+        self.calls.append((latency, ok))
+        if self.probing:
+            self.probing = False
+            if not ok:
+                self._trip(cooldown)
+        elif len(self.calls) >= min_samples and self.error_rate > max_error_rate:
+            self._trip(cooldown)
+
+    def _trip(self, cooldown: float) -> None:
+        self.down_until = time.monotonic() + cooldown
+        self.probing = True
+        self.calls.clear()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    @property
+    def error_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls)
+
+    def latency_quantile(self, fraction: float) -> Optional[float]:
+        """Latency quantile of successful calls in the window, or None with no samples."""
+        latencies = sorted(latency for latency, ok in self.calls if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+class LLMRouter:
+    """Sends each call to the fastest healthy backend and hedges slow ones."""
+
+    def __init__(
+        self,
+        backends: List[LLMBackend],
+        window: int,
+        min_samples: int,
+        max_error_rate: float,
+        cooldown: float,
+        hedge_enabled: bool,
+        hedge_quantile: float,
+        hedge_min_delay: float,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.hedge_enabled = hedge_enabled
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.limiter = limiter
+        self.reset(backends)
+
+    def reset(self, backends: List[LLMBackend]) -> None:
+        """Replace the backends and forget their statistics."""
+        self.backends = backends
+        self.stats: Dict[str, BackendStats] = {b.name: BackendStats(self.window) for b in backends}
+        for backend in backends:
+            LLM_BACKEND_HEALTHY.labels(backend.name).set(1)
+
+    def ranked(self) -> List[LLMBackend]:
+        """
+        Backends in the order to try them: healthy ones by median latency
+        (unmeasured first, in configured order), then those in cooldown.
+        """
+        def key(item: Tuple[int, LLMBackend]):
+            position, backend = item
+            stats = self.stats[backend.name]
+            samples = sum(1 for _, ok in stats.calls if ok)
+            median = stats.latency_quantile(0.5) if samples >= self.min_samples else None
+            return (
+                not stats.healthy,
+                stats.down_until if not stats.healthy else 0.0,
+                median is not None,
+                median or 0.0,
+                position
+            )
+
+        return [backend for _, backend in sorted(enumerate(self.backends), key=key)]
+
+    def hedge_delay(self, backend: LLMBackend) -> Optional[float]:
+        """Seconds to wait before hedging a call to ``backend``; None if it has too few samples."""
+        stats = self.stats[backend.name]
+        if sum(1 for _, ok in stats.calls if ok) < self.min_samples:
+            return None
+        return max(self.hedge_min_delay, stats.latency_quantile(self.hedge_quantile))
+
+    async def run(self, attempt: Attempt) -> Tuple[Optional[str], Optional[Any], str]:
+        """
+        Run ``attempt`` on backends until one returns a result.
+
+        Returns ``(backend name, result, text)``. If every backend answered
+        without a usable result this is ``(None, None, last text)``; if every
+        backend failed, the last error is raised.
+        """
+        candidates = self.ranked()
+        if not candidates:
+            raise NoBackendAvailable("no LLM backend configured")
+
+        pending: Dict[asyncio.Task, Tuple[LLMBackend, bool]] = {}
+        hedged = False
+        last_error: Optional[Exception] = None
+        last_text: Optional[str] = None
+
+        def launch(hedge: bool) -> LLMBackend:
+            backend = candidates.pop(0)
+            task = asyncio.create_task(self._timed(backend, attempt))
+            pending[task] = (backend, hedge)
+            if hedge and self.limiter is not None:
+                task.add_done_callback(self._hedge_slot_releaser(time.monotonic()))
+            return backend
+
+        primary = launch(hedge=False)
+        try:
+            while pending:
+                delay = None
+                if self.hedge_enabled and not hedged and candidates:
+                    delay = self.hedge_delay(primary)
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if self.limiter is not None and not self.limiter.try_acquire():
+                        LLM_HEDGES_SKIPPED.inc()
+                        continue
+                    launch(hedge=True)
+                    continue
+
+                for task in done:
+                    backend, is_hedge = pending.pop(task)
+                    try:
+                        result, text = task.result()
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"LLM backend {backend.name} failed: {e}")
+                        continue
+                    if result is not None:
+                        if hedged:
+                            LLM_HEDGES.labels("hedge" if is_hedge else "primary").inc()
+                        return backend.name, result, text
+                    last_text = text
+                if not pending and candidates:
+                    primary = launch(hedge=False)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_text is None and last_error is not None:
+            raise last_error
+        return None, None, last_text or ""
+
+    def _hedge_slot_releaser(self, started: float) -> Callable[[asyncio.Task], None]:
+        """Done callback returning a hedge's limiter slot; cancelled hedges don't adapt the limit."""
+        def release(task: asyncio.Task) -> None:
+            if task.cancelled():
+                outcome = OUTCOME_ERROR
+            elif task.exception() is not None:
+                outcome = OUTCOME_OVERLOAD if overload_kind(task.exception()) else OUTCOME_ERROR
+            else:
+                outcome = OUTCOME_OK
+            self.limiter.release(time.monotonic() - started, outcome)
+        return release
+
+    async def _timed(self, backend: LLMBackend, attempt: Attempt) -> Tuple[Optional[Any], str]:
+        """Run one attempt and record its latency and outcome for ``backend``."""
+        stats = self.stats[backend.name]
+        started = time.monotonic()
+        ok = False
+        outcome = "error"
+        try:
+            result, text = await attempt(backend)
+            ok = result is not None
+            outcome = "ok" if ok else "invalid"
+            LLM_BACKEND_DURATION.labels(backend.name).observe(time.monotonic() - started)
+            return result, text
+        except asyncio.CancelledError:
+            ok = True
+            outcome = "cancelled"
+            raise
+        finally:
+            was_healthy = stats.healthy
+            stats.record(time.monotonic() - started, ok, self.min_samples, self.max_error_rate, self.cooldown)
+            LLM_BACKEND_CALLS.labels(backend.name, outcome).inc()
+            if was_healthy and not stats.healthy:
+                logger.warning(f"LLM backend {backend.name} failing, skipped for {self.cooldown:.0f}s")
+            LLM_BACKEND_HEALTHY.labels(backend.name).set(1 if stats.healthy else 0)
+
+    def snapshot(self) -> List[Dict]:
+        """Per-backend routing state, in the order calls would try them."""
+        snapshot = []
+        for backend in self.ranked():
+            stats = self.stats[backend.name]
+            p50 = stats.latency_quantile(0.5)
+            p90 = stats.latency_quantile(0.9)
+            hedge_after = self.hedge_delay(backend)
+            snapshot.append({
+                "backend": backend.name,
+                "model": backend.model,
+                "healthy": stats.healthy,
+                "calls": len(stats.calls),
+                "error_rate": round(stats.error_rate, 3),
+                "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "latency_p90_ms": round(p90 * 1000, 1) if p90 is not None else None,
+                "hedge_after_ms": round(hedge_after * 1000, 1) if hedge_after is not None else None,
+            })
+        return snapshot
+
+
+llm_router = LLMRouter(
+    configured_backends(),
+    window=settings.LLM_ROUTER_WINDOW,
+    min_samples=settings.LLM_ROUTER_MIN_SAMPLES,
+    max_error_rate=settings.LLM_ROUTER_MAX_ERROR_RATE,
+    cooldown=settings.LLM_ROUTER_COOLDOWN_SECONDS,
+    hedge_enabled=settings.LLM_HEDGE_ENABLED,
+    hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+    hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_MS / 1000,
+    limiter=llm_limiter
+)
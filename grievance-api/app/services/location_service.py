@@ -0,0 +1,94 @@
+"""
+Location extraction from grievance text.
+
+Place names (streets, sectors, neighbourhoods) are looked up in a local
+gazetteer, a JSON list of places with aliases and coordinates, through a
+single compiled case-insensitive prefix-tree pattern, so extraction costs
+one regex scan per message (a few microseconds) and needs no external
+geocoding service. The first place mentioned in the message wins.
+
+Matched places are stored on the grievance as a GeoJSON point
+(``location``) plus the canonical ``location_name``.
+"""
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent.parent / "data" / "gazetteer.json"
+
+_SEPARATOR = r"[\s\-]+"  # "Sector 5" also matches "sector-5" and "SECTOR  5"
+
+_gazetteer: Optional[Tuple[re.Pattern, Dict[str, dict], float]] = None
+
+
+def _trie_pattern(names) -> str:
+    """
+    Regex alternation of ``names`` with shared prefixes factored out.
+    
+    Python's regex engine tries alternatives one by one, so a flat
+    ``a|b|c`` over the whole gazetteer is several times slower than the
+    equivalent prefix tree. Optional groups are greedy, so the longest
+    name wins ("Lake View Road" over "Lake View").
+    """
+    trie: dict = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(_SEPARATOR if char == " " else re.escape(char), {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [unit + emit(child) for unit, child in node.items() if unit]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+def _load_gazetteer() -> Tuple[re.Pattern, Dict[str, dict], float]:
+    global _gazetteer
+    if _gazetteer is None:
+        path = Path(settings.GAZETTEER_PATH) if settings.GAZETTEER_PATH else DEFAULT_GAZETTEER
+        places = json.loads(path.read_text())["places"]
+
+        lookup = {}
+        for place in places:
+            for name in [place["name"], *place.get("aliases", [])]:
+                lookup[" ".join(name.lower().replace("-", " ").split())] = place
+
+        pattern = re.compile(r"(?<!\w)(" + _trie_pattern(lookup) + r")(?!\w)", re.IGNORECASE)
+        mean_latitude = sum(place["lat"] for place in places) / len(places) if places else 0.0
+        _gazetteer = (pattern, lookup, mean_latitude)
+        logger.info(f"Loaded gazetteer with {len(places)} places from {path}")
+    return _gazetteer
+
+
+def extract_location(message: str) -> Optional[dict]:
+    """
+    Find the first gazetteer place named in ``message``.
+
+    Returns ``{"name": ..., "type": ..., "point": GeoJSON Point}`` or None.
+    """
+    pattern, lookup, _ = _load_gazetteer()
+    match = pattern.search(message)
+    if match is None:
+        return None
+
+    place = lookup[" ".join(match.group(1).lower().replace("-", " ").split())]
+    return {
+        "name": place["name"],
+        "type": place["type"],
+        "point": {"type": "Point", "coordinates": [place["lng"], place["lat"]]},
+    }
+
+
+def reference_latitude() -> float:
+    """Mean latitude of the gazetteer's places, for sizing grid cells."""
+    return _load_gazetteer()[2]
@@ -0,0 +1,339 @@
+"""
+Email notifications to department contacts, through a transactional outbox.
+
+Submissions never talk to the mail server. When notifications are enabled,
+a new grievance is inserted with ``notification_pending: true``, so the
+notification is recorded by the same single-document write as the
+grievance: either both exist or neither does, and submission latency is
+unchanged. A background dispatcher in each worker then:
+
+1. relays flagged grievances into ``notification_outbox`` (one record per
+   grievance, keyed by its id, so relaying twice is harmless) and clears
+   the flag
+2. claims a batch of due outbox records with a lease, so several workers
+   can dispatch without sending the same record twice; records whose
+   lease expired (a worker died mid-send) are claimed again
+3. sends them over one SMTP connection, in a thread so the event loop
+   keeps serving requests
+
+Grievances with a priority in ``NOTIFICATION_IMMEDIATE_PRIORITIES`` are
+sent individually as soon as possible (a local submission wakes the
+dispatcher). Others are collected into one digest per recipient, sent
+``NOTIFICATION_DIGEST_INTERVAL_MINUTES`` after the oldest item. Failed
+sends are retried with exponential backoff up to
+``NOTIFICATION_MAX_ATTEMPTS``. The recipient is the department's
+``contact_email`` in the grievance's tenant; departments without one are
+skipped.
+"""
+import asyncio
+import logging
+import smtplib
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.core.database import get_grievances_collection, get_notification_outbox_collection
+from app.core.metrics import Counter, Gauge, Histogram
+from app.services.department_service import departments_loaded, get_department
+
+logger = logging.getLogger(__name__)
+
+IMMEDIATE = "immediate"
+DIGEST = "digest"
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+# How long a claimed batch is reserved for the worker sending it
+LEASE = timedelta(minutes=2)
+# Longest wait between retries
+MAX_RETRY_DELAY = timedelta(hours=6)
+MESSAGE_EXCERPT_CHARS = 500
+
+RELAY_FIELDS = {
+    "tenant_id": 1, "message": 1, "predicted_department": 1, "priority": 1,
+    "location_name": 1, "incident_id": 1, "created_at": 1, "urgent": 1, "danger": 1,
+}
+
+NOTIFICATIONS = Counter(
+    "notifications_total",
+    "Outbox notifications by kind and outcome (sent, retried, failed, skipped)",
+    ["kind", "outcome"]
+)
+NOTIFICATION_EMAILS = Counter(
+    "notification_emails_total",
+    "Notification emails sent (a digest is one email for several grievances)",
+    ["kind"]
+)
+NOTIFICATION_LAG = Histogram(
+    "notification_delivery_lag_seconds",
+    "Time from grievance submission until its notification was sent",
+    ["kind"],
+    buckets=(1, 5, 15, 60, 300, 900, 1800, 3600, 2 * 3600, 6 * 3600, 24 * 3600)
+)
+NOTIFICATION_SEND_DURATION = Histogram(
+    "notification_smtp_batch_seconds",
+    "Time to send one batch of notification emails over SMTP"
+)
+
+
+class NotificationDispatcher:
+    """Relays, claims and sends outbox notifications; one per worker."""
+
+    def __init__(self):
+        self._wake = asyncio.Event()
+        self.due = 0  # due records at the last cycle
+        self.oldest_due_seconds = 0.0
+
+    def is_immediate(self, priority: str) -> bool:
+        return priority in {p.strip() for p in settings.NOTIFICATION_IMMEDIATE_PRIORITIES.split(",")}
+
+    def wake(self) -> None:
+        """Start the next cycle now instead of at the next poll."""
+        self._wake.set()
+
+    # Relay
+
+    def _outbox_record(self, grievance: dict, now: datetime) -> Optional[dict]:
+        department = get_department(grievance["predicted_department"], grievance["tenant_id"])
+        recipient = (department or {}).get("contact_email")
+        kind = IMMEDIATE if grievance.get("urgent") or self.is_immediate(grievance["priority"]) else DIGEST
+        if not recipient:
+            NOTIFICATIONS.labels(kind, "skipped").inc()
+            return None
+        available_at = now
+        if kind == DIGEST:
+            available_at = grievance["created_at"] + timedelta(minutes=settings.NOTIFICATION_DIGEST_INTERVAL_MINUTES)
+        return {
+            "_id": grievance["_id"],
+            "tenant_id": grievance["tenant_id"],
+            "kind": kind,
+            "recipient": recipient,
+            "department": grievance["predicted_department"],
+            "department_name": department.get("name", grievance["predicted_department"]),
+            "priority": grievance["priority"],
+            "message": grievance["message"][:MESSAGE_EXCERPT_CHARS],
+            "location_name": grievance.get("location_name"),
+            "incident_id": grievance.get("incident_id"),
+            "danger": grievance.get("danger"),
+            "submitted_at": grievance["created_at"],
+            "status": PENDING,
+            "attempts": 0,
+            "available_at": available_at,
+            "created_at": now,
+        }
+
+    async def relay(self) -> int:
+        """Copy flagged grievances into the outbox and clear their flag. Returns the number relayed."""
+        if not departments_loaded():
+            return 0  # recipients are unknown until the department cache is loaded
+        grievances = get_grievances_collection()
+        batch = await grievances.find({"notification_pending": True}, RELAY_FIELDS).limit(
+            settings.NOTIFICATION_BATCH_SIZE
+        ).to_list(length=settings.NOTIFICATION_BATCH_SIZE)
+        if not batch:
+            return 0
+
+        now = datetime.utcnow()
+        operations = []
+        for grievance in batch:
+            record = self._outbox_record(grievance, now)
+            if record is not None:
+                operations.append(UpdateOne({"_id": record["_id"]}, {"$setOnInsert": record}, upsert=True))
+        if operations:
+            await get_notification_outbox_collection().bulk_write(operations, ordered=False)
+        await grievances.update_many(
+            {"_id": {"$in": [g["_id"] for g in batch]}},
+            {"$unset": {"notification_pending": ""}}
+        )
+        return len(batch)
+
+    # Claim and send
+
+    async def claim(self, now: datetime) -> List[dict]:
+        """
+        Lease a batch of due records to this worker.
+
+        A due digest item claims every pending digest item of its recipient,
+        so they go out as one email.
+        """
+        outbox = get_notification_outbox_collection()
+        claimable = {"$or": [
+            {"status": PENDING, "available_at": {"$lte": now}},
+            {"status": SENDING, "lease_until": {"$lte": now}},
+        ]}
+        candidates = await outbox.find(claimable, {"kind": 1, "tenant_id": 1, "recipient": 1}).sort(
+            "available_at", 1
+        ).limit(settings.NOTIFICATION_BATCH_SIZE).to_list(length=settings.NOTIFICATION_BATCH_SIZE)
+        if not candidates:
+            return []
+
+        claim = uuid.uuid4().hex
+        lease = {"$set": {"status": SENDING, "claim": claim, "lease_until": now + LEASE}}
+        await outbox.update_many({"_id": {"$in": [c["_id"] for c in candidates]}, **claimable}, lease)
+        for tenant_id, recipient in {(c["tenant_id"], c["recipient"]) for c in candidates if c["kind"] == DIGEST}:
+            await outbox.update_many(
+                {"tenant_id": tenant_id, "recipient": recipient, "kind": DIGEST, "status": PENDING},
+                lease
+            )
+        return await outbox.find({"claim": claim}).to_list(length=None)
+
+    def _messages(self, records: List[dict]) -> List[Tuple[EmailMessage, List[dict]]]:
+        """Emails for claimed records: one per immediate record, one per digest recipient."""
+        messages = []
+        digests: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+        for record in records:
+            if record["kind"] == DIGEST:
+                digests[(record["tenant_id"], record["recipient"])].append(record)
+                continue
+            where = f" at {record['location_name']}" if record.get("location_name") else ""
+            body = (
+                f"A {record['priority']} priority grievance was submitted to {record['department_name']}{where}.\n\n"
+                f"{record['message']}\n\n"
+                f"Grievance: {record['_id']}\n"
+                f"Submitted: {record['submitted_at']:%Y-%m-%d %H:%M} UTC\n"
+            )
+            if record.get("incident_id"):
+                body += f"Incident: {record['incident_id']}\n"
+            subject = f"[{record['priority'].upper()}] {record['department_name']}: new grievance{where}"
+            if record.get("danger"):
+                subject = f"[URGENT: {record['danger']}] {record['department_name']}: possible emergency{where}"
+            messages.append((_email(record["recipient"], subject, body), [record]))
+
+        for (_, recipient), items in digests.items():
+            items.sort(key=lambda r: r["submitted_at"])
+            lines = [
+                f"- [{r['priority']}] {r['department_name']}"
+                f"{' at ' + r['location_name'] if r.get('location_name') else ''}: "
+                f"{r['message'][:200]} ({r['_id']}, {r['submitted_at']:%Y-%m-%d %H:%M} UTC)"
+                for r in items
+            ]
+            subject = f"{len(items)} new grievance{'s' if len(items) != 1 else ''} for your department"
+            messages.append((_email(recipient, subject, "\n".join(lines) + "\n"), items))
+        return messages
+
+    @staticmethod
+    def _send_all(messages: List[EmailMessage]) -> List[Optional[str]]:
+        """Send over one SMTP connection (blocking). Returns an error per message, or None if sent."""
+        try:
+            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT) as smtp:
+                if settings.SMTP_STARTTLS:
+                    smtp.starttls()
+                if settings.SMTP_USERNAME:
+                    smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+                errors = []
+                for message in messages:
+                    try:
+                        smtp.send_message(message)
+                        errors.append(None)
+                    except smtplib.SMTPException as e:
+                        errors.append(str(e))
+                return errors
+        except (OSError, smtplib.SMTPException) as e:
+            # Connection-level failure: nothing after it was sent
+            return [str(e)] * len(messages)
+
+    def _outcome(self, record: dict, error: Optional[str], now: datetime) -> UpdateOne:
+        query = {"_id": record["_id"], "claim": record["claim"]}
+        unset = {"claim": "", "lease_until": ""}
+        retention = timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        if error is None:
+            NOTIFICATIONS.labels(record["kind"], "sent").inc()
+            NOTIFICATION_LAG.labels(record["kind"]).observe((now - record["submitted_at"]).total_seconds())
+            return UpdateOne(query, {
+                "$set": {"status": SENT, "sent_at": now, "expires_at": now + retention},
+                "$unset": unset
+            })
+
+        attempts = record["attempts"] + 1
+        if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            NOTIFICATIONS.labels(record["kind"], "failed").inc()
+            logger.error(f"Giving up on notification {record['_id']} to {record['recipient']}: {error}")
+            return UpdateOne(query, {
+                "$set": {"status": FAILED, "attempts": attempts, "last_error": error, "expires_at": now + retention},
+                "$unset": unset
+            })
+
+        NOTIFICATIONS.labels(record["kind"], "retried").inc()
+        delay = min(MAX_RETRY_DELAY, timedelta(seconds=settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+        return UpdateOne(query, {
+            "$set": {"status": PENDING, "attempts": attempts, "last_error": error, "available_at": now + delay},
+            "$unset": unset
+        })
+
+    async def send(self, records: List[dict]) -> None:
+        """Send claimed records and record each outcome."""
+        messages = self._messages(records)
+        started = asyncio.get_running_loop().time()
+        errors = await asyncio.to_thread(self._send_all, [message for message, _ in messages])
+        NOTIFICATION_SEND_DURATION.observe(asyncio.get_running_loop().time() - started)
+
+        now = datetime.utcnow()
+        operations = []
+        for (message, items), error in zip(messages, errors):
+            if error is None:
+                NOTIFICATION_EMAILS.labels(items[0]["kind"]).inc()
+            else:
+                logger.warning(f"Sending notification to {message['To']} failed: {error}")
+            operations.extend(self._outcome(record, error, now) for record in items)
+        await get_notification_outbox_collection().bulk_write(operations, ordered=False)
+
+    async def update_backlog(self, now: datetime) -> None:
+        outbox = get_notification_outbox_collection()
+        due = {"status": PENDING, "available_at": {"$lte": now}}
+        self.due = await outbox.count_documents(due)
+        oldest = await outbox.find(due, {"available_at": 1}).sort("available_at", 1).limit(1).to_list(length=1)
+        self.oldest_due_seconds = (now - oldest[0]["available_at"]).total_seconds() if oldest else 0.0
+
+    async def dispatch_once(self) -> bool:
+        """One cycle. Returns True if there may be more work right away."""
+        relayed = await self.relay()
+        now = datetime.utcnow()
+        records = await self.claim(now)
+        if records:
+            await self.send(records)
+        await self.update_backlog(now)
+        return relayed >= settings.NOTIFICATION_BATCH_SIZE or len(records) >= settings.NOTIFICATION_BATCH_SIZE
+
+    async def run(self, interval: float) -> None:
+        """Background task: dispatch every ``interval`` seconds (or when woken) until cancelled."""
+        while True:
+            try:
+                while await self.dispatch_once():
+                    pass
+            except Exception as e:
+                # Claimed records are retried by any worker once their lease expires
+                logger.warning(f"Notification dispatch failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+def _email(recipient: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.SMTP_FROM
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+notifications = NotificationDispatcher()
+
+NOTIFICATION_OUTBOX_DUE = Gauge(
+    "notification_outbox_due",
+    "Outbox notifications due but not yet sent, as of this worker's last dispatcher cycle",
+    function=lambda: notifications.due
+)
+NOTIFICATION_OUTBOX_OLDEST_DUE = Gauge(
+    "notification_outbox_oldest_due_seconds",
+    "How long the oldest due notification has been waiting, as of this worker's last dispatcher cycle",
+    function=lambda: notifications.oldest_due_seconds
+)
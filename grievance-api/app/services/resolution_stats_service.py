@@ -0,0 +1,123 @@
+"""
+Time-to-resolution percentiles from per-day DDSketches.
+
+When a grievance first reaches ``resolved`` or ``rejected``, its time
+since submission is added to a sketch document for its (status,
+department, priority, UTC day of closure) with atomic ``$inc`` updates of
+the sketch's bins (sketches are per tenant). Percentile queries merge the sketches for the
+requested days, so the cost depends on the number of days and bins, not
+on the number of grievances. Estimates are within ``relative_accuracy``
+(1%) of the exact percentile; ``tests/test_sketch.py`` verifies this on
+generated data.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from pymongo import UpdateOne
+from app.core.database import get_resolution_sketches_collection
+from app.core.sketch import DDSketch, DEFAULT_RELATIVE_ACCURACY
+
+CLOSED_STATUSES = ("resolved", "rejected")
+
+_bins = DDSketch(DEFAULT_RELATIVE_ACCURACY)
+
+
+def day_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def sketch_id(tenant_id: str, status: str, department: str, priority: str, day: datetime) -> str:
+    return f"{tenant_id}:{status}:{department}:{priority}:{day:%Y-%m-%d}"
+
+
+def sketch_update(
+    tenant_id: str,
+    status: str,
+    department: str,
+    priority: str,
+    closed_at: datetime,
+    seconds: float,
+    count: int = 1
+) -> UpdateOne:
+    """Upsert adding one duration to the sketch for its bucket."""
+    day = day_start(closed_at)
+    key = _bins.key(seconds)
+    increments = {"count": count, "sum": seconds * count}
+    increments["zero_count" if key is None else f"bins.{key}"] = count
+    return UpdateOne(
+        {"_id": sketch_id(tenant_id, status, department, priority, day)},
+        {
+            "$inc": increments,
+            "$setOnInsert": {
+                "tenant_id": tenant_id,
+                "status": status,
+                "department": department,
+                "priority": priority,
+                "day": day,
+                "relative_accuracy": DEFAULT_RELATIVE_ACCURACY
+            }
+        },
+        upsert=True
+    )
+
+
+def sketch_document(tenant_id: str, status: str, department: str, priority: str, day: datetime, sketch: DDSketch) -> dict:
+    """Stored form of a whole sketch, as built incrementally by ``sketch_update``."""
+    return {
+        "_id": sketch_id(tenant_id, status, department, priority, day),
+        "tenant_id": tenant_id,
+        "status": status,
+        "department": department,
+        "priority": priority,
+        "day": day,
+        "relative_accuracy": sketch.relative_accuracy,
+        "count": sketch.count,
+        "sum": sketch.sum,
+        "zero_count": sketch.zero_count,
+        "bins": {str(key): count for key, count in sketch.bins.items()}
+    }
+
+
+async def record_closures(events: Iterable[dict]) -> None:
+    """
+    Add first closures among status ``events`` to their sketches.
+
+    Pass only events whose status update was applied: samples can't be
+    taken back out of a sketch.
+    """
+    operations = [
+        sketch_update(
+            e["tenant_id"], e["to_status"], e["department"], e.get("priority") or "medium", e["at"], e["seconds_since_created"]
+        )
+        for e in events
+        if e["first"] and e["to_status"] in CLOSED_STATUSES
+    ]
+    if operations:
+        await get_resolution_sketches_collection().bulk_write(operations, ordered=False)
+
+
+async def resolution_sketch(
+    tenant_id: str,
+    status: str,
+    department_filter: Optional[object],
+    priority: Optional[str],
+    start: datetime,
+    end: datetime
+) -> DDSketch:
+    """Merged sketch of closures on UTC days from ``start`` up to and including ``end``."""
+    query = {"tenant_id": tenant_id, "status": status, "day": {"$gte": day_start(start), "$lt": day_start(end) + timedelta(days=1)}}
+    if department_filter is not None:
+        query["department"] = department_filter
+    if priority:
+        query["priority"] = priority
+
+    merged = DDSketch(DEFAULT_RELATIVE_ACCURACY)
+    cursor = get_resolution_sketches_collection(analytics=True).find(
+        query, {"bins": 1, "zero_count": 1, "sum": 1}
+    )
+    async for doc in cursor:
+        merged.merge_bins(
+            {int(key): count for key, count in doc.get("bins", {}).items()},
+            doc.get("zero_count", 0),
+            doc.get("sum", 0.0)
+        )
+    return merged
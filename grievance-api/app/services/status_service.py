@@ -0,0 +1,189 @@
+"""
+Grievance status transitions with an append-only event log.
+
+Every status change goes through this module, which in the same operation
+path:
+
+- updates the grievance's ``status`` and maintains its time-in-state
+  fields incrementally: ``time_in_state.<status>`` (seconds spent in each
+  status so far), ``status_changed_at`` (entry into the current status)
+  and ``status_reached_at.<status>`` (first entry into each status)
+- appends a ``grievance_events`` document recording the transition, the
+  actor, the time spent in the previous status and the time since
+  submission
+
+Events carry the department and a ``first`` flag (first time the
+grievance reached that status), so questions like "median time to
+in_progress for roads last month" are an index range scan over
+``(tenant_id, department, to_status, first, at)`` instead of
+reconstructing history.
+
+First arrivals in ``resolved``/``rejected`` also update the time-to-resolution
+sketches (see ``resolution_stats_service``).
+
+The grievance update is conditional on its previous status, so concurrent
+changes can't both record a transition from the same state.
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.core.database import get_grievances_collection, get_grievance_events_collection
+from app.services.resolution_stats_service import record_closures
+
+logger = logging.getLogger(__name__)
+
+# Fields read from grievances to compute a transition
+TRANSITION_FIELDS = {
+    "tenant_id": 1, "status": 1, "predicted_department": 1, "priority": 1, "incident_id": 1,
+    "created_at": 1, "updated_at": 1, "status_changed_at": 1, "status_reached_at": 1,
+}
+
+
+class StatusConflict(Exception):
+    """The grievance's status changed concurrently."""
+
+
+def _transition(grievance: dict, new_status: str, actor: str, now: datetime) -> Tuple[dict, dict, dict]:
+    """Conditional filter, update and event for moving ``grievance`` to ``new_status``."""
+    old_status = grievance["status"]
+    # Grievances created before the event log have no status_changed_at; updated_at is the last change
+    entered = grievance.get("status_changed_at") or grievance.get("updated_at") or grievance["created_at"]
+    seconds_in_previous = max(0.0, (now - entered).total_seconds())
+    first = new_status not in (grievance.get("status_reached_at") or {})
+
+    update = {
+        "$set": {"status": new_status, "updated_at": now, "status_changed_at": now},
+        "$inc": {f"time_in_state.{old_status}": seconds_in_previous},
+    }
+    if first:
+        update["$set"][f"status_reached_at.{new_status}"] = now
+
+    query = {"_id": grievance["_id"], "status": old_status}
+    if "tenant_id" in grievance:
+        query["tenant_id"] = grievance["tenant_id"]  # shard key: targets a single shard
+
+    event = {
+        "tenant_id": grievance.get("tenant_id", settings.DEFAULT_TENANT),
+        "grievance_id": grievance["_id"],
+        "department": grievance["predicted_department"],
+        "priority": grievance.get("priority"),
+        "from_status": old_status,
+        "to_status": new_status,
+        "first": first,
+        "at": now,
+        "actor": actor,
+        "seconds_in_previous": seconds_in_previous,
+        "seconds_since_created": max(0.0, (now - grievance["created_at"]).total_seconds()),
+    }
+    if grievance.get("incident_id"):
+        event["incident_id"] = grievance["incident_id"]
+
+    return query, update, event
+
+
+async def change_status(grievance: dict, new_status: str, actor: str) -> dict:
+    """
+    Move one grievance to ``new_status`` and record the event.
+
+    Returns the updated grievance; unchanged if it already had that status.
+    Raises StatusConflict if its status changed since it was read.
+    """
+    if grievance["status"] == new_status:
+        return grievance
+
+    now = datetime.utcnow()
+    query, update, event = _transition(grievance, new_status, actor, now)
+    result = await get_grievances_collection().update_one(query, update)
+    if result.modified_count == 0:
+        raise StatusConflict()
+
+    await get_grievance_events_collection().insert_one(event)
+    await record_closures([event])
+    return await get_grievances_collection().find_one({"tenant_id": event["tenant_id"], "_id": grievance["_id"]})
+
+
+async def record_inherited_status(grievance: dict, from_status: str, actor: str = "incident") -> None:
+    """
+    Record the event for a new grievance that took its incident's status on
+    submission; ``grievance`` is the stored document, already in that status.
+    """
+    now = grievance["created_at"]
+    reached = {k: v for k, v in (grievance.get("status_reached_at") or {}).items() if k != grievance["status"]}
+    _, _, event = _transition(
+        {**grievance, "status": from_status, "status_changed_at": now, "status_reached_at": reached},
+        grievance["status"], actor, now
+    )
+    await get_grievance_events_collection().insert_one(event)
+    await record_closures([event])
+
+
+async def change_status_many(query: dict, new_status: str, actor: str) -> int:
+    """
+    Move every grievance matching ``query`` to ``new_status`` with one bulk write,
+    recording an event for each. Returns the number changed.
+
+    Grievances whose status changed between the read and the write are
+    skipped, and get no event or closure sample.
+    """
+    grievances_col = get_grievances_collection()
+    members = await grievances_col.find(
+        {**query, "status": {"$ne": new_status}}, TRANSITION_FIELDS
+    ).to_list(length=None)
+    if not members:
+        return 0
+
+    # MongoDB stores milliseconds; truncate so the timestamp can be matched when re-reading
+    now = datetime.utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    operations: List[UpdateOne] = []
+    events: List[dict] = []
+    for grievance in members:
+        filter_, update, event = _transition(grievance, new_status, actor, now)
+        operations.append(UpdateOne(filter_, update))
+        events.append(event)
+
+    result = await grievances_col.bulk_write(operations, ordered=False)
+    if result.modified_count < len(operations):
+        logger.warning(
+            f"{len(operations) - result.modified_count} grievances changed status concurrently during a bulk update"
+        )
+        # Only the updates that applied carry this change's timestamp
+        applied = await grievances_col.find(
+            {
+                **query,
+                "_id": {"$in": [grievance["_id"] for grievance in members]},
+                "status": new_status,
+                "status_changed_at": now,
+            },
+            {"_id": 1}
+        ).to_list(length=None)
+        applied_ids = {grievance["_id"] for grievance in applied}
+        events = [event for event in events if event["grievance_id"] in applied_ids]
+
+    if events:
+        await get_grievance_events_collection().insert_many(events, ordered=False)
+        await record_closures(events)
+    return result.modified_count
+
+
+async def transition_durations(
+    tenant_id: str,
+    to_status: str,
+    department_filter: Optional[object],
+    start: datetime,
+    end: datetime
+) -> List[float]:
+    """
+    Seconds from submission until grievances first reached ``to_status``,
+    for transitions between ``start`` and ``end``, sorted ascending.
+    """
+    query = {"tenant_id": tenant_id, "to_status": to_status, "first": True, "at": {"$gte": start, "$lt": end}}
+    if department_filter is not None:
+        query["department"] = department_filter
+
+    cursor = get_grievance_events_collection(analytics=True).find(
+        query, {"_id": 0, "seconds_since_created": 1}
+    )
+    return sorted([event["seconds_since_created"] async for event in cursor])
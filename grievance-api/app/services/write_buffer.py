@@ -0,0 +1,111 @@
+"""
+Group-commit buffer for grievance inserts.
+
+During submission spikes, inserts that arrive within ``max_delay`` of each
+other are coalesced into one ``insert_many`` instead of one round trip
+each. A batch is written when it reaches ``max_batch`` documents, when the
+oldest document has waited ``max_delay``, or on shutdown.
+
+Callers are only acknowledged after their batch has been written with the
+collection's write concern, so durability is the same as ``insert_one``;
+the cost is up to ``max_delay`` of added latency per submission. A
+document that fails in an unordered batch fails only its own caller.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, WriteError
+from app.core.config import settings
+from app.core.database import get_grievances_collection
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+GROUP_COMMIT_BATCH_SIZE = Histogram(
+    "group_commit_batch_size",
+    "Documents written per group-commit batch",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+GROUP_COMMIT_WAIT = Histogram(
+    "group_commit_wait_seconds",
+    "Time from enqueueing a document to its batch being acknowledged",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+class GroupCommitBuffer:
+    """Coalesces concurrent ``insert`` calls into batched ``insert_many`` writes."""
+
+    def __init__(self, get_collection: Callable, max_batch: int, max_delay: float):
+        self.get_collection = get_collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[dict, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+
+    async def insert(self, doc: dict) -> ObjectId:
+        """Queue ``doc`` for the next batch and return its id once the batch is written."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((doc, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+
+        return await future
+
+    async def _flush_after_delay(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future, float]]) -> None:
+        errors = {}
+        try:
+            await self.get_collection().insert_many([doc for doc, _, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = WriteError(
+                    write_error.get("errmsg", "Insert failed"), write_error.get("code"), write_error
+                )
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} documents failed: {e}")
+            errors = {index: e for index in range(len(batch))}
+
+        acknowledged = time.perf_counter()
+        GROUP_COMMIT_BATCH_SIZE.observe(len(batch))
+        for index, (doc, future, enqueued) in enumerate(batch):
+            GROUP_COMMIT_WAIT.observe(acknowledged - enqueued)
+            if future.done():
+                continue  # caller went away; the document was still written
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(doc["_id"])
+
+    async def close(self) -> None:
+        """Write any buffered documents and wait for in-flight batches."""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+
+grievance_writes = GroupCommitBuffer(
+    get_grievances_collection,
+    max_batch=settings.GRIEVANCE_WRITE_BUFFER_MAX_BATCH,
+    max_delay=settings.GRIEVANCE_WRITE_BUFFER_MAX_DELAY_MS / 1000
+)
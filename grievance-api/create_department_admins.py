@@ -9,6 +9,7 @@ from passlib.context import CryptContext
 # MongoDB connection
 MONGODB_URL = "mongodb://localhost:27017"
 DATABASE_NAME = "grievance_db"
+TENANT_ID = "default"  # municipality the accounts belong to
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -67,14 +68,14 @@ async def create_department_admins():
             email = admin_data["email"]
             
             # Check if admin already exists
-            existing = await users_col.find_one({"email": email})
+            existing = await users_col.find_one({"tenant_id": TENANT_ID, "email": email})
             
             hashed_password = pwd_context.hash(admin_data["password"])
             
             if existing:
                 # Update existing admin
                 await users_col.update_one(
-                    {"email": email},
+                    {"tenant_id": TENANT_ID, "email": email},
                     {
                         "$set": {
                             "hashed_password": hashed_password,
@@ -87,6 +88,7 @@ async def create_department_admins():
             else:
                 # Create new admin
                 user_doc = {
+                    "tenant_id": TENANT_ID,
                     "email": email,
                     "hashed_password": hashed_password,
                     "role": admin_data["role"],
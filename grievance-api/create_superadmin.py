@@ -9,6 +9,7 @@ from passlib.context import CryptContext
 # MongoDB connection
 MONGODB_URL = "mongodb://localhost:27017"
 DATABASE_NAME = "grievance_db"
+TENANT_ID = "default"  # municipality the accounts belong to
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -26,14 +27,14 @@ async def create_superadmin():
     
     try:
         # Check if superadmin exists
-        existing = await users_col.find_one({"email": SUPERADMIN_EMAIL})
+        existing = await users_col.find_one({"tenant_id": TENANT_ID, "email": SUPERADMIN_EMAIL})
         
         hashed_password = pwd_context.hash(SUPERADMIN_PASSWORD)
         
         if existing:
             # Update existing superadmin
             await users_col.update_one(
-                {"email": SUPERADMIN_EMAIL},
+                {"tenant_id": TENANT_ID, "email": SUPERADMIN_EMAIL},
                 {
                     "$set": {
                         "hashed_password": hashed_password,
@@ -46,6 +47,7 @@ async def create_superadmin():
         else:
             # Create new superadmin
             user_doc = {
+                "tenant_id": TENANT_ID,
                 "email": SUPERADMIN_EMAIL,
                 "hashed_password": hashed_password,
                 "role": "superadmin",
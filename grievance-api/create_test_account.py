@@ -8,6 +8,7 @@ from passlib.context import CryptContext
 # MongoDB connection
 MONGODB_URL = "mongodb://localhost:27017"
 DATABASE_NAME = "grievance_db"
+TENANT_ID = "default"  # municipality the accounts belong to
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -31,14 +32,14 @@ async def create_test_account():
         email = TEST_ACCOUNT["email"]
         
         # Check if account exists
-        existing = await users_col.find_one({"email": email})
+        existing = await users_col.find_one({"tenant_id": TENANT_ID, "email": email})
         
         hashed_password = pwd_context.hash(TEST_ACCOUNT["password"])
         
         if existing:
             # Update existing account
             await users_col.update_one(
-                {"email": email},
+                {"tenant_id": TENANT_ID, "email": email},
                 {
                     "$set": {
                         "hashed_password": hashed_password,
@@ -51,6 +52,7 @@ async def create_test_account():
         else:
             # Create new account
             user_doc = {
+                "tenant_id": TENANT_ID,
                 "email": email,
                 "hashed_password": hashed_password,
                 "role": TEST_ACCOUNT["role"],
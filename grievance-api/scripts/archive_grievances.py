@@ -0,0 +1,79 @@
+"""
+Archive long-closed grievances out of the live collection.
+
+Moves resolved/rejected grievances not updated for ``--older-than-days``
+(default ARCHIVE_AFTER_DAYS) into ``grievances_archive`` and reports the
+document, data and index size reclaimed from ``grievances``. Safe to run
+repeatedly, e.g. nightly from cron.
+
+WiredTiger reuses freed space for new writes but does not return it to the
+filesystem; pass ``--compact`` to also run ``compact`` on the live
+collection (blocks that collection on older MongoDB versions).
+
+Usage:
+    python -m scripts.archive_grievances --dry-run
+    python -m scripts.archive_grievances --older-than-days 180 --batch-size 2000
+"""
+import argparse
+import asyncio
+from datetime import timedelta
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, ensure_indexes, get_database, get_grievances_collection
+from app.services.archive_service import archivable_query, archive_closed_grievances, collection_stats
+
+
+def _mb(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f}MB"
+
+
+def print_stats(label: str, stats: dict) -> None:
+    print(
+        f"{label}: {stats['count']} documents, data {_mb(stats['size'])}, "
+        f"storage {_mb(stats['storage_size'])}, indexes {_mb(stats['total_index_size'])}"
+    )
+
+
+async def run(args):
+    await connect_to_mongo()
+    try:
+        older_than = timedelta(days=args.older_than_days)
+        if args.dry_run:
+            count = await get_grievances_collection().count_documents(archivable_query(older_than))
+            print(f"Would archive {count} grievances closed more than {args.older_than_days} days ago")
+            return
+
+        await ensure_indexes()
+        before = await collection_stats("grievances")
+        print_stats("grievances before", before)
+
+        moved = await archive_closed_grievances(older_than, args.batch_size)
+        print(f"✓ Archived {moved} grievances")
+
+        if args.compact:
+            await get_database().command("compact", "grievances")
+            print("✓ Compacted grievances")
+
+        after = await collection_stats("grievances")
+        print_stats("grievances after", after)
+        print_stats("grievances_archive", await collection_stats("grievances_archive"))
+        print(
+            f"Reclaimed from the live collection: {before['count'] - after['count']} documents, "
+            f"data {_mb(before['size'] - after['size'])}, "
+            f"indexes {_mb(before['total_index_size'] - after['total_index_size'])}, "
+            f"storage {_mb(before['storage_size'] - after['storage_size'])}"
+        )
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed grievances")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only count archivable grievances")
+    parser.add_argument("--compact", action="store_true", help="run compact on grievances afterwards")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
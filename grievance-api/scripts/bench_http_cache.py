@@ -0,0 +1,106 @@
+"""
+Bandwidth and latency of grievance reads with compression and ETags.
+
+For the admin listing at several page sizes and for a citizen's
+``my-grievances``, measures against a running API:
+
+- ``identity``: full response, no compression
+- ``gzip`` / ``br``: full response, compressed (``br`` only if the server
+  has the optional brotli package)
+- ``304``: revalidation with ``If-None-Match`` when nothing changed
+
+and reports bytes on the wire and median/p90 latency for each.
+
+Needs grievances in the database (e.g. ``python -m scripts.generate_dataset``)
+and the server's JWT_SECRET, as tokens are minted locally.
+
+Usage:
+    python -m scripts.bench_http_cache
+    python -m scripts.bench_http_cache --base-url http://localhost:8000 --sizes 100,1000,5000 --repeat 20
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+import httpx
+from app.core.security import create_access_token
+from scripts.loadtest import DEPARTMENTS, percentile
+
+MODES = ("identity", "gzip", "br", "304")
+
+
+def measure(client: httpx.Client, url: str, token: str, repeat: int) -> Dict[str, Dict]:
+    """Per mode: wire bytes, latency percentiles and the encoding the server used."""
+    headers = {"Authorization": f"Bearer {token}"}
+    first = client.get(url, headers={**headers, "Accept-Encoding": "identity"})
+    first.raise_for_status()
+    etag = first.headers.get("etag")
+
+    results = {}
+    for mode in MODES:
+        if mode == "304":
+            if not etag:
+                continue
+            request_headers = {**headers, "Accept-Encoding": "gzip", "If-None-Match": etag}
+        else:
+            request_headers = {**headers, "Accept-Encoding": mode}
+
+        latencies: List[float] = []
+        wire_bytes = 0
+        status_code = None
+        encoding = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with client.stream("GET", url, headers=request_headers) as response:
+                response.read()
+                wire_bytes = response.num_bytes_downloaded
+            latencies.append(time.perf_counter() - started)
+            status_code = response.status_code
+            encoding = response.headers.get("content-encoding", "identity")
+
+        if mode in ("gzip", "br") and encoding != mode:
+            continue  # server doesn't support it (or response below the threshold)
+        latencies.sort()
+        results[mode] = {
+            "status": status_code,
+            "bytes": wire_bytes,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p90_ms": percentile(latencies, 0.9) * 1000,
+        }
+    return results
+
+
+def print_results(label: str, results: Dict[str, Dict]) -> None:
+    baseline = results["identity"]["bytes"] or 1
+    print(f"\n{label}")
+    print(f"  {'mode':<10} {'status':>6} {'bytes':>10} {'saved':>7} {'p50 ms':>8} {'p90 ms':>8}")
+    for mode, r in results.items():
+        saved = 1 - r["bytes"] / baseline
+        print(f"  {mode:<10} {r['status']:>6} {r['bytes']:>10} {saved:>7.1%} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure compression and conditional GET savings")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--sizes", default="100,1000,5000", help="Admin listing page sizes")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    superadmin = create_access_token({"sub": "bench-http-cache", "role": "superadmin", "department_ids": DEPARTMENTS})
+    with httpx.Client(base_url=args.base_url, timeout=60) as client:
+        for size in (int(s) for s in args.sizes.split(",")):
+            results = measure(client, f"/api/admin/grievances?limit={size}", superadmin, args.repeat)
+            print_results(f"Admin listing, limit={size}", results)
+
+        sample = client.get("/api/admin/grievances?limit=1", headers={"Authorization": f"Bearer {superadmin}"}).json()
+        if sample:
+            citizen = create_access_token({"sub": sample[0]["user_id"], "role": "citizen", "department_ids": []})
+            results = measure(client, "/api/grievances/my-grievances?limit=100", citizen, args.repeat)
+            print_results("Citizen my-grievances, limit=100", results)
+
+            results = measure(client, f"/api/grievances/{sample[0]['id']}", citizen, args.repeat)
+            print_results("Single grievance", results)
+
+
+if __name__ == "__main__":
+    main()
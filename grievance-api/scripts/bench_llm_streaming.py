@@ -0,0 +1,118 @@
+"""
+Time-to-classification and completion tokens with and without streaming.
+
+Runs ``classify_grievance`` in-process against the stub LLM server in
+three modes:
+
+- ``invoke``: whole completion, no output cap (the old behaviour)
+- ``invoke+cap``: whole completion, capped at ``GROQ_MAX_TOKENS``
+- ``stream``: streamed and closed as soon as the JSON object is complete
+
+and reports p50/p90 classification latency, how many calls the LLM tier
+answered, and completion tokens the stub generated (from its ``/stats``),
+including what it produced before noticing a closed stream.
+
+Start the stub as a model that keeps talking after the object, e.g.:
+    python -m scripts.stub_llm --port 9000 --latency-ms 200 --jitter-ms 0 --ramble-chars 600 --token-ms 5
+
+Usage:
+    python -m scripts.bench_llm_streaming
+    python -m scripts.bench_llm_streaming --stub-url http://localhost:9000 --calls 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+import httpx
+from app.core.config import settings
+from scripts.loadtest import percentile, random_message
+
+MODES = ("invoke", "invoke+cap", "stream")
+
+
+def configure(mode: str, max_tokens: int) -> None:
+    """Point the classifier at the mode's settings and rebuild its backend."""
+    from app.services.llm_backends import configured_backends
+    from app.services.llm_router import llm_router
+
+    settings.GROQ_STREAMING = mode == "stream"
+    # The stub ignores a missing cap; 4096 stands in for "uncapped" with real providers
+    settings.GROQ_MAX_TOKENS = 4096 if mode == "invoke" else max_tokens
+    settings.LLM_BACKENDS = "groq"
+    llm_router.reset(configured_backends())
+
+
+async def run_mode(mode: str, args, messages: List[str]) -> Dict:
+    from app.services.classification_service import classify_grievance
+
+    configure(mode, args.max_tokens)
+    stats_url = f"{args.stub_url}/stats"
+    async with httpx.AsyncClient() as client:
+        before = (await client.get(stats_url)).json()
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: List[float] = []
+        llm_answers = 0
+
+        async def one(message: str) -> None:
+            nonlocal llm_answers
+            async with semaphore:
+                started = time.perf_counter()
+                classification = await classify_grievance(message)
+                latencies.append(time.perf_counter() - started)
+                if not classification.explanation.startswith("fallback"):
+                    llm_answers += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(message) for message in messages))
+        elapsed = time.perf_counter() - started
+
+        # Give the stub time to notice closed streams before reading its counters
+        await asyncio.sleep(1.0)
+        after = (await client.get(stats_url)).json()
+
+    latencies.sort()
+    calls = len(messages)
+    return {
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "throughput": calls / elapsed,
+        "llm_share": llm_answers / calls,
+        "tokens_per_call": (after["tokens_generated"] - before["tokens_generated"]) / calls,
+        "cancelled": after["streams_cancelled"] - before["streams_cancelled"],
+    }
+
+
+async def bench(args) -> Dict[str, Dict]:
+    rng = random.Random(args.seed)
+    messages = [random_message(rng) for _ in range(args.calls)]
+    return {mode: await run_mode(mode, args, messages) for mode in MODES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure streamed classification with early termination")
+    parser.add_argument("--stub-url", default="http://localhost:9000")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="keep within LLM_CONCURRENCY_* so calls aren't queued")
+    parser.add_argument("--max-tokens", type=int, default=settings.GROQ_MAX_TOKENS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    settings.GROQ_API_KEY = settings.GROQ_API_KEY or "stub"
+    settings.GROQ_BASE_URL = args.stub_url
+    results = asyncio.run(bench(args))
+
+    baseline = results["invoke"]
+    print(f"\n{args.calls} classifications, concurrency {args.concurrency}, GROQ_MAX_TOKENS={args.max_tokens}")
+    print(f"  {'mode':<11} {'p50 ms':>8} {'p90 ms':>8} {'calls/s':>8} {'llm':>6} {'tokens/call':>12} {'saved':>7} {'closed early':>13}")
+    for mode, r in results.items():
+        saved = 1 - r["tokens_per_call"] / (baseline["tokens_per_call"] or 1)
+        print(
+            f"  {mode:<11} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['throughput']:>8.1f} {r['llm_share']:>6.0%} "
+            f"{r['tokens_per_call']:>12.1f} {saved:>7.1%} {r['cancelled']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Worker scaling benchmark.
+
+Starts the API via ``python -m app.server`` with 1, 2, ... N workers and,
+for each, runs several load generator processes (``scripts.loadtest``) in
+parallel so the client side is not the bottleneck. Reports aggregate
+throughput, p99 latency and scaling efficiency relative to one worker.
+
+Submission rate limiting is disabled for the server under test. Point the
+server at the stub LLM (see ``scripts.stub_llm``) to include classification.
+
+Usage:
+    python -m scripts.bench_workers --workers 1,2,4 --clients 4 --duration 20
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://localhost:9000 python -m scripts.bench_workers
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def wait_for_health(base_url: str, timeout: float = 30.0) -> None:
+    """Block until the API answers /health."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API at {base_url} did not become healthy within {timeout}s")
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WORKERS=str(workers), PORT=str(port), RATE_LIMIT_ENABLED="false", LOG_LEVEL="WARNING")
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.server"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def run_clients(args, base_url: str) -> List[Dict]:
+    """Run ``args.clients`` load generators concurrently and collect their reports."""
+    with tempfile.TemporaryDirectory() as tmp:
+        processes = []
+        for i in range(args.clients):
+            output = Path(tmp) / f"client{i}.json"
+            command = [
+                sys.executable, "-m", "scripts.loadtest",
+                "--base-url", base_url,
+                "--duration", str(args.duration),
+                "--concurrency", str(args.concurrency),
+                "--citizens", str(args.citizens),
+                "--admins", str(args.admins),
+                "--seed", str(args.seed + i),
+                "--output", str(output),
+            ]
+            if args.mix:
+                command += ["--mix", args.mix]
+            processes.append((subprocess.Popen(command, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL), output))
+
+        reports = []
+        for process, output in processes:
+            if process.wait() != 0:
+                raise RuntimeError(f"Load generator exited with {process.returncode}")
+            reports.append(json.loads(output.read_text()))
+        return reports
+
+
+def aggregate(reports: List[Dict]) -> Dict:
+    totals = [report["routes"]["total"] for report in reports]
+    count = sum(t["count"] for t in totals)
+    return {
+        "throughput_rps": sum(t["throughput_rps"] for t in totals),
+        # Worst client p99 is a conservative stand-in for the merged p99
+        "p99_ms": max(t["p99_ms"] for t in totals),
+        "error_rate": sum(t["errors"] for t in totals) / count if count else 0.0,
+    }
+
+
+def bench(args, workers: int) -> Dict:
+    server = start_server(workers, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_health(base_url)
+        result = aggregate(run_clients(args, base_url))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    result["workers"] = workers
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput as worker count grows")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes per run")
+    parser.add_argument("--concurrency", type=int, default=25, help="virtual users per load generator")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per run")
+    parser.add_argument("--citizens", type=int, default=20)
+    parser.add_argument("--admins", type=int, default=9)
+    parser.add_argument("--mix", help="operation mix passed to scripts.loadtest")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        print(f"Benchmarking {workers} worker(s)...")
+        results.append(bench(args, workers))
+
+    baseline = results[0]["throughput_rps"] / results[0]["workers"]
+    print(f"\n{'workers':>8} {'rps':>10} {'p99 ms':>10} {'errors':>8} {'efficiency':>11}")
+    for result in results:
+        result["efficiency"] = result["throughput_rps"] / (baseline * result["workers"]) if baseline else 0.0
+        print(
+            f"{result['workers']:>8} {result['throughput_rps']:>10.1f} {result['p99_ms']:>10.1f} "
+            f"{result['error_rate']:>8.2%} {result['efficiency']:>11.0%}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
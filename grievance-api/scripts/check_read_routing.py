@@ -0,0 +1,112 @@
+"""
+Verify read/write splitting against a local three-node replica set.
+
+Starts three ``mongod`` processes (requires ``mongod`` on PATH), initiates a
+replica set and runs ``tests/test_read_routing.py`` against it, which checks
+which member served each request:
+- citizen submission and reads-after-write must hit the primary
+- admin listings must be served by a secondary, urgent listings by the primary
+
+Usage:
+    python -m scripts.check_read_routing
+    python -m scripts.check_read_routing --base-port 27100
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+REPLICA_SET_NAME = "rs0"
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@contextmanager
+def local_replica_set(base_port: int = 27018, members: int = 3):
+    """
+    Run a throwaway replica set on consecutive ports and yield its URI.
+
+    Data directories are temporary and removed on exit.
+    """
+    data_root = tempfile.mkdtemp(prefix="grievance-rs-")
+    ports = [base_port + i for i in range(members)]
+    processes = []
+    try:
+        for port in ports:
+            dbpath = f"{data_root}/{port}"
+            os.makedirs(dbpath)
+            processes.append(subprocess.Popen(
+                [
+                    "mongod", "--replSet", REPLICA_SET_NAME, "--port", str(port),
+                    "--dbpath", dbpath, "--bind_ip", "127.0.0.1", "--quiet"
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            ))
+
+        seed = MongoClient(f"mongodb://127.0.0.1:{ports[0]}", directConnection=True)
+        _wait_for(lambda: seed.admin.command("ping"), "mongod to accept connections")
+        seed.admin.command("replSetInitiate", {
+            "_id": REPLICA_SET_NAME,
+            "members": [
+                # Only the first member may become primary, so routing checks are deterministic
+                {"_id": i, "host": f"127.0.0.1:{port}", "priority": 1 if i == 0 else 0}
+                for i, port in enumerate(ports)
+            ]
+        })
+
+        def all_members_ready():
+            states = [m["stateStr"] for m in seed.admin.command("replSetGetStatus")["members"]]
+            if states.count("PRIMARY") != 1 or states.count("SECONDARY") != members - 1:
+                raise RuntimeError(f"members not ready: {states}")
+
+        _wait_for(all_members_ready, "replica set members to become ready")
+        seed.close()
+
+        hosts = ",".join(f"127.0.0.1:{port}" for port in ports)
+        yield f"mongodb://{hosts}/?replicaSet={REPLICA_SET_NAME}"
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        shutil.rmtree(data_root, ignore_errors=True)
+
+
+def _wait_for(check, description: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return check()
+        except (PyMongoError, RuntimeError) as e:
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Timed out waiting for {description}: {e}")
+            time.sleep(0.5)
+
+
+def main():
+    base_port = 27018
+    if "--base-port" in sys.argv:
+        base_port = int(sys.argv[sys.argv.index("--base-port") + 1])
+
+    if not shutil.which("mongod"):
+        print("✗ mongod not found on PATH")
+        sys.exit(2)
+
+    with local_replica_set(base_port) as uri:
+        print(f"✓ Replica set ready: {uri}")
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "tests/test_read_routing.py"],
+            cwd=PROJECT_ROOT, env=dict(os.environ, READ_ROUTING_MONGO_URI=uri)
+        )
+
+    sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
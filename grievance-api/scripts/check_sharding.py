@@ -0,0 +1,270 @@
+"""
+Verify the tenant data layout against a local sharded cluster.
+
+Starts a config server, ``--shards`` single-member shards and a ``mongos``
+(requires ``mongod`` and ``mongos`` on PATH), shards the collections with
+``SHARD_KEYS`` and pins each test tenant to one shard with a zone on its
+``tenant_id`` range. Then runs the API in-process against ``mongos`` and
+checks that:
+
+- each tenant's documents are stored only on its shard
+- tenant-scoped queries (listings, lookups by id, logins, event scans)
+  are routed to a single shard, while a query without ``tenant_id``
+  goes to every shard
+- tenants can't read each other's grievances through the API
+- a submission burst from one tenant is throttled by its own bucket and
+  doesn't stop another tenant's submissions
+
+Usage:
+    python -m scripts.check_sharding
+    python -m scripts.check_sharding --base-port 27200 --shards 3
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List
+from bson import MaxKey, MinKey, ObjectId
+from pymongo import MongoClient
+from scripts.check_read_routing import _wait_for
+
+DB_NAME = "grievance_sharding_check"
+TENANTS = ("alpha", "beta", "gamma", "delta")
+
+
+@contextmanager
+def local_sharded_cluster(base_port: int = 27200, shards: int = 2):
+    """
+    Run a throwaway sharded cluster on consecutive ports and yield
+    ``(mongos_uri, {shard name: direct URI})``.
+
+    The config server and each shard are one-member replica sets. Data
+    directories are temporary and removed on exit.
+    """
+    data_root = tempfile.mkdtemp(prefix="grievance-sharded-")
+    processes = []
+
+    def start(args: List[str]) -> None:
+        processes.append(subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+    def start_replica_set(name: str, port: int, role: str) -> str:
+        dbpath = f"{data_root}/{name}"
+        os.makedirs(dbpath)
+        start([
+            "mongod", role, "--replSet", name, "--port", str(port),
+            "--dbpath", dbpath, "--bind_ip", "127.0.0.1", "--quiet"
+        ])
+        uri = f"mongodb://127.0.0.1:{port}/?directConnection=true"
+        member = MongoClient(uri)
+        _wait_for(lambda: member.admin.command("ping"), f"{name} to accept connections")
+        member.admin.command("replSetInitiate", {
+            "_id": name,
+            "configsvr": role == "--configsvr",
+            "members": [{"_id": 0, "host": f"127.0.0.1:{port}"}]
+        })
+
+        def primary_ready():
+            if not member.admin.command("hello").get("isWritablePrimary"):
+                raise RuntimeError("not primary yet")
+
+        _wait_for(primary_ready, f"{name} to elect a primary")
+        member.close()
+        return uri
+
+    try:
+        start_replica_set("config", base_port, "--configsvr")
+        shard_uris: Dict[str, str] = {}
+        for i in range(shards):
+            shard_uris[f"shard{i}"] = start_replica_set(f"shard{i}", base_port + 1 + i, "--shardsvr")
+
+        mongos_port = base_port + 1 + shards
+        start([
+            "mongos", "--configdb", f"config/127.0.0.1:{base_port}",
+            "--port", str(mongos_port), "--bind_ip", "127.0.0.1", "--quiet"
+        ])
+        mongos_uri = f"mongodb://127.0.0.1:{mongos_port}"
+        router = MongoClient(mongos_uri)
+        _wait_for(lambda: router.admin.command("ping"), "mongos to accept connections")
+        for i, name in enumerate(shard_uris):
+            router.admin.command("addShard", f"{name}/127.0.0.1:{base_port + 1 + i}", name=name)
+        router.close()
+
+        yield mongos_uri, shard_uris
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        shutil.rmtree(data_root, ignore_errors=True)
+
+
+def tenant_shards(shard_names: List[str]) -> Dict[str, str]:
+    """Shard each test tenant is pinned to (round robin)."""
+    return {tenant: shard_names[i % len(shard_names)] for i, tenant in enumerate(TENANTS)}
+
+
+def shard_collections(router: MongoClient, placement: Dict[str, str]) -> None:
+    """
+    Shard every collection in ``SHARD_KEYS``, with one zone per shard
+    holding its tenants' ``tenant_id`` ranges.
+
+    Zones are defined before sharding, so the empty collections are split
+    and placed immediately instead of waiting for the balancer.
+    """
+    from app.core.database import SHARD_KEYS
+
+    admin = router.admin
+    admin.command("enableSharding", DB_NAME)
+    for shard in set(placement.values()):
+        admin.command("addShardToZone", shard, zone=f"zone-{shard}")
+
+    for name, key in SHARD_KEYS.items():
+        namespace = f"{DB_NAME}.{name}"
+        suffix = [field for field in key if field != "tenant_id"]
+        for tenant, shard in placement.items():
+            admin.command(
+                "updateZoneKeyRange", namespace,
+                min={"tenant_id": tenant, **{field: MinKey() for field in suffix}},
+                max={"tenant_id": tenant, **{field: MaxKey() for field in suffix}},
+                zone=f"zone-{shard}"
+            )
+        options = {"presplitHashedZones": True} if "hashed" in key.values() else {}
+        admin.command("shardCollection", namespace, key=key, **options)
+        print(f"✓ Sharded {name} on {key}")
+
+
+def shards_targeted(router: MongoClient, collection: str, query: dict) -> List[str]:
+    """Shards ``mongos`` would send a find with ``query`` to."""
+    explain = router[DB_NAME].command("explain", {"find": collection, "filter": query}, verbosity="queryPlanner")
+    return sorted(shard["shardName"] for shard in explain["queryPlanner"]["winningPlan"].get("shards", []))
+
+
+def run_checks(mongos_uri: str, shard_uris: Dict[str, str]) -> bool:
+    """Drive the API through ``mongos`` and verify data placement, query routing and isolation."""
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+
+    settings.MONGO_URI = mongos_uri
+    settings.MONGO_DB = DB_NAME
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_BACKEND = "memory"
+    settings.RATE_LIMIT_USER_CAPACITY = 1000
+    settings.RATE_LIMIT_TENANT_CAPACITY = 10
+    settings.RATE_LIMIT_TENANT_REFILL_PER_SECOND = 0.001
+    settings.RATE_LIMIT_GLOBAL_CAPACITY = 1000
+
+    from app.main import app
+    from app.core.codec import GrievanceCollection
+    from app.core.security import create_access_token
+
+    router = MongoClient(mongos_uri)
+    placement = tenant_shards(sorted(shard_uris))
+    shard_collections(router, placement)
+    router[DB_NAME]["tenants"].insert_many([{"_id": tenant, "name": tenant.title()} for tenant in TENANTS])
+
+    ok = True
+
+    def check(description: str, passed: bool, detail: str = "") -> None:
+        nonlocal ok
+        ok = ok and passed
+        print(f"{'✓' if passed else '✗'} {description}{': ' + detail if detail else ''}")
+
+    grievance_ids: Dict[str, str] = {}
+    citizens: Dict[str, dict] = {}
+    with TestClient(app) as client:
+        for tenant in TENANTS:
+            response = client.post("/api/auth/register", json={
+                "email": "citizen@example.com", "password": "check-sharding", "tenant_id": tenant
+            })
+            check(f"register citizen in {tenant} (same email in every tenant)", response.status_code == 201, str(response.status_code))
+            citizens[tenant] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            for i in range(5):
+                response = client.post(
+                    "/api/grievances", json={"message": f"Water pipe burst near the market, report {i}"},
+                    headers=citizens[tenant]
+                )
+                grievance_ids[tenant] = response.json()["id"]
+            superadmin = {"Authorization": "Bearer " + create_access_token(
+                {"sub": f"check-{tenant}", "role": "superadmin", "department_ids": [], "tenant_id": tenant}
+            )}
+            response = client.patch(
+                f"/api/admin/grievances/{grievance_ids[tenant]}/status", json={"status": "resolved"}, headers=superadmin
+            )
+            check(f"resolve a grievance in {tenant}", response.status_code == 200, str(response.status_code))
+
+        # Isolation through the API
+        other = TENANTS[1]
+        response = client.get(f"/api/grievances/{grievance_ids[TENANTS[0]]}", headers=citizens[other])
+        check(f"{other} can't read a {TENANTS[0]} grievance", response.status_code == 404, str(response.status_code))
+        superadmin = {"Authorization": "Bearer " + create_access_token(
+            {"sub": f"check-{other}", "role": "superadmin", "department_ids": [], "tenant_id": other}
+        )}
+        listed = client.get("/api/admin/grievances?limit=1000", headers=superadmin).json()
+        check(f"{other} superadmin lists only its own grievances", len(listed) == 5, f"{len(listed)} listed")
+
+        # Throughput isolation: exhaust one tenant's bucket, then submit from another
+        statuses = [
+            client.post("/api/grievances", json={"message": "Garbage not collected"}, headers=citizens[TENANTS[0]]).status_code
+            for _ in range(10)
+        ]
+        check(f"{TENANTS[0]} burst is throttled by its tenant bucket", 429 in statuses, f"{statuses.count(429)} of 10 rejected")
+        response = client.post("/api/grievances", json={"message": "Street light not working"}, headers=citizens[TENANTS[2]])
+        check(f"{TENANTS[2]} still accepted during the {TENANTS[0]} burst", response.status_code == 201, str(response.status_code))
+
+    # Data placement: each tenant's documents only on its shard
+    for name, uri in sorted(shard_uris.items()):
+        shard_db = MongoClient(uri)[DB_NAME]
+        for collection in ("grievances", "grievance_events", "users"):
+            stored = set(shard_db[collection].distinct("tenant_id"))
+            expected = {tenant for tenant, shard in placement.items() if shard == name}
+            check(f"{name}.{collection} holds only its tenants", stored <= expected, ", ".join(sorted(stored)) or "-")
+
+    # Query routing
+    db = router[DB_NAME]
+    grievances = GrievanceCollection(db["grievances"], settings.GRIEVANCE_STORAGE_FORMAT)
+    tenant = TENANTS[0]
+    expected = [placement[tenant]]
+    user_id = db["users"].find_one({"tenant_id": tenant})["_id"]
+    queries = [
+        ("grievances", "admin listing", grievances.query({"tenant_id": tenant, "predicted_department": "water"})),
+        ("grievances", "grievance by id", grievances.query({"tenant_id": tenant, "_id": ObjectId(grievance_ids[tenant])})),
+        ("grievances", "citizen's grievances", grievances.query({"tenant_id": tenant, "user_id": str(user_id)})),
+        ("grievance_events", "transition times", {"tenant_id": tenant, "to_status": "resolved", "first": True}),
+        ("users", "login", {"tenant_id": tenant, "email": "citizen@example.com"}),
+        ("incidents", "incident listing", {"tenant_id": tenant, "status": "submitted"}),
+    ]
+    for collection, description, query in queries:
+        targeted = shards_targeted(router, collection, query)
+        check(f"{description} ({collection}) targets one shard", targeted == expected, ", ".join(targeted))
+    targeted = shards_targeted(router, "grievances", grievances.query({"predicted_department": "water"}))
+    print(f"  for comparison, a query without tenant_id goes to: {', '.join(targeted)}")
+
+    router.drop_database(DB_NAME)
+    return ok
+
+
+def main():
+    base_port = 27200
+    shards = 2
+    if "--base-port" in sys.argv:
+        base_port = int(sys.argv[sys.argv.index("--base-port") + 1])
+    if "--shards" in sys.argv:
+        shards = int(sys.argv[sys.argv.index("--shards") + 1])
+
+    for binary in ("mongod", "mongos"):
+        if not shutil.which(binary):
+            print(f"✗ {binary} not found on PATH")
+            sys.exit(2)
+
+    with local_sharded_cluster(base_port, shards) as (mongos_uri, shard_uris):
+        print(f"✓ Sharded cluster ready: {mongos_uri} ({len(shard_uris)} shards)")
+        ok = run_checks(mongos_uri, shard_uris)
+
+    print("✓ Sharding layout verified" if ok else "✗ Sharding check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
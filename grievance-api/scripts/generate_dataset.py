@@ -0,0 +1,372 @@
+"""
+Synthetic dataset generator for scale testing.
+
+Generates users and grievances with realistic distributions:
+- departments weighted by how often each receives complaints
+- priority conditioned on department
+- timestamps spanning several years, with volume growing over time and
+  a daytime bias
+- status depending on age (old grievances are mostly closed)
+- varied message text built from per-department templates, with locations
+  extracted from it as on submission
+
+Documents are written with batched ``insert_many(ordered=False)`` /
+``bulk_write`` calls, several batches in flight at once, and user passwords
+are hashed in a process pool. Output is reproducible for a given seed.
+
+Usage:
+    python -m scripts.generate_dataset --grievances 1000000 --citizens 5000 --admins 50
+    python -m scripts.generate_dataset --db grievance_scale --years 5 --seed 7 --drop
+    python -m scripts.generate_dataset --grievances 100000 --bcrypt-rounds 4
+    python -m scripts.generate_dataset --grievances 200000 --tenant riverside
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from passlib.context import CryptContext
+from pymongo import UpdateOne
+from app.core.codec import GrievanceCollection
+from app.core.config import settings
+from app.services.location_service import extract_location
+from scripts.seed_departments import tenant_departments
+
+GENERATED_PASSWORD = "Generated123!"
+
+DEPARTMENT_WEIGHTS = {
+    "water": 0.18,
+    "sanitation": 0.20,
+    "roads": 0.17,
+    "electricity": 0.14,
+    "health": 0.06,
+    "police": 0.07,
+    "housing": 0.07,
+    "general": 0.07,
+    "miscellaneous": 0.04,
+}
+
+# (high, medium, low) priority weights per department
+PRIORITY_WEIGHTS = {
+    "water": (0.25, 0.55, 0.20),
+    "sanitation": (0.10, 0.60, 0.30),
+    "roads": (0.15, 0.45, 0.40),
+    "electricity": (0.25, 0.55, 0.20),
+    "health": (0.45, 0.40, 0.15),
+    "police": (0.55, 0.35, 0.10),
+    "housing": (0.05, 0.35, 0.60),
+    "general": (0.05, 0.40, 0.55),
+    "miscellaneous": (0.03, 0.27, 0.70),
+}
+
+MESSAGE_TEMPLATES = {
+    "water": [
+        "Water main burst on {street}, {impact}",
+        "No water supply in {area} since {since}",
+        "Pipe leaking near {landmark} on {street}, water wasted {frequency}",
+        "Dirty brown water coming from taps in {area}",
+        "Low water pressure in {area} {frequency}",
+    ],
+    "sanitation": [
+        "Garbage not collected in {area} since {since}, {impact}",
+        "Sewage overflowing onto {street} near {landmark}",
+        "Blocked drain on {street} causing waterlogging",
+        "Overflowing dustbins near {landmark} in {area}",
+        "Public toilet near {landmark} not cleaned {frequency}",
+    ],
+    "roads": [
+        "Large pothole on {street} near {landmark}, {impact}",
+        "Road surface broken on {street} since {since}",
+        "Footpath cracked and unsafe near {landmark} in {area}",
+        "Speed breaker missing paint on {street}, {impact}",
+        "Road digging left unfinished on {street} since {since}",
+    ],
+    "electricity": [
+        "Streetlights off on {street} {frequency}",
+        "Power outage in {area} since {since}",
+        "Sparking transformer near {landmark}, {impact}",
+        "Hanging electric wires on {street} near {landmark}",
+        "Frequent voltage fluctuation in {area}",
+    ],
+    "health": [
+        "Ambulance did not arrive for an emergency in {area}",
+        "Clinic near {landmark} closed during working hours {frequency}",
+        "Mosquito breeding in stagnant water on {street}, {impact}",
+        "Stray dog bites reported near {landmark} in {area}",
+        "Hospital in {area} has no doctors available {frequency}",
+    ],
+    "police": [
+        "Robbery near {landmark} in {area}, need police patrol",
+        "Chain snatching incidents on {street} {frequency}",
+        "Drunk people harassing residents near {landmark}",
+        "Illegal parking blocking {street} {frequency}",
+        "Loud music late at night in {area} {frequency}",
+    ],
+    "housing": [
+        "Illegal construction without permit on {street}",
+        "Building near {landmark} has dangerous cracks, {impact}",
+        "Encroachment on public land in {area}",
+        "Apartment complex in {area} dumping debris on {street}",
+        "Abandoned house near {landmark} used for illegal activity",
+    ],
+    "general": [
+        "Park near {landmark} not maintained since {since}",
+        "Request for new bus stop on {street}",
+        "Public bench broken near {landmark} in {area}",
+        "Community hall in {area} locked {frequency}",
+        "Tree branches blocking signboard on {street}",
+    ],
+    "miscellaneous": [
+        "Stray cattle roaming on {street} {frequency}",
+        "Noise from factory in {area} {frequency}",
+        "Posters pasted all over walls near {landmark}",
+        "Need information about property tax office timings in {area}",
+        "Birds nesting in the signal box on {street}",
+    ],
+}
+
+STREETS = [
+    "Main St", "Elm Road", "Station Road", "MG Road", "Church Lane", "Lake View Road",
+    "Market Street", "Park Avenue", "Ring Road", "Temple Street", "Canal Road", "Hill Road",
+]
+AREAS = [f"Sector {i}" for i in range(1, 41)] + [
+    "Old Town", "Green Park", "Riverside", "North Ward", "South Ward", "Industrial Area", "University Colony",
+]
+LANDMARKS = [
+    "the bus stand", "the railway station", "the primary school", "the community hall",
+    "the central market", "the temple", "the hospital gate", "the water tank", "the post office",
+]
+IMPACTS = [
+    "residents are suffering", "children cannot go to school", "accidents happening daily",
+    "elderly people affected", "shops have closed", "causing health risk", "traffic jams every morning",
+]
+SINCES = ["yesterday", "three days", "last week", "two weeks", "a month"]
+FREQUENCIES = ["every night", "for the past week", "daily", "since Monday", "every weekend"]
+
+EXPLANATIONS = {
+    "high": "urgent public safety or major service outage",
+    "medium": "service disruption affecting residents",
+    "low": "minor or single-household issue",
+}
+
+
+def _hash_password(args) -> str:
+    password, rounds = args
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds).hash(password)
+
+
+def hash_passwords(count: int, rounds: int, workers: int) -> List[str]:
+    """Hash ``count`` passwords in parallel; each gets its own salt."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_password, [(GENERATED_PASSWORD, rounds)] * count, chunksize=16))
+
+
+class GrievanceGenerator:
+    """Produces grievance documents from a seeded random source."""
+
+    def __init__(self, rng: random.Random, citizen_ids: List[str], years: float, now: datetime):
+        self.rng = rng
+        self.citizen_ids = citizen_ids
+        self.now = now
+        self.span_seconds = years * 365 * 24 * 3600
+        self.departments = list(DEPARTMENT_WEIGHTS)
+        self.department_weights = [DEPARTMENT_WEIGHTS[d] for d in self.departments]
+
+    def _created_at(self) -> datetime:
+        # Volume grows over time: sample age from a density skewed towards recent dates
+        age = self.span_seconds * (1 - math.sqrt(self.rng.random()))
+        created = self.now - timedelta(seconds=age)
+        # Daytime bias: move half of the night-time submissions into working hours
+        if not 7 <= created.hour <= 21 and self.rng.random() < 0.5:
+            created = min(self.now, created.replace(hour=self.rng.randint(8, 20)))
+        return created
+
+    def _status(self, age_days: float) -> str:
+        roll = self.rng.random()
+        if age_days > 60:
+            return "resolved" if roll < 0.85 else ("rejected" if roll < 0.97 else "in_progress")
+        if age_days > 7:
+            return "resolved" if roll < 0.55 else ("rejected" if roll < 0.62 else ("in_progress" if roll < 0.85 else "submitted"))
+        return "submitted" if roll < 0.6 else ("in_progress" if roll < 0.9 else "resolved")
+
+    def _message(self, department: str) -> str:
+        template = self.rng.choice(MESSAGE_TEMPLATES[department])
+        return template.format(
+            street=self.rng.choice(STREETS),
+            area=self.rng.choice(AREAS),
+            landmark=self.rng.choice(LANDMARKS),
+            impact=self.rng.choice(IMPACTS),
+            since=self.rng.choice(SINCES),
+            frequency=self.rng.choice(FREQUENCIES),
+        )
+
+    def document(self) -> Dict:
+        department = self.rng.choices(self.departments, self.department_weights)[0]
+        priority = self.rng.choices(("high", "medium", "low"), PRIORITY_WEIGHTS[department])[0]
+        created_at = self._created_at()
+        status = self._status((self.now - created_at).total_seconds() / 86400)
+        if status == "submitted":
+            updated_at = created_at
+        else:
+            # Resolution delay: log-normal around ~2 days, faster for high priority
+            scale = {"high": 0.3, "medium": 1.0, "low": 2.5}[priority]
+            delay_hours = min(24 * 180, self.rng.lognormvariate(math.log(48 * scale), 1.0))
+            updated_at = min(self.now, created_at + timedelta(hours=delay_hours))
+        message = self._message(department)
+        doc = {
+            "user_id": self.rng.choice(self.citizen_ids),
+            "message": message,
+            "predicted_department": department,
+            "priority": priority,
+            "confidence": round(self.rng.uniform(0.6, 0.98), 2),
+            "explanation": f"{department}: {EXPLANATIONS[priority]}",
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        location = extract_location(message)
+        if location:
+            doc["location"] = location["point"]
+            doc["location_name"] = location["name"]
+        return doc
+
+
+async def insert_batches(collection, batches, concurrency: int, on_batch) -> None:
+    """Insert document batches with up to ``concurrency`` writes in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def insert(batch):
+        try:
+            await collection.insert_many(batch, ordered=False)
+            on_batch(len(batch))
+        finally:
+            semaphore.release()
+
+    for batch in batches:
+        await semaphore.acquire()
+        task = asyncio.create_task(insert(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        # Let the event loop hand finished batches to the driver between generations
+        await asyncio.sleep(0)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def generate(args) -> None:
+    rng = random.Random(args.seed)
+    now = datetime(2026, 1, 1) if args.fixed_now else datetime.utcnow()
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[args.db]
+    started = time.monotonic()
+
+    try:
+        if args.drop:
+            await db["users"].delete_many({"tenant_id": args.tenant, "generated": True})
+            await db["grievances"].delete_many({"tenant_id": args.tenant, "generated": True})
+            print(f"✓ Removed previously generated users and grievances of tenant {args.tenant}")
+
+        await db["tenants"].update_one({"_id": args.tenant}, {"$set": {"name": args.tenant}}, upsert=True)
+        department_docs = tenant_departments(args.tenant)
+        await db["departments"].bulk_write(
+            [UpdateOne({"_id": d["_id"]}, {"$set": d}, upsert=True) for d in department_docs],
+            ordered=False
+        )
+        print(f"✓ Seeded {len(department_docs)} departments for tenant {args.tenant}")
+
+        # Users
+        user_count = args.citizens + args.admins
+        hash_started = time.monotonic()
+        hashes = hash_passwords(user_count, args.bcrypt_rounds, args.workers)
+        print(f"✓ Hashed {user_count} passwords in {time.monotonic() - hash_started:.1f}s ({args.workers} processes)")
+
+        departments = list(DEPARTMENT_WEIGHTS)
+        citizen_ids = [ObjectId() for _ in range(args.citizens)]
+        users = [
+            {
+                "_id": citizen_ids[i],
+                "tenant_id": args.tenant,
+                "email": f"citizen{i}.s{args.seed}@generated.example.com",
+                "hashed_password": hashes[i],
+                "role": "citizen",
+                "departments": [],
+                "generated": True,
+            }
+            for i in range(args.citizens)
+        ] + [
+            {
+                "tenant_id": args.tenant,
+                "email": f"admin{i}.s{args.seed}@generated.example.com",
+                "hashed_password": hashes[args.citizens + i],
+                "role": "admin",
+                "departments": rng.sample(departments, rng.randint(1, 2)),
+                "generated": True,
+            }
+            for i in range(args.admins)
+        ]
+        for i in range(0, len(users), args.batch_size):
+            await db["users"].insert_many(users[i:i + args.batch_size], ordered=False)
+        print(f"✓ Inserted {args.citizens} citizens and {args.admins} admins (password: {GENERATED_PASSWORD})")
+
+        # Grievances
+        generator = GrievanceGenerator(rng, [str(i) for i in citizen_ids], args.years, now)
+        inserted = 0
+        insert_started = time.monotonic()
+
+        def batches():
+            remaining = args.grievances
+            while remaining > 0:
+                size = min(args.batch_size, remaining)
+                batch = [generator.document() for _ in range(size)]
+                for doc in batch:
+                    doc["tenant_id"] = args.tenant
+                    doc["generated"] = True
+                remaining -= size
+                yield batch
+
+        def on_batch(size: int):
+            nonlocal inserted
+            inserted += size
+            if inserted % (args.batch_size * 10) == 0 or inserted == args.grievances:
+                rate = inserted / (time.monotonic() - insert_started)
+                print(f"  {inserted:>10,} / {args.grievances:,} grievances ({rate:,.0f} docs/s)")
+
+        # Written in the configured storage format, as the API would
+        grievances = GrievanceCollection(db["grievances"], settings.GRIEVANCE_STORAGE_FORMAT)
+        await insert_batches(grievances, batches(), args.concurrency, on_batch)
+        elapsed = time.monotonic() - insert_started
+        print(f"✓ Inserted {inserted:,} grievances in {elapsed:.1f}s ({inserted / elapsed:,.0f} docs/s)")
+    finally:
+        client.close()
+
+    print(f"✓ Dataset generated in {time.monotonic() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic grievance dataset")
+    parser.add_argument("--grievances", type=int, default=1_000_000)
+    parser.add_argument("--citizens", type=int, default=5000)
+    parser.add_argument("--admins", type=int, default=50)
+    parser.add_argument("--years", type=float, default=3.0, help="time span of created_at values")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default=settings.MONGO_DB, help="target database (default: MONGO_DB)")
+    parser.add_argument("--tenant", default=settings.DEFAULT_TENANT, help="municipality the data belongs to")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="password hashing processes")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="lower (e.g. 4) for faster generation")
+    parser.add_argument("--fixed-now", action="store_true", help="anchor timestamps at 2026-01-01 for byte-identical output")
+    parser.add_argument("--drop", action="store_true", help="remove previously generated users and grievances first")
+    args = parser.parse_args()
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
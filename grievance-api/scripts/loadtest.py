@@ -0,0 +1,458 @@
+"""
+HTTP load generator for the grievance API.
+
+Creates citizen and admin accounts, then drives a weighted mix of
+submissions, ``my-grievances`` reads, admin listings and status updates
+against a running API for a fixed duration. Reports throughput, latency
+percentiles and error rates per route, plus event loop lag on both the
+server (scraped from ``/metrics``) and the load generator itself.
+
+Reports can be saved as named baselines and later runs compared against
+them to catch regressions between versions.
+
+Typical setup (three terminals):
+    python -m scripts.stub_llm --port 9000
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://localhost:9000 RATE_LIMIT_ENABLED=false \\
+        uvicorn app.main:app --port 8000
+    python -m scripts.loadtest --duration 60 --concurrency 50 --save-baseline main
+
+Usage:
+    python -m scripts.loadtest --base-url http://localhost:8000 --duration 30
+    python -m scripts.loadtest --mix submit=0.5,my_grievances=0.3,admin_list=0.2
+    python -m scripts.loadtest --compare main --tolerance 0.2
+    python -m scripts.loadtest --mix submit=0.9,urgent_submit=0.1 --concurrency 100
+
+``urgent_submit`` posts reports of immediate danger (gas leaks, fires,
+assaults), which the API classifies ahead of other submissions; run it
+with the LLM saturated to see the fast lane's latency next to regular
+submissions.
+
+Admin accounts are created with a superadmin token minted from the local
+JWT_SECRET, so the load generator must share the server's settings (or pass
+--superadmin-email/--superadmin-password to log in instead).
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+
+BASELINE_DIR = Path(__file__).resolve().parent.parent / "loadtest_baselines"
+
+DEPARTMENTS = ["water", "sanitation", "roads", "electricity", "health", "police", "housing", "general", "miscellaneous"]
+
+DEFAULT_MIX = {
+    "submit": 0.2,
+    "my_grievances": 0.5,
+    "admin_list": 0.2,
+    "status_update": 0.1,
+    "urgent_submit": 0.0,
+}
+
+SAMPLE_MESSAGES = [
+    "Water main burst on {street}, houses are flooding",
+    "Garbage not collected in {area} for two weeks, rats everywhere",
+    "Large pothole on {street} causing accidents every evening",
+    "Street lights not working on {street} for a week",
+    "Robbery reported near {area} market, need police patrol",
+    "Ambulance did not arrive for an emergency call in {area}",
+    "Illegal construction without permit next to {street}",
+    "Sewage overflowing onto the road in {area}",
+    "Power outage in {area} since yesterday morning",
+    "Broken water tap leaking continuously at {street} park",
+]
+URGENT_MESSAGES = [
+    "Strong smell of gas in the stairwell at {street}, residents feeling dizzy",
+    "House caught fire near {area} market, flames spreading",
+    "Live wire hanging low over the footpath on {street}",
+    "Man stabbed outside the bus stop in {area}",
+    "Wall collapsed on {street} after the rain, people may be trapped under the rubble",
+    "Child missing since this morning near {area} park",
+]
+STREETS = ["Main St", "Elm Road", "Station Road", "Lake View", "Church Lane", "MG Road"]
+AREAS = ["Sector 5", "Sector 12", "Old Town", "Green Park", "Riverside", "North Ward"]
+
+
+def random_message(rng: random.Random) -> str:
+    """Realistic grievance text."""
+    return rng.choice(SAMPLE_MESSAGES).format(street=rng.choice(STREETS), area=rng.choice(AREAS))
+
+
+def random_urgent_message(rng: random.Random) -> str:
+    """Grievance text reporting an immediate danger."""
+    return rng.choice(URGENT_MESSAGES).format(street=rng.choice(STREETS), area=rng.choice(AREAS))
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse ``name=weight,name=weight`` into a weight mapping."""
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latency and status samples per route label."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, label: str, seconds: float, status_code: int) -> None:
+        self.latencies[label].append(seconds)
+        self.statuses[label][status_code] += 1
+        if status_code >= 400:
+            self.errors[label] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict]:
+        routes = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[label] = _route_stats(values, self.errors[label], self.statuses[label], elapsed)
+        all_values = sorted(v for values in self.latencies.values() for v in values)
+        all_statuses = defaultdict(int)
+        for statuses in self.statuses.values():
+            for code, count in statuses.items():
+                all_statuses[code] += count
+        routes["total"] = _route_stats(all_values, sum(self.errors.values()), all_statuses, elapsed)
+        return routes
+
+
+def _route_stats(values: List[float], errors: int, statuses: Dict[int, int], elapsed: float) -> Dict:
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "throughput_rps": count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p90_ms": percentile(values, 0.90) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+class LoadTest:
+    """One load test run against a base URL."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.recorder = Recorder()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.citizen_tokens: List[str] = []
+        self.admins: List[Dict] = []  # {"token": ..., "grievance_ids": [...]}
+        self.client_lag: List[float] = []
+        self.unflagged_urgent = 0  # urgent submissions the API didn't mark urgent
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status_code = response.status_code
+        except httpx.HTTPError:
+            response = None
+            status_code = 599
+        self.recorder.record(label, time.perf_counter() - started, status_code)
+        return response
+
+    # Setup
+
+    async def superadmin_token(self, client: httpx.AsyncClient) -> str:
+        if self.args.superadmin_email:
+            response = await client.post("/api/auth/login", json={
+                "email": self.args.superadmin_email,
+                "password": self.args.superadmin_password,
+                "role": "superadmin",
+            })
+            response.raise_for_status()
+            return response.json()["access_token"]
+
+        from app.core.security import create_access_token
+        return create_access_token({"sub": f"loadtest-{self.run_id}", "role": "superadmin", "department_ids": DEPARTMENTS})
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        password = "LoadTest123!"
+        semaphore = asyncio.Semaphore(20)
+
+        async def register_citizen(i: int):
+            async with semaphore:
+                response = await client.post("/api/auth/register", json={
+                    "email": f"loadtest-{self.run_id}-citizen{i}@example.com",
+                    "password": password,
+                    "role": "citizen",
+                })
+                response.raise_for_status()
+                self.citizen_tokens.append(response.json()["access_token"])
+
+        async def create_admin(i: int, superadmin: str):
+            department = DEPARTMENTS[i % len(DEPARTMENTS)]
+            email = f"loadtest-{self.run_id}-admin{i}@example.com"
+            async with semaphore:
+                response = await client.post(
+                    "/api/auth/register",
+                    json={"email": email, "password": password, "role": "admin", "departments": [department]},
+                    headers={"Authorization": f"Bearer {superadmin}"},
+                )
+                response.raise_for_status()
+                response = await client.post("/api/auth/login", json={
+                    "email": email, "password": password, "role": "admin", "department": department,
+                })
+                response.raise_for_status()
+                self.admins.append({"token": response.json()["access_token"], "grievance_ids": []})
+
+        superadmin = await self.superadmin_token(client)
+        await asyncio.gather(*(register_citizen(i) for i in range(self.args.citizens)))
+        await asyncio.gather(*(create_admin(i, superadmin) for i in range(self.args.admins)))
+
+    # Operations
+
+    async def submit(self, client: httpx.AsyncClient) -> None:
+        token = self.rng.choice(self.citizen_tokens)
+        await self.request(
+            client, "POST /api/grievances", "POST", "/api/grievances",
+            json={"message": random_message(self.rng)},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    async def urgent_submit(self, client: httpx.AsyncClient) -> None:
+        token = self.rng.choice(self.citizen_tokens)
+        response = await self.request(
+            client, "POST /api/grievances (urgent)", "POST", "/api/grievances",
+            json={"message": random_urgent_message(self.rng)},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        if response is not None and response.status_code == 201 and not response.json().get("urgent"):
+            self.unflagged_urgent += 1
+
+    async def my_grievances(self, client: httpx.AsyncClient) -> None:
+        token = self.rng.choice(self.citizen_tokens)
+        await self.request(
+            client, "GET /api/grievances/my-grievances", "GET", "/api/grievances/my-grievances",
+            params={"limit": 10},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    async def admin_list(self, client: httpx.AsyncClient) -> None:
+        admin = self.rng.choice(self.admins)
+        response = await self.request(
+            client, "GET /api/admin/grievances", "GET", "/api/admin/grievances",
+            params={"limit": self.args.admin_page_size},
+            headers={"Authorization": f"Bearer {admin['token']}"},
+        )
+        if response is not None and response.status_code == 200:
+            admin["grievance_ids"] = [g["id"] for g in response.json()]
+
+    async def status_update(self, client: httpx.AsyncClient) -> None:
+        admin = self.rng.choice(self.admins)
+        if not admin["grievance_ids"]:
+            await self.admin_list(client)
+            return
+        grievance_id = self.rng.choice(admin["grievance_ids"])
+        await self.request(
+            client, "PATCH /api/admin/grievances/{id}/status", "PATCH", f"/api/admin/grievances/{grievance_id}/status",
+            json={"status": self.rng.choice(["in_progress", "resolved", "rejected"])},
+            headers={"Authorization": f"Bearer {admin['token']}"},
+        )
+
+    # Run
+
+    async def monitor_client_lag(self, interval: float = 0.1) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.client_lag.append(max(0.0, loop.time() - scheduled))
+
+    async def worker(self, client: httpx.AsyncClient, deadline: float) -> None:
+        operations = {
+            "submit": self.submit,
+            "urgent_submit": self.urgent_submit,
+            "my_grievances": self.my_grievances,
+            "admin_list": self.admin_list,
+            "status_update": self.status_update,
+        }
+        names = [name for name, weight in self.args.mix.items() if weight > 0]
+        weights = [self.args.mix[name] for name in names]
+        while time.monotonic() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            if name in ("admin_list", "status_update") and not self.admins:
+                name = "my_grievances"
+            await operations[name](client)
+
+    async def run(self) -> Dict:
+        limits = httpx.Limits(max_connections=self.args.concurrency, max_keepalive_connections=self.args.concurrency)
+        async with httpx.AsyncClient(base_url=self.args.base_url, timeout=self.args.timeout, limits=limits) as client:
+            print(f"Setting up {self.args.citizens} citizens and {self.args.admins} admins...")
+            await self.setup(client)
+
+            metrics_before = await scrape_metrics(client)
+            lag_task = asyncio.create_task(self.monitor_client_lag())
+            print(f"Running {self.args.concurrency} workers for {self.args.duration}s against {self.args.base_url}...")
+            started = time.monotonic()
+            deadline = started + self.args.duration
+            await asyncio.gather(*(self.worker(client, deadline) for _ in range(self.args.concurrency)))
+            elapsed = time.monotonic() - started
+            lag_task.cancel()
+            metrics_after = await scrape_metrics(client)
+
+        client_lag = sorted(self.client_lag)
+        return {
+            "meta": {
+                "started_at": datetime.utcnow().isoformat(),
+                "base_url": self.args.base_url,
+                "duration_s": round(elapsed, 2),
+                "concurrency": self.args.concurrency,
+                "citizens": self.args.citizens,
+                "admins": self.args.admins,
+                "mix": self.args.mix,
+                "seed": self.args.seed,
+            },
+            "routes": self.recorder.summary(elapsed),
+            "unflagged_urgent": self.unflagged_urgent,
+            "event_loop_lag": {
+                "server": histogram_delta(metrics_before, metrics_after, "event_loop_lag_seconds"),
+                "client_p99_ms": percentile(client_lag, 0.99) * 1000,
+                "client_max_ms": (client_lag[-1] if client_lag else 0.0) * 1000,
+            },
+        }
+
+
+async def scrape_metrics(client: httpx.AsyncClient) -> Dict[str, float]:
+    """Fetch unlabelled-ish samples from /metrics as ``{series: value}``."""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return {}
+    if response.status_code != 200:
+        return {}
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            series, _, value = line.rpartition(" ")
+            samples[series] = float(value)
+    return samples
+
+
+def histogram_delta(before: Dict[str, float], after: Dict[str, float], name: str) -> Optional[Dict[str, float]]:
+    """Mean and approximate p99 of a histogram over the interval between two scrapes."""
+    count = after.get(f"{name}_count", 0.0) - before.get(f"{name}_count", 0.0)
+    if count <= 0:
+        return None
+    total = after.get(f"{name}_sum", 0.0) - before.get(f"{name}_sum", 0.0)
+    buckets = []
+    for series, value in after.items():
+        if series.startswith(f"{name}_bucket"):
+            bound = series.split('le="')[1].rstrip('"}')
+            buckets.append((float("inf") if bound == "+Inf" else float(bound), value - before.get(series, 0.0)))
+    buckets.sort()
+    p99_bound = next((bound for bound, cumulative in buckets if cumulative >= 0.99 * count), float("inf"))
+    return {
+        "samples": count,
+        "mean_ms": total / count * 1000,
+        "p99_ms_upper_bound": p99_bound * 1000 if p99_bound != float("inf") else None,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print()
+    print(f"{'route':45} {'count':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    print("-" * 102)
+    for label, stats in report["routes"].items():
+        print(
+            f"{label:45} {stats['count']:>7} {stats['throughput_rps']:>8.1f} {stats['error_rate'] * 100:>5.1f}% "
+            f"{stats['p50_ms']:>7.1f}ms {stats['p90_ms']:>6.1f}ms {stats['p99_ms']:>6.1f}ms {stats['max_ms']:>6.1f}ms"
+        )
+    lag = report["event_loop_lag"]
+    server = lag["server"]
+    print()
+    if server:
+        print(f"Server event loop lag: mean {server['mean_ms']:.2f}ms, p99 <= {server['p99_ms_upper_bound']}ms")
+    else:
+        print("Server event loop lag: unavailable (/metrics not reachable)")
+    print(f"Client event loop lag: p99 {lag['client_p99_ms']:.2f}ms, max {lag['client_max_ms']:.2f}ms")
+    if report.get("unflagged_urgent"):
+        print(f"Urgent submissions not marked urgent: {report['unflagged_urgent']}")
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List regressions of ``report`` relative to ``baseline``."""
+    regressions = []
+    for label, base in baseline["routes"].items():
+        current = report["routes"].get(label)
+        if current is None or not base["count"]:
+            continue
+        if current["p90_ms"] > base["p90_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p90 {current['p90_ms']:.1f}ms vs baseline {base['p90_ms']:.1f}ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{label}: {current['throughput_rps']:.1f} rps vs baseline {base['throughput_rps']:.1f} rps")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{label}: error rate {current['error_rate']:.2%} vs baseline {base['error_rate']:.2%}")
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the grievance API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--citizens", type=int, default=50)
+    parser.add_argument("--admins", type=int, default=9)
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX))
+    parser.add_argument("--admin-page-size", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--superadmin-email")
+    parser.add_argument("--superadmin-password")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="save the report as a named baseline")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    report = asyncio.run(LoadTest(args).run())
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"\n✓ Saved baseline {path}")
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ Regressions against baseline '{args.compare}':")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✓ No regressions against baseline '{args.compare}' (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Convert stored grievances between the full and compact layouts.
+
+Online migration to the compact layout (see app/core/codec.py):
+
+1. Run every API worker with ``GRIEVANCE_STORAGE_FORMAT=migrating``. New
+   writes are compact, and reads and updates match both layouts.
+2. Run this script with the same setting. It creates the compact indexes
+   and rewrites documents in batches. Each document is replaced only if
+   its ``updated_at`` is unchanged since it was read, so concurrent status
+   changes are never lost. Skipped documents are retried in a later pass.
+3. Switch the API to ``GRIEVANCE_STORAGE_FORMAT=compact``, then run with
+   ``--drop-unused-indexes`` to remove the full-layout indexes.
+
+``--to full`` reverses the migration, with the same steps.
+
+The report compares average BSON document size on a sample before and
+after, and collStats data and index sizes. WiredTiger keeps freed space
+for reuse, so storage size only shrinks after ``compact``.
+
+Usage:
+    GRIEVANCE_STORAGE_FORMAT=migrating python -m scripts.migrate_grievance_storage --dry-run
+    GRIEVANCE_STORAGE_FORMAT=migrating python -m scripts.migrate_grievance_storage --batch-size 1000 --pause-ms 50
+    GRIEVANCE_STORAGE_FORMAT=compact python -m scripts.migrate_grievance_storage --drop-unused-indexes
+"""
+import argparse
+import asyncio
+import sys
+import bson
+from pymongo import ReplaceOne
+from app.core.codec import (
+    FORMAT_FULL, FORMAT_MIGRATING, FORMAT_COMPACT, FIELD_NAMES, FULL_NAMES, VERSION_FIELD, COMPACT_VERSION,
+    encode_document, decode_document
+)
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, ensure_indexes, get_database
+from app.services.archive_service import collection_stats
+from scripts.archive_grievances import print_stats, _mb
+
+COLLECTIONS = ("grievances", "grievances_archive")
+MAX_PASSES = 5
+
+
+def source_query(target: str) -> dict:
+    """Documents not yet in the ``target`` layout."""
+    if target == FORMAT_COMPACT:
+        return {VERSION_FIELD: {"$exists": False}}
+    return {VERSION_FIELD: COMPACT_VERSION}
+
+
+def convert(doc: dict, target: str) -> dict:
+    return encode_document(decode_document(doc)) if target == FORMAT_COMPACT else decode_document(doc)
+
+
+async def sample_sizes(collection, target: str, size: int):
+    """Average BSON bytes of a sample of unconverted documents, as stored and after conversion."""
+    docs = await collection.aggregate([{"$match": source_query(target)}, {"$sample": {"size": size}}]).to_list(length=size)
+    if not docs:
+        return None
+    before = sum(len(bson.encode(doc)) for doc in docs) / len(docs)
+    after = sum(len(bson.encode(convert(doc, target))) for doc in docs) / len(docs)
+    return before, after
+
+
+async def migrate_collection(collection, target: str, batch_size: int, pause: float) -> int:
+    """Convert every document of ``collection`` to ``target``. Returns the number converted."""
+    converted = 0
+    for attempt in range(1, MAX_PASSES + 1):
+        skipped = 0
+        last_id = None
+        while True:
+            query = source_query(target)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = await collection.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+
+            operations = [
+                # Only if unchanged since read; otherwise retried in the next pass
+                ReplaceOne({"_id": doc["_id"], "updated_at": doc.get("updated_at"), **source_query(target)}, convert(doc, target))
+                for doc in batch
+            ]
+            result = await collection.bulk_write(operations, ordered=False)
+            converted += result.modified_count
+            skipped += len(batch) - result.matched_count
+            if pause:
+                await asyncio.sleep(pause)
+
+        print(f"  pass {attempt}: {converted} converted, {skipped} changed concurrently")
+        if skipped == 0:
+            break
+    return converted
+
+
+async def index_sizes(name: str) -> dict:
+    return (await get_database().command("collStats", name)).get("indexSizes", {})
+
+
+async def drop_unused_indexes(collection, target: str) -> list:
+    """Drop indexes on fields of the other layout."""
+    other_layout = set(FIELD_NAMES) if target == FORMAT_COMPACT else set(FULL_NAMES)
+    dropped = []
+    for name, info in (await collection.index_information()).items():
+        fields = {key.split(".")[0] for key, _ in info["key"]}
+        if fields & other_layout:
+            await collection.drop_index(name)
+            dropped.append(name)
+    return dropped
+
+
+async def run(args):
+    storage_format = settings.GRIEVANCE_STORAGE_FORMAT
+    if args.drop_unused_indexes:
+        if storage_format != args.to:
+            sys.exit(f"Set GRIEVANCE_STORAGE_FORMAT={args.to} (on the API too) before dropping indexes")
+    elif storage_format not in (FORMAT_MIGRATING, args.to):
+        sys.exit(f"Run the API and this script with GRIEVANCE_STORAGE_FORMAT={FORMAT_MIGRATING} first")
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        for name in args.collections.split(","):
+            collection = db[name]
+            print(f"\n{name}")
+
+            if args.drop_unused_indexes:
+                remaining = await collection.count_documents(source_query(args.to))
+                if remaining:
+                    sys.exit(f"{remaining} documents in {name} are not converted yet; run the migration first")
+                before = await collection_stats(name)
+                dropped = await drop_unused_indexes(collection, args.to)
+                after = await collection_stats(name)
+                print(f"✓ Dropped {len(dropped)} indexes: {', '.join(dropped) or '-'}")
+                print(f"  indexes {_mb(before['total_index_size'])} -> {_mb(after['total_index_size'])}")
+                continue
+
+            pending = await collection.count_documents(source_query(args.to))
+            sizes = await sample_sizes(collection, args.to, args.sample)
+            print(f"{pending} documents to convert to {args.to}")
+            if sizes:
+                before, after = sizes
+                print(f"  average document {before:.0f} -> {after:.0f} bytes ({1 - after / before:.1%} smaller, sampled)")
+            if args.dry_run or not pending:
+                continue
+
+            await ensure_indexes()
+            stats_before = await collection_stats(name)
+            indexes_before = await index_sizes(name)
+            print_stats("  before", stats_before)
+
+            converted = await migrate_collection(collection, args.to, args.batch_size, args.pause_ms / 1000)
+            print(f"✓ Converted {converted} documents")
+
+            stats_after = await collection_stats(name)
+            print_stats("  after", stats_after)
+            indexes_after = await index_sizes(name)
+            for index in sorted(set(indexes_before) | set(indexes_after)):
+                print(f"  index {index}: {_mb(indexes_before.get(index, 0))} -> {_mb(indexes_after.get(index, 0))}")
+            print(
+                f"  data {_mb(stats_before['size'])} -> {_mb(stats_after['size'])}; "
+                f"run with --drop-unused-indexes after switching the API to {args.to}"
+            )
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored grievances between full and compact layouts")
+    parser.add_argument("--to", choices=[FORMAT_COMPACT, FORMAT_FULL], default=FORMAT_COMPACT)
+    parser.add_argument("--collections", default=",".join(COLLECTIONS))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause-ms", type=float, default=0, help="sleep between batches to limit load")
+    parser.add_argument("--sample", type=int, default=1000, help="documents sampled for the size estimate")
+    parser.add_argument("--dry-run", action="store_true", help="only count documents and estimate the saving")
+    parser.add_argument("--drop-unused-indexes", action="store_true",
+                        help="drop indexes of the other layout (after the API runs with the target format)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Rebuild the time-to-resolution sketches from closed grievances.
+
+Sketches are normally updated as grievances are resolved or rejected; run
+this once after upgrading to backfill grievances closed earlier, or to
+recover after the ``resolution_sketches`` collection was dropped. Reads
+grievances from both the live and archive collections. A closure counts
+when ``status_reached_at.<status>`` is recorded (including grievances
+reopened since), or from ``updated_at`` for grievances closed before
+first arrivals were recorded.
+
+``--check`` compares the stored sketches with the closures recorded on the
+grievances instead of rewriting them, and exits non-zero on any mismatch:
+a sketch is only as accurate as the closures fed into it, which
+``tests/test_sketch.py`` does not cover.
+
+Usage:
+    python -m scripts.rebuild_resolution_sketches
+    python -m scripts.rebuild_resolution_sketches --check
+"""
+import argparse
+import asyncio
+import sys
+from collections import defaultdict
+from typing import Dict, Tuple
+from app.core.database import (
+    connect_to_mongo, close_mongo_connection, ensure_indexes, backfill_default_tenant,
+    get_grievances_collection, get_grievances_archive_collection, get_resolution_sketches_collection
+)
+from app.core.sketch import DDSketch, DEFAULT_RELATIVE_ACCURACY
+from app.services.resolution_stats_service import CLOSED_STATUSES, day_start, sketch_document, sketch_id
+
+PROJECTION = {"tenant_id": 1, "status": 1, "predicted_department": 1, "priority": 1, "created_at": 1, "updated_at": 1, "status_reached_at": 1}
+
+
+async def closure_sketches() -> Tuple[Dict[tuple, DDSketch], int]:
+    """Sketches built from the closures recorded on grievances, and the number of closures."""
+    sketches = defaultdict(lambda: DDSketch(DEFAULT_RELATIVE_ACCURACY))
+    closures = 0
+    query = {"$or": [{"status": {"$in": list(CLOSED_STATUSES)}}] + [
+        {f"status_reached_at.{status}": {"$exists": True}} for status in CLOSED_STATUSES
+    ]}
+    for collection in (get_grievances_collection(), get_grievances_archive_collection()):
+        async for doc in collection.find(query, PROJECTION):
+            reached = doc.get("status_reached_at") or {}
+            for status in CLOSED_STATUSES:
+                closed_at = reached.get(status) or (doc["updated_at"] if doc["status"] == status else None)
+                if closed_at is None:
+                    continue
+                seconds = max(0.0, (closed_at - doc["created_at"]).total_seconds())
+                key = (doc["tenant_id"], status, doc["predicted_department"], doc.get("priority") or "medium", day_start(closed_at))
+                sketches[key].add(seconds)
+                closures += 1
+    return sketches, closures
+
+
+async def check(sketches: Dict[tuple, DDSketch]) -> int:
+    """Print sketches whose stored count differs from the recorded closures; returns how many."""
+    expected = {sketch_id(*key): sketch.count for key, sketch in sketches.items()}
+    stored = {
+        doc["_id"]: doc.get("count", 0)
+        async for doc in get_resolution_sketches_collection().find({}, {"count": 1})
+    }
+    mismatches = 0
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key, 0) != stored.get(key, 0):
+            mismatches += 1
+            print(f"  {key}: stored {stored.get(key, 0)}, closures {expected.get(key, 0)}")
+    return mismatches
+
+
+async def run(args) -> int:
+    await connect_to_mongo()
+    try:
+        await ensure_indexes()
+        await backfill_default_tenant()
+        sketches, closures = await closure_sketches()
+
+        if args.check:
+            mismatches = await check(sketches)
+            if mismatches:
+                print(f"✗ {mismatches} of {len(sketches)} daily sketches disagree with {closures} recorded closures")
+                return 1
+            print(f"✓ {len(sketches)} daily sketches match {closures} recorded closures")
+            return 0
+
+        documents = [sketch_document(*key, sketch) for key, sketch in sketches.items()]
+        collection = get_resolution_sketches_collection()
+        await collection.delete_many({})
+        for i in range(0, len(documents), 1000):
+            await collection.insert_many(documents[i:i + 1000])
+        print(f"✓ Rebuilt {len(documents)} daily sketches from {closures} closures")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or check the time-to-resolution sketches")
+    parser.add_argument("--check", action="store_true", help="compare stored sketches with recorded closures, don't rewrite")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
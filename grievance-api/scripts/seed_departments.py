@@ -1,15 +1,21 @@
 """
 Seed script to initialize departments and optionally create a superadmin user.
 
+With ``tenant=<id>`` it registers a municipality (tenant) and seeds its
+departments, which can then be edited independently of other tenants';
+without it, the default tenant is seeded.
+
 Usage:
     python -m scripts.seed_departments
     python -m scripts.seed_departments --create-superadmin email=admin@example.com password=SecurePass123
+    python -m scripts.seed_departments tenant=riverside "name=Riverside Municipality" --create-superadmin email=admin@riverside.gov password=SecurePass123
 """
 import asyncio
 import sys
 from motor.motor_asyncio import AsyncIOMotorClient
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.services.department_service import department_doc_id
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -73,34 +79,46 @@ DEPARTMENTS = [
 ]
 
 
-async def seed_departments():
-    """Upsert department documents with stable _id values."""
+def tenant_departments(tenant_id: str) -> list:
+    """The default departments as documents of ``tenant_id``."""
+    return [
+        {**dept, "_id": department_doc_id(tenant_id, dept["_id"]), "key": dept["_id"], "tenant_id": tenant_id}
+        for dept in DEPARTMENTS
+    ]
+
+
+async def seed_departments(tenant_id: str, tenant_name: str):
+    """Register the tenant and upsert its department documents with stable _id values."""
     client = AsyncIOMotorClient(settings.MONGO_URI)
     db = client[settings.MONGO_DB]
     departments_col = db["departments"]
     
-    for dept in DEPARTMENTS:
+    await db["tenants"].update_one({"_id": tenant_id}, {"$set": {"name": tenant_name}}, upsert=True)
+    
+    departments = tenant_departments(tenant_id)
+    for dept in departments:
         await departments_col.update_one(
             {"_id": dept["_id"]},
             {"$set": dept},
             upsert=True
         )
     
-    print(f"✓ Seeded {len(DEPARTMENTS)} departments")
+    print(f"✓ Seeded {len(departments)} departments for tenant {tenant_id}")
     return db
 
 
-async def create_superadmin(db, email: str, password: str):
-    """Create a superadmin user."""
+async def create_superadmin(db, tenant_id: str, email: str, password: str):
+    """Create a superadmin user of a tenant."""
     users_col = db["users"]
     
-    existing = await users_col.find_one({"email": email})
+    existing = await users_col.find_one({"tenant_id": tenant_id, "email": email})
     if existing:
         print(f"✗ User with email {email} already exists")
         return
     
     hashed_password = pwd_context.hash(password)
     user_doc = {
+        "tenant_id": tenant_id,
         "email": email,
         "hashed_password": hashed_password,
         "role": "superadmin",
@@ -108,26 +126,22 @@ async def create_superadmin(db, email: str, password: str):
     }
     
     await users_col.insert_one(user_doc)
-    print(f"✓ Created superadmin: {email}")
+    print(f"✓ Created superadmin: {email} (tenant {tenant_id})")
 
 
 async def main():
     """Main seed function."""
-    db = await seed_departments()
+    options = dict(arg.split("=", 1) for arg in sys.argv[1:] if "=" in arg)
+    tenant_id = options.get("tenant", settings.DEFAULT_TENANT)
+    db = await seed_departments(tenant_id, options.get("name", tenant_id))
     
     # Check for --create-superadmin flag
     if "--create-superadmin" in sys.argv:
-        email = None
-        password = None
-        
-        for arg in sys.argv:
-            if arg.startswith("email="):
-                email = arg.split("=", 1)[1]
-            elif arg.startswith("password="):
-                password = arg.split("=", 1)[1]
+        email = options.get("email")
+        password = options.get("password")
         
         if email and password:
-            await create_superadmin(db, email, password)
+            await create_superadmin(db, tenant_id, email, password)
         else:
             print("✗ --create-superadmin requires email=... and password=...")
     
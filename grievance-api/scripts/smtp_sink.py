@@ -0,0 +1,150 @@
+"""
+Local SMTP sink for trying out department notifications.
+
+Accepts mail on a local port, prints a line per message and a throughput
+summary every few seconds, and discards the mail (or appends it to an
+mbox file). Implements just enough of SMTP (RFC 5321) for ``smtplib``; no
+TLS or authentication, so leave ``SMTP_STARTTLS`` and ``SMTP_USERNAME``
+unset. ``--latency-ms`` and ``--fail-rate`` simulate a slow or flaky
+relay, to watch retries and the lag metrics.
+
+Usage:
+    python -m scripts.smtp_sink --port 1025
+    python -m scripts.smtp_sink --port 1025 --latency-ms 500 --fail-rate 0.2 --mbox /tmp/notifications.mbox
+
+Then start the API with:
+    NOTIFICATIONS_ENABLED=true SMTP_HOST=localhost SMTP_PORT=1025 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import mailbox
+import random
+import time
+from email import message_from_bytes, policy
+from typing import List, Optional
+
+config = {
+    "latency_ms": 0.0,
+    "fail_rate": 0.0,
+    "quiet": False,
+    "mbox": None,
+}
+stats = {"messages": 0, "rejected": 0, "recipients": 0}
+
+
+def _store(data: bytes, recipients: List[str]) -> None:
+    message = message_from_bytes(data, policy=policy.default)
+    stats["messages"] += 1
+    stats["recipients"] += len(recipients)
+    if not config["quiet"]:
+        print(f"  -> {', '.join(recipients)}: {message['Subject']}")
+    if config["mbox"]:
+        box = mailbox.mbox(config["mbox"])
+        box.add(data)
+        box.close()
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """One SMTP session."""
+    async def reply(line: str) -> None:
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    sender: Optional[str] = None
+    recipients: List[str] = []
+    await reply("220 localhost smtp-sink ready")
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+
+            if verb in ("HELO", "EHLO"):
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250-8BITMIME")
+                    await reply("250 SMTPUTF8")
+                else:
+                    await reply("250 localhost")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(), []
+                await reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].split(">")[0].strip("<> "))
+                await reply("250 OK")
+            elif verb == "DATA":
+                if sender is None or not recipients:
+                    await reply("503 Need MAIL and RCPT first")
+                    continue
+                await reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = await reader.readline()
+                    if data_line in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                if config["latency_ms"]:
+                    await asyncio.sleep(config["latency_ms"] / 1000)
+                if random.random() < config["fail_rate"]:
+                    stats["rejected"] += 1
+                    await reply("451 Temporary failure (simulated)")
+                else:
+                    _store(b"".join(lines), recipients)
+                    await reply("250 OK: queued")
+                sender, recipients = None, []
+            elif verb == "RSET":
+                sender, recipients = None, []
+                await reply("250 OK")
+            elif verb == "NOOP":
+                await reply("250 OK")
+            elif verb == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                await reply("502 Command not implemented")
+    finally:
+        writer.close()
+
+
+async def report(interval: float) -> None:
+    last_messages = 0
+    last_time = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        rate = (stats["messages"] - last_messages) / (now - last_time)
+        last_messages, last_time = stats["messages"], now
+        print(
+            f"[smtp-sink] {stats['messages']} messages ({stats['recipients']} recipients), "
+            f"{stats['rejected']} rejected, {rate:.1f} msg/s"
+        )
+
+
+async def serve(host: str, port: int, report_interval: float) -> None:
+    server = await asyncio.start_server(handle, host, port)
+    print(f"✓ SMTP sink listening on {host}:{port}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), report(report_interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP sink for notification testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before accepting each message")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of messages rejected with 451")
+    parser.add_argument("--mbox", help="append accepted messages to this mbox file")
+    parser.add_argument("--quiet", action="store_true", help="don't print a line per message")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="seconds between summaries")
+    args = parser.parse_args()
+    config.update(latency_ms=args.latency_ms, fail_rate=args.fail_rate, quiet=args.quiet, mbox=args.mbox)
+    try:
+        asyncio.run(serve(args.host, args.port, args.report_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
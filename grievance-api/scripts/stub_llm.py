@@ -0,0 +1,178 @@
+"""
+Stub LLM server for load testing.
+
+Serves an OpenAI-compatible chat completions endpoint (at both Groq's
+``/openai/v1/chat/completions`` and the plain ``/v1/chat/completions`` path)
+that answers with the keyword fallback classification after a configurable
+delay, so the API can be exercised end to end without provider quota.
+
+``--ramble-chars`` makes it behave like a chatty model that keeps talking
+after the JSON object, and ``--token-ms`` paces streamed output like real
+generation (one token = 4 characters). ``max_tokens`` is honoured, and
+``GET /stats`` reports tokens generated and streams the client closed
+early, to measure what early termination saves. ``--slow-rate`` and
+``--slow-ms`` add a latency tail, e.g. to watch hedged requests; run two
+stubs on different ports to try routing between backends.
+
+Usage:
+    python -m scripts.stub_llm --port 9000 --latency-ms 300 --jitter-ms 100 --error-rate 0.01
+    python -m scripts.stub_llm --port 9000 --ramble-chars 600 --token-ms 10
+    python -m scripts.stub_llm --port 9001 --latency-ms 150 --slow-rate 0.05 --slow-ms 3000
+
+Then start the API with:
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://localhost:9000 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Tuple
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.classification_service import fallback_classify
+
+app = FastAPI(title="Stub LLM")
+
+config = {
+    "latency_ms": 300.0,
+    "jitter_ms": 100.0,
+    "error_rate": 0.0,
+    "ramble_chars": 0,
+    "token_ms": 0.0,
+    "slow_rate": 0.0,
+    "slow_ms": 0.0,
+}
+stats = {"requests": 0, "tokens_generated": 0, "streams_cancelled": 0}
+
+CHARS_PER_TOKEN = 4
+RAMBLE = (
+    " This classification is based on the keywords in the report and the usual"
+    " responsibilities of municipal departments. If the situation gets worse,"
+    " the priority may need to be reviewed by the department concerned."
+)
+
+
+def _completion_text(request_body: dict) -> str:
+    message = request_body["messages"][-1]["content"]
+    result = fallback_classify(message)
+    result["confidence"] = 0.9
+    result["explanation"] = result["explanation"].replace("fallback", "stub")
+    text = json.dumps(result)
+    if config["ramble_chars"]:
+        text += "\n\nNote:" + (RAMBLE * (config["ramble_chars"] // len(RAMBLE) + 1))[:config["ramble_chars"]]
+    return text
+
+
+def _truncate(text: str, max_tokens) -> Tuple[str, str]:
+    """Text cut to ``max_tokens`` and the finish reason ("length" if cut)."""
+    if max_tokens and len(text) > max_tokens * CHARS_PER_TOKEN:
+        return text[:max_tokens * CHARS_PER_TOKEN], "length"
+    return text, "stop"
+
+
+async def _simulate_latency():
+    delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+    if random.random() < config["slow_rate"]:
+        delay += config["slow_ms"]
+    await asyncio.sleep(max(0.0, delay) / 1000)
+
+
+def _chunk(completion_id: str, model: str, content: str = None, finish_reason: str = None) -> str:
+    delta = {"content": content} if content is not None else {}
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+
+    if random.random() < config["error_rate"]:
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "stub rate limit", "type": "rate_limit_exceeded"}}
+        )
+
+    stats["requests"] += 1
+    text, finish_reason = _truncate(_completion_text(body), body.get("max_tokens"))
+    model = body.get("model", "stub")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+    if body.get("stream"):
+        async def stream():
+            finished = False
+            try:
+                await _simulate_latency()
+                yield _chunk(completion_id, model, "")
+                for i in range(0, len(text), CHARS_PER_TOKEN):
+                    if config["token_ms"]:
+                        await asyncio.sleep(config["token_ms"] / 1000)
+                    stats["tokens_generated"] += 1
+                    yield _chunk(completion_id, model, text[i:i + CHARS_PER_TOKEN])
+                yield _chunk(completion_id, model, finish_reason=finish_reason)
+                yield "data: [DONE]\n\n"
+                finished = True
+            finally:
+                if not finished:
+                    stats["streams_cancelled"] += 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    await _simulate_latency()
+    tokens = -(-len(text) // CHARS_PER_TOKEN)
+    if config["token_ms"]:
+        await asyncio.sleep(tokens * config["token_ms"] / 1000)
+    stats["tokens_generated"] += tokens
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": finish_reason,
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Requests served, completion tokens generated and streams closed by the client before the end."""
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--ramble-chars", type=int, default=0, help="prose appended after the JSON object")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="generation time per token (4 characters)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config.update(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        ramble_chars=args.ramble_chars, token_ms=args.token_ms,
+        slow_rate=args.slow_rate, slow_ms=args.slow_ms
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Shared fixtures.
+
+Tests are plain pytest functions; coroutines are driven with ``asyncio.run``.
+``mongo`` swaps the Motor client for an in-memory mongomock one, so service
+code runs unchanged without a MongoDB server.
+"""
+import pytest
+from app.core import database
+from app.core.config import settings
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """In-memory database behind ``app.core.database``; yields the database object."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    # mongomock has no read preferences; analytics reads go to the same data
+    monkeypatch.setattr(mongomock_motor.AsyncMongoMockCollection, "with_options", lambda self, **kwargs: self, raising=False)
+    client = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(database, "client", client)
+    yield client[settings.MONGO_DB]
+
+
+@pytest.fixture
+def no_llm(monkeypatch):
+    """Classify with the keyword fallback only."""
+    from app.services.llm_router import llm_router
+    monkeypatch.setattr(llm_router, "backends", [])
+
+
+@pytest.fixture
+def api(mongo):
+    """HTTP client for the app, without running the lifespan hook."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+def auth_header(**claims) -> dict:
+    """Bearer header for a token with the given claims."""
+    from app.core.security import create_access_token
+    return {"Authorization": f"Bearer {create_access_token(claims)}"}
@@ -0,0 +1,18 @@
+"""Admin grievance routes: id validation and not-found handling."""
+from bson import ObjectId
+from conftest import auth_header
+
+SUPERADMIN = auth_header(sub="admin-1", role="superadmin", tenant_id="city-a")
+
+
+def test_status_update_rejects_malformed_id(api):
+    response = api.patch("/api/admin/grievances/not-an-id/status", json={"status": "in_progress"}, headers=SUPERADMIN)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid grievance ID"
+
+
+def test_status_update_of_unknown_grievance_is_not_found(api):
+    response = api.patch(f"/api/admin/grievances/{ObjectId()}/status", json={"status": "in_progress"}, headers=SUPERADMIN)
+
+    assert response.status_code == 404
@@ -0,0 +1,176 @@
+"""Incremental upload parsing and per-row outcomes of bulk ingestion."""
+import asyncio
+import json
+import pytest
+from app.core.config import settings
+from app.services import bulk_ingest_service
+from app.services.bulk_ingest_service import (
+    BulkParseError, FORMAT_CSV, FORMAT_JSON, FORMAT_NDJSON, ingest, parse_rows
+)
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def parse(upload_format: str, data, size: int = 4096):
+    """All rows of ``data`` uploaded in chunks of ``size`` bytes."""
+    if isinstance(data, str):
+        data = data.encode()
+
+    async def collect():
+        return [row async for row in parse_rows(upload_format, _chunks(data, size))]
+    return asyncio.run(collect())
+
+
+def parse_until_error(upload_format: str, data: str, size: int = 4096):
+    """Rows yielded before the parse error, and the error."""
+    rows = []
+
+    async def collect():
+        async for row in parse_rows(upload_format, _chunks(data.encode(), size)):
+            rows.append(row)
+    with pytest.raises(BulkParseError) as error:
+        asyncio.run(collect())
+    return rows, error.value
+
+
+ROWS = [
+    {"message": "Water pipe burst near the school", "reference": "A-1"},
+    {"message": "Streetlight out, \"dangerous\" at night\nnear the park", "reference": "A-2"},
+    {"message": "Garbage not collected — two weeks", "reference": None},
+    {"message": "Pothole", "count": 12345, "flag": True},
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_json_array_elements_split_across_chunks(size):
+    assert parse(FORMAT_JSON, json.dumps(ROWS, ensure_ascii=False), size) == ROWS
+
+
+def test_json_array_number_at_chunk_boundary():
+    # "12" then "345]" must not be read as 12
+    assert parse(FORMAT_JSON, "[12345]", 3) == [12345]
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_ndjson_lines_split_across_chunks(size):
+    data = "\r\n".join(json.dumps(row, ensure_ascii=False) for row in ROWS) + "\n\n"
+    assert parse(FORMAT_NDJSON, data, size) == ROWS
+
+
+@pytest.mark.parametrize("size", [1, 3, 4096])
+def test_csv_quoted_newlines_and_quotes_across_chunks(size):
+    data = (
+        "Message,Reference\r\n"
+        "Water pipe burst near the school,A-1\r\n"
+        '"Streetlight out, ""dangerous"" at night\nnear the park",A-2\r\n'
+    )
+    assert parse(FORMAT_CSV, data, size) == [
+        {"message": "Water pipe burst near the school", "reference": "A-1"},
+        {"message": 'Streetlight out, "dangerous" at night\nnear the park', "reference": "A-2"},
+    ]
+
+
+def test_utf8_bom_and_multibyte_characters_split_across_chunks():
+    data = "﻿" + json.dumps([{"message": "नल से पानी नहीं आ रहा"}], ensure_ascii=False)
+    assert parse(FORMAT_JSON, data.encode("utf-8"), 1) == [{"message": "नल से पानी नहीं आ रहा"}]
+
+
+@pytest.mark.parametrize("data, row", [
+    ('[{"message": "ok"}, {bad}]', 2),
+    ('[{"message": "ok"} {"message": "no comma"}]', 2),
+    ('[{"message": "ok"},', 2),
+])
+def test_json_array_bad_element_reports_its_row(data, row):
+    rows, error = parse_until_error(FORMAT_JSON, data, 4)
+    assert rows == [{"message": "ok"}]
+    assert error.row == row
+
+
+def test_json_upload_must_be_an_array():
+    _, error = parse_until_error(FORMAT_JSON, '{"message": "x"}')
+    assert error.row == 1
+
+
+def test_ndjson_bad_line_reports_its_row():
+    rows, error = parse_until_error(FORMAT_NDJSON, '{"message": "ok"}\n\n{"message": \n')
+    assert rows == [{"message": "ok"}]
+    assert error.row == 2
+
+
+def test_csv_without_message_column_is_rejected():
+    _, error = parse_until_error(FORMAT_CSV, "text,reference\nhello,1\n")
+    assert error.row == 0
+
+
+def test_csv_unterminated_quote_is_reported():
+    rows, error = parse_until_error(FORMAT_CSV, 'message\nok\n"never closed\n')
+    assert rows == [{"message": "ok"}]
+    assert error.row == 2
+
+
+async def _rows(count: int):
+    for i in range(count):
+        yield {"message": f"Garbage not collected in sector {i} for a week", "reference": f"R-{i}"}
+
+
+async def _numbered(rows):
+    row = 0
+    async for raw in rows:
+        row += 1
+        yield row, raw
+
+
+def test_ingest_stops_at_max_rows(mongo, no_llm, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_MAX_ROWS", 3)
+    response = asyncio.run(ingest("default", "partner", _rows(5)))
+    assert response.truncated
+    assert (response.total, response.created) == (3, 3)
+    assert [r.reference for r in response.results] == ["R-0", "R-1", "R-2"]
+
+
+def test_ingest_reports_rows_failing_after_classification(mongo, no_llm, monkeypatch):
+    real_attach = bulk_ingest_service.attach_incident
+
+    async def attach(doc):
+        if doc["reference"] == "R-1":
+            raise RuntimeError("incident upsert failed")
+        return await real_attach(doc)
+    monkeypatch.setattr(bulk_ingest_service, "attach_incident", attach)
+
+    response = asyncio.run(ingest("default", "partner", _rows(3)))
+    assert [r.status for r in response.results] == ["created", "failed", "created"]
+    assert response.results[1].error == "Database error"
+
+
+def test_ingest_keeps_results_when_the_insert_fails(mongo, no_llm, monkeypatch):
+    async def insert_many(docs, ordered=True):
+        raise RuntimeError("codec error")
+
+    async def run():
+        ingestion = bulk_ingest_service.BulkIngestion("default", "partner")
+        monkeypatch.setattr(ingestion._collection, "insert_many", insert_many)
+        async for row, raw in _numbered(_rows(2)):
+            await ingestion.add(row, raw)
+        await ingestion.finish()
+        return ingestion.results
+
+    results = asyncio.run(run())
+    assert [(row, r.status, r.error) for row, r in sorted(results.items())] == [
+        (1, "failed", "Insert failed"), (2, "failed", "Insert failed")
+    ]
+
+
+def test_stored_rows_stay_created_when_recording_their_event_fails(mongo, no_llm, monkeypatch):
+    async def attach(doc):
+        doc["status"] = "in_progress"  # as if joining an incident in progress
+
+    async def record(doc, from_status):
+        raise RuntimeError("events collection unavailable")
+    monkeypatch.setattr(bulk_ingest_service, "attach_incident", attach)
+    monkeypatch.setattr(bulk_ingest_service, "record_inherited_status", record)
+
+    response = asyncio.run(ingest("default", "partner", _rows(2)))
+    assert response.created == 2
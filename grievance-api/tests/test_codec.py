@@ -0,0 +1,209 @@
+"""
+Grievance storage codec: full <-> compact translation of documents,
+filters, updates and projections, and the migrating dual-read.
+"""
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from app.core.codec import (
+    FORMAT_COMPACT, FORMAT_FULL, FORMAT_MIGRATING, STORAGE_FORMATS, VERSION_FIELD,
+    GrievanceCollection, decode_document, encode_document, encode_filter, encode_projection,
+    encode_update, index_keys
+)
+
+USER_ID = "65a1b2c3d4e5f60718293a4b"
+CREATED = datetime(2024, 6, 1, 9, 30)
+
+
+def grievance(**fields) -> dict:
+    doc = {
+        "_id": ObjectId(),
+        "tenant_id": "city-a",
+        "user_id": USER_ID,
+        "message": "Water pipe burst on Main Street",
+        "predicted_department": "water",
+        "priority": "high",
+        "confidence": 0.5,
+        "explanation": "fallback: matched water keywords",
+        "status": "submitted",
+        "status_reached_at": {"submitted": CREATED},
+        "time_in_state": {},
+        "location_name": "Main St",
+        "created_at": CREATED,
+        "updated_at": CREATED,
+    }
+    doc.update(fields)
+    return doc
+
+
+def test_document_round_trip():
+    doc = grievance(status="resolved", status_reached_at={"submitted": CREATED, "resolved": CREATED}, time_in_state={"submitted": 60.0})
+
+    compact = encode_document(dict(doc))
+
+    assert compact == {
+        "_id": doc["_id"],
+        "tenant_id": "city-a",
+        "u": ObjectId(USER_ID),
+        "m": doc["message"],
+        "d": 0,
+        "p": 0,
+        "c": 0.5,
+        "e": 1,
+        "s": 2,
+        "sr": {"0": CREATED, "2": CREATED},
+        "t": {"0": 60.0},
+        "ln": "Main St",
+        "created_at": CREATED,
+        "updated_at": CREATED,
+        VERSION_FIELD: 1,
+    }
+    assert decode_document(compact) == doc
+
+
+def test_unknown_values_are_stored_unchanged():
+    doc = grievance(user_id="legacy-user", explanation="LLM: burst main", predicted_department="parks")
+
+    compact = encode_document(dict(doc))
+
+    assert (compact["u"], compact["e"], compact["d"]) == ("legacy-user", "LLM: burst main", "parks")
+    assert decode_document(compact) == doc
+
+
+def test_full_form_documents_decode_unchanged():
+    doc = grievance()
+
+    assert decode_document(doc) is doc
+    assert decode_document(None) is None
+
+
+def test_filter_encoding():
+    query = {
+        "tenant_id": "city-a",
+        "_id": {"$in": [1, 2]},
+        "user_id": USER_ID,
+        "status": {"$in": ["submitted", "in_progress"], "$exists": True},
+        "priority": {"$not": {"$eq": "low"}},
+        "status_reached_at.resolved": {"$gte": CREATED},
+        "$or": [{"predicted_department": "roads"}, {"incident_id": {"$exists": True}}],
+    }
+
+    assert encode_filter(query) == {
+        "tenant_id": "city-a",
+        "_id": {"$in": [1, 2]},
+        "u": ObjectId(USER_ID),
+        "s": {"$in": [0, 1], "$exists": True},
+        "p": {"$not": {"$eq": 2}},
+        "sr.2": {"$gte": CREATED},
+        "$or": [{"d": 2}, {"i": {"$exists": True}}],
+    }
+
+
+def test_update_encoding():
+    update = {
+        "$set": {"status": "resolved", "status_reached_at.resolved": CREATED, "updated_at": CREATED},
+        "$inc": {"time_in_state.submitted": 60.0},
+        "$unset": {"notification_pending": ""},
+    }
+
+    assert encode_update(update) == {
+        "$set": {"s": 2, "sr.2": CREATED, "updated_at": CREATED},
+        "$inc": {"t.0": 60.0},
+        "$unset": {"notification_pending": ""},
+    }
+
+
+def test_replacement_update_is_encoded_as_a_document():
+    doc = grievance()
+
+    assert encode_update(doc) == encode_document(dict(doc))
+
+
+def test_pipeline_updates_are_rejected():
+    with pytest.raises(TypeError, match="pipeline"):
+        encode_update([{"$set": {"status": "resolved"}}])
+
+
+def test_projection_encoding():
+    assert encode_projection(["status", "predicted_department"]) == {"s": 1, "d": 1, VERSION_FIELD: 1}
+    assert encode_projection({"_id": 1, "created_at": 1}) == {"_id": 1, "created_at": 1, VERSION_FIELD: 1}
+    # Exclusions and _id-only projections don't need the version marker
+    assert encode_projection({"message": 0}) == {"m": 0}
+    assert encode_projection({"_id": 1}) == {"_id": 1}
+    assert encode_projection(None) is None
+
+
+def test_index_keys():
+    assert index_keys([("tenant_id", 1), ("status", 1), ("created_at", -1)]) == [("tenant_id", 1), ("s", 1), ("created_at", -1)]
+
+
+@pytest.mark.parametrize("storage_format", STORAGE_FORMATS)
+def test_collection_round_trip(mongo, storage_format):
+    grievances = GrievanceCollection(mongo["grievances"], storage_format)
+    doc = grievance()
+
+    async def scenario():
+        await grievances.insert_one(dict(doc))
+        await grievances.bulk_write([InsertOne(grievance(status="in_progress", priority="low"))])
+        stored = await mongo["grievances"].find_one({"_id": doc["_id"]})
+        await grievances.update_one(
+            {"_id": doc["_id"], "status": "submitted"},
+            {"$set": {"status": "resolved", "status_reached_at.resolved": CREATED}}
+        )
+        await grievances.bulk_write([UpdateOne({"status": "in_progress"}, {"$set": {"priority": "medium"}})])
+        found = await grievances.find_one({"user_id": USER_ID, "status": "resolved"})
+        projected = await grievances.find_one({"_id": doc["_id"]}, ["status", "priority"])
+        listed = await grievances.find({"priority": {"$in": ["medium"]}}).sort("created_at", -1).to_list(None)
+        count = await grievances.count_documents({"predicted_department": "water"})
+        return stored, found, projected, listed, count
+
+    stored, found, projected, listed, count = asyncio.run(scenario())
+
+    assert (VERSION_FIELD in stored) == (storage_format != FORMAT_FULL)
+    assert found == {**doc, "status": "resolved", "status_reached_at": {"submitted": CREATED, "resolved": CREATED}}
+    assert projected == {"_id": doc["_id"], "status": "resolved", "priority": "high"}
+    assert [g["status"] for g in listed] == ["in_progress"]
+    assert count == 2
+
+
+@pytest.mark.parametrize("storage_format", STORAGE_FORMATS)
+def test_collection_rejects_pipeline_updates_in_every_format(mongo, storage_format):
+    grievances = GrievanceCollection(mongo["grievances"], storage_format)
+
+    with pytest.raises(TypeError):
+        asyncio.run(grievances.update_one({"status": "submitted"}, [{"$set": {"status": "resolved"}}]))
+
+
+def test_migrating_reads_and_updates_both_forms(mongo):
+    full = grievance(message="stored before the migration")
+    compact = grievance(message="stored after the migration")
+
+    async def scenario():
+        # One document of each layout, as during scripts/migrate_grievance_storage.py
+        await GrievanceCollection(mongo["grievances"], FORMAT_FULL).insert_one(dict(full))
+        await GrievanceCollection(mongo["grievances"], FORMAT_COMPACT).insert_one(dict(compact))
+        migrating = GrievanceCollection(mongo["grievances"], FORMAT_MIGRATING)
+
+        before = await migrating.find({"tenant_id": "city-a", "status": "submitted"}).sort("created_at").to_list(None)
+        await migrating.update_many({"status": "submitted"}, {"$set": {"status": "in_progress"}})
+        after = await migrating.find({"status": "in_progress"}, {"message": 1}).to_list(None)
+        raw = await mongo["grievances"].find({}, {"_id": 1, "status": 1, "s": 1}).to_list(None)
+        return before, after, raw
+
+    before, after, raw = asyncio.run(scenario())
+
+    assert sorted(g["message"] for g in before) == sorted([full["message"], compact["message"]])
+    assert {g["_id"]: g for g in before}[full["_id"]] == full
+    assert {g["_id"]: g for g in before}[compact["_id"]] == compact
+    assert sorted(g["message"] for g in after) == sorted([full["message"], compact["message"]])
+    # Each document was updated in its own layout
+    assert {d["_id"]: d.get("status", d.get("s")) for d in raw} == {full["_id"]: "in_progress", compact["_id"]: 1}
+
+
+def test_migrating_sort_on_renamed_field_is_rejected(mongo):
+    migrating = GrievanceCollection(mongo["grievances"], FORMAT_MIGRATING)
+
+    with pytest.raises(ValueError):
+        migrating.find({}).sort("status_changed_at", -1)
@@ -0,0 +1,51 @@
+"""
+Cold-start budget for the API.
+
+Imports ``app.main`` in fresh interpreters with ``-X importtime``: the
+LangChain/Groq stack must load lazily, and the cumulative import time
+(fastest of a few runs) must stay within IMPORT_TIME_BUDGET_MS.
+"""
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 800))
+RUNS = 5
+
+# Modules that must not be imported just by starting the API
+LAZY_MODULES = ("langchain_groq", "langchain_core", "langchain", "groq", "httpx")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\S+)$")
+
+
+def _import_app() -> dict:
+    """Cumulative import time in microseconds of every module loaded by ``import app.main``."""
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line.strip())
+        if match:
+            modules[match.group(3)] = int(match.group(2))
+    return modules
+
+
+def test_llm_stack_is_imported_lazily():
+    modules = _import_app()
+
+    eager = sorted(name for name in modules if name.split(".")[0] in LAZY_MODULES)
+    assert not eager, f"imported at startup: {', '.join(eager)}"
+
+
+def test_import_time_within_budget():
+    best_ms = min(_import_app()["app.main"] for _ in range(RUNS)) / 1000
+
+    assert best_ms <= BUDGET_MS, f"import of app.main took {best_ms:.0f}ms (budget {BUDGET_MS:.0f}ms)"
@@ -0,0 +1,157 @@
+"""Adaptive LLM concurrency limiter: AIMD, the wait queue and urgent admission."""
+import asyncio
+import pytest
+from app.services.llm_limiter import (
+    AdaptiveConcurrencyLimiter, LimiterQueueFull, OUTCOME_ERROR, OUTCOME_OK, OUTCOME_OVERLOAD
+)
+
+
+def make_limiter(**options) -> AdaptiveConcurrencyLimiter:
+    config = dict(
+        initial_limit=4, min_limit=1, max_limit=8, max_queue=10,
+        queue_timeout=1.0, latency_target=1.0, backoff_ratio=0.5
+    )
+    config.update(options)
+    return AdaptiveConcurrencyLimiter(**config)
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_fast_calls_increase_the_limit_additively():
+    limiter = make_limiter(max_limit=5)
+    limiter.in_flight = 10
+
+    limiter.release(0.1, OUTCOME_OK)
+    assert limiter.limit == pytest.approx(4.25)
+
+    for _ in range(9):
+        limiter.release(0.1, OUTCOME_OK)
+    assert limiter.limit == 5  # capped at max_limit
+
+
+def test_slow_and_failed_calls_leave_the_limit_unchanged():
+    limiter = make_limiter()
+    limiter.in_flight = 2
+
+    limiter.release(1.5, OUTCOME_OK)
+    limiter.release(0.1, OUTCOME_ERROR)
+
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_overload_decreases_the_limit_multiplicatively_once_per_window():
+    limiter = make_limiter(initial_limit=8, min_limit=3, latency_target=60.0)
+    limiter.in_flight = 3
+
+    limiter.release(0.1, OUTCOME_OVERLOAD)
+    limiter.release(0.1, OUTCOME_OVERLOAD)  # same wave of failures
+
+    assert limiter.limit == 4
+    assert limiter.backoffs_total == 1
+
+    limiter._last_backoff -= 60.0
+    limiter.release(0.1, OUTCOME_OVERLOAD)
+    assert limiter.limit == 3  # floored at min_limit
+
+
+def test_full_queue_is_rejected():
+    limiter = make_limiter(initial_limit=1, max_queue=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await settle()
+        with pytest.raises(LimiterQueueFull):
+            await limiter.acquire()
+        assert limiter.queued == 1
+
+        # The queued call gets the slot once it is released
+        limiter.release(0.1, OUTCOME_OK)
+        await waiting
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+    assert limiter.rejected_total == 1
+
+
+def test_queue_wait_times_out():
+    limiter = make_limiter(initial_limit=1, queue_timeout=0.01)
+
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(LimiterQueueFull):
+            await limiter.acquire()
+
+    asyncio.run(scenario())
+
+    assert (limiter.in_flight, limiter.queued, limiter.rejected_total) == (1, 0, 1)
+
+
+def test_urgent_calls_use_reserved_slots():
+    limiter = make_limiter(initial_limit=3, urgent_reserved=1)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        # Regular calls have taken their two slots
+        assert not limiter.try_acquire()
+        regular = asyncio.create_task(limiter.acquire())
+        await settle()
+        assert limiter.queued == 1
+
+        await asyncio.wait_for(limiter.acquire(urgent=True), 0.1)
+        assert limiter.in_flight == 3
+        regular.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_urgent_waiters_are_admitted_before_regular_ones():
+    limiter = make_limiter(initial_limit=1)
+    admitted = []
+
+    async def call(name: str, urgent: bool):
+        await limiter.acquire(urgent=urgent)
+        admitted.append(name)
+
+    async def scenario():
+        await limiter.acquire()
+        tasks = [asyncio.create_task(call("regular", False)), asyncio.create_task(call("urgent", True))]
+        await settle()
+        # Slow calls, so the limit stays at one slot
+        limiter.release(1.5, OUTCOME_OK)
+        await settle()
+        assert admitted == ["urgent"]
+        limiter.release(1.5, OUTCOME_OK)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert admitted == ["urgent", "regular"]
+
+
+def test_reserved_slots_survive_backoff_to_the_minimum():
+    limiter = make_limiter(initial_limit=1, min_limit=1, urgent_reserved=1, latency_target=0.0)
+
+    # The floor is raised above the reservation
+    assert limiter.min_limit == 2
+    assert limiter.limit == 2
+
+    async def scenario():
+        await limiter.acquire()
+        for _ in range(5):
+            limiter.in_flight += 1
+            limiter.release(0.1, OUTCOME_OVERLOAD)
+        assert limiter.limit == 2
+
+        # One regular call in flight: the reserved slot is still free for an urgent one
+        assert not limiter.try_acquire()
+        await asyncio.wait_for(limiter.acquire(urgent=True), 0.1)
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,166 @@
+"""
+LLM routing across backends: hedging, cooldown of failing backends and
+the limiter slots held by hedges.
+"""
+import asyncio
+import json
+import pytest
+from app.services.classification_service import _read_completion
+from app.services.llm_backends import LLMBackend
+from app.services.llm_limiter import AdaptiveConcurrencyLimiter
+from app.services.llm_router import LLM_HEDGES_SKIPPED, LLMRouter
+
+COMPLETION = json.dumps({
+    "department": "water", "priority": "high", "confidence": 0.9, "explanation": "burst pipe"
+})
+
+
+class FakeBackend(LLMBackend):
+    """Answers after ``delay`` seconds, or raises ``error``; counts calls and open streams."""
+
+    def __init__(self, name: str, delay: float = 0.0, error: Exception = None):
+        super().__init__(name, model="fake", max_tokens=100, streaming=True)
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.answered = 0
+        self.open_streams = 0
+
+    async def stream(self, system_prompt: str, message: str):
+        self.calls += 1
+        self.open_streams += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            self.answered += 1
+            yield COMPLETION
+        finally:
+            self.open_streams -= 1
+
+
+def make_router(backends, limiter=None, **options) -> LLMRouter:
+    config = dict(
+        window=20, min_samples=2, max_error_rate=0.5, cooldown=60.0,
+        hedge_enabled=True, hedge_quantile=0.9, hedge_min_delay=0.01
+    )
+    config.update(options)
+    return LLMRouter(backends, limiter=limiter, **config)
+
+
+def make_limiter(limit: int = 4) -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(
+        initial_limit=limit, min_limit=1, max_limit=limit, max_queue=10,
+        queue_timeout=1.0, latency_target=5.0, backoff_ratio=0.5
+    )
+
+
+def learn_latency(router: LLMRouter, backend: LLMBackend, seconds: float) -> None:
+    """Give ``backend`` enough fast samples for the router to rank and hedge it."""
+    router.stats[backend.name].calls.extend([(seconds, True)] * router.min_samples)
+
+
+def classify(router: LLMRouter):
+    """Route one classification and let cancelled attempts finish unwinding."""
+    async def scenario():
+        result = await router.run(lambda backend: _read_completion(backend, "Water pipe burst"))
+        await asyncio.sleep(0.05)
+        return result
+    return asyncio.run(scenario())
+
+
+def test_slow_primary_is_hedged_and_its_stream_closed():
+    slow, fast = FakeBackend("slow", delay=5.0), FakeBackend("fast")
+    limiter = make_limiter()
+    router = make_router([slow, fast], limiter=limiter)
+    learn_latency(router, slow, 0.01)
+    learn_latency(router, fast, 0.02)
+
+    name, classification, _ = classify(router)
+
+    assert name == "fast"
+    assert classification.department == "water"
+    assert (slow.calls, slow.answered, slow.open_streams) == (1, 0, 0)
+    assert (fast.calls, fast.answered) == (1, 1)
+    assert limiter.in_flight == 0
+
+
+def test_failing_backend_cools_down_and_is_probed_later():
+    flaky, steady = FakeBackend("flaky", error=RuntimeError("502")), FakeBackend("steady")
+    router = make_router([flaky, steady], cooldown=0.3, hedge_enabled=False)
+
+    # Unmeasured backends go first, so flaky fails twice and the call is retried on steady
+    for _ in range(2):
+        assert classify(router)[0] == "steady"
+    assert not router.stats["flaky"].healthy
+    assert router.ranked()[-1] is flaky
+
+    classify(router)
+    assert flaky.calls == 2  # skipped during the cooldown
+
+    asyncio.run(asyncio.sleep(0.3))
+    assert router.stats["flaky"].healthy
+    assert router.ranked()[0] is flaky  # probed with live traffic after the cooldown
+
+    # One failure during the probe is enough to go back to cooldown
+    assert classify(router)[0] == "steady"
+    assert flaky.calls == 3
+    assert not router.stats["flaky"].healthy
+
+    asyncio.run(asyncio.sleep(0.3))
+    flaky.error = None
+    assert classify(router)[0] == "flaky"
+    assert router.stats["flaky"].healthy
+
+
+def test_hedge_without_a_free_slot_is_not_sent():
+    slow, fast = FakeBackend("slow", delay=0.1), FakeBackend("fast")
+    limiter = make_limiter(limit=1)
+    assert limiter.try_acquire()  # the primary call's own slot
+    router = make_router([slow, fast], limiter=limiter)
+    learn_latency(router, slow, 0.01)
+    learn_latency(router, fast, 0.02)
+    skipped = LLM_HEDGES_SKIPPED.labels().value
+
+    name, _, _ = classify(router)
+
+    assert name == "slow"
+    assert fast.calls == 0
+    assert LLM_HEDGES_SKIPPED.labels().value == skipped + 1
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.parametrize("primary_options, hedge_options, winner", [
+    ({"delay": 5.0}, {}, "hedge"),
+    ({"delay": 0.05}, {"delay": 5.0}, "primary"),
+    ({"delay": 0.05}, {"error": RuntimeError("502")}, "primary"),
+    ({"delay": 0.05, "error": RuntimeError("502")}, {"delay": 0.1}, "hedge"),
+])
+def test_hedge_slots_are_always_released(primary_options, hedge_options, winner):
+    primary, hedge = FakeBackend("primary", **primary_options), FakeBackend("hedge", **hedge_options)
+    limiter = make_limiter()
+    router = make_router([primary, hedge], limiter=limiter)
+    learn_latency(router, primary, 0.01)
+    learn_latency(router, hedge, 0.02)
+
+    name, _, _ = classify(router)
+
+    assert name == winner
+    assert hedge.calls == 1
+    assert primary.open_streams == hedge.open_streams == 0
+    assert limiter.in_flight == 0
+
+
+def test_slots_are_released_when_every_backend_fails():
+    primary = FakeBackend("primary", delay=0.05, error=RuntimeError("502"))
+    hedge = FakeBackend("hedge", error=RuntimeError("503"))
+    limiter = make_limiter()
+    router = make_router([primary, hedge], limiter=limiter)
+    learn_latency(router, primary, 0.01)
+    learn_latency(router, hedge, 0.02)
+
+    with pytest.raises(RuntimeError):
+        classify(router)
+
+    assert hedge.calls == 1
+    assert limiter.in_flight == 0
@@ -0,0 +1,140 @@
+"""Submission rate limiting: in-memory token buckets, Retry-After and refunds."""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import InMemoryRateLimitBackend, SWEEP_INTERVAL_SECONDS, limit_grievance_submission
+from app.schemas import TokenData
+
+
+class Clock:
+    """Stands in for ``time`` in app.core.rate_limit, so refills are deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def buckets(clock, monkeypatch):
+    """Fresh in-memory backend used by ``limit_grievance_submission``."""
+    backend = InMemoryRateLimitBackend()
+    monkeypatch.setattr(rate_limit, "backend", backend)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    return backend
+
+
+def user(sub: str = "u1", tenant_id: str = "city-a") -> TokenData:
+    return TokenData(sub=sub, role="citizen", department_ids=[], tenant_id=tenant_id)
+
+
+def submit(current_user: TokenData) -> int:
+    """Status of a submission as seen by the rate limiter: 200, or 429 with its Retry-After."""
+    try:
+        asyncio.run(limit_grievance_submission(current_user))
+    except HTTPException as e:
+        assert e.status_code == 429
+        return int(e.headers["Retry-After"])
+    return 200
+
+
+def test_bucket_refills_over_time(clock):
+    backend = InMemoryRateLimitBackend()
+
+    def take():
+        return asyncio.run(backend.acquire("k", 2, 0.5))
+
+    assert take() == 0.0
+    assert take() == 0.0
+    assert take() == pytest.approx(2.0)  # one token at 0.5/s
+
+    clock.now += 1.0
+    assert take() == pytest.approx(1.0)  # half a token so far
+
+    clock.now += 1.0
+    assert take() == 0.0
+
+    clock.now += 60.0
+    assert take() == 0.0
+    assert take() == 0.0  # refills up to capacity only
+    assert take() > 0
+
+
+def test_release_returns_a_token_up_to_capacity(clock):
+    backend = InMemoryRateLimitBackend()
+
+    async def scenario():
+        assert await backend.acquire("k", 1, 0.1) == 0.0
+        assert await backend.acquire("k", 1, 0.1) > 0
+        await backend.release("k", 1, 0.1)
+        assert await backend.acquire("k", 1, 0.1) == 0.0
+        # Releasing into a full bucket doesn't raise it above capacity
+        await backend.release("k", 1, 0.1)
+        await backend.release("k", 1, 0.1)
+        assert await backend.acquire("k", 1, 0.1) == 0.0
+        assert await backend.acquire("k", 1, 0.1) > 0
+
+    asyncio.run(scenario())
+
+
+def test_sweep_drops_refilled_buckets(clock):
+    backend = InMemoryRateLimitBackend()
+
+    asyncio.run(backend.acquire("idle", 2, 1.0))
+    clock.now += SWEEP_INTERVAL_SECONDS
+    asyncio.run(backend.acquire("busy", 2, 0.001))
+
+    assert set(backend._buckets) == {"busy"}
+
+
+def test_rejection_has_retry_after(buckets, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_REFILL_PER_SECOND", 0.1)
+
+    assert submit(user()) == 200
+    assert submit(user()) == 10
+
+    assert rate_limit._too_many_requests(0.2).headers["Retry-After"] == "1"
+    assert rate_limit._too_many_requests(2.1).headers["Retry-After"] == "3"
+
+
+def test_user_buckets_are_per_tenant(buckets, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 1)
+
+    assert submit(user("u1", "city-a")) == 200
+    # Same user id in another municipality is another user
+    assert submit(user("u1", "city-b")) == 200
+    assert submit(user("u1", "city-a")) != 200
+
+
+def test_tokens_are_refunded_when_a_later_bucket_rejects(buckets, clock, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TENANT_CAPACITY", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TENANT_REFILL_PER_SECOND", 1.0)
+
+    assert submit(user("u1")) == 200
+    assert submit(user("u1")) != 200  # tenant bucket empty
+
+    # The rejected request didn't cost u1 its second token
+    user_key = "user:city-a:u1"
+    assert buckets._refilled(user_key, clock.now, 2, settings.RATE_LIMIT_USER_REFILL_PER_SECOND) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert submit(user("u1")) == 200
+
+
+def test_disabled_rate_limit_admits_everything(buckets, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 1)
+
+    assert [submit(user()) for _ in range(3)] == [200, 200, 200]
@@ -0,0 +1,124 @@
+"""
+Read/write splitting: which reads may be served by replica-set secondaries.
+
+The last test drives the API against a real replica set and checks which
+member served each request; it only runs when READ_ROUTING_MONGO_URI is
+set (``python -m scripts.check_read_routing`` starts a throwaway local
+replica set and runs it).
+"""
+import os
+from typing import List, Tuple
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import Primary, SecondaryPreferred, Nearest
+from app.core import database
+from app.core.config import settings
+from app.routes import admin
+from conftest import auth_header
+
+REPLICA_SET_URI = os.environ.get("READ_ROUTING_MONGO_URI")
+
+
+def test_analytics_reads_prefer_secondaries_with_staleness_bound(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+    monkeypatch.setattr(settings, "MONGO_MAX_STALENESS_SECONDS", 120)
+
+    assert database.analytics_read_preference() == SecondaryPreferred(max_staleness=120)
+
+
+def test_analytics_reads_can_stay_on_primary(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_ANALYTICS_READ_PREFERENCE", "primary")
+    # Primary rejects max staleness; it is dropped rather than passed through
+    monkeypatch.setattr(settings, "MONGO_MAX_STALENESS_SECONDS", 120)
+
+    assert database.analytics_read_preference() == Primary()
+
+
+def test_staleness_bound_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_ANALYTICS_READ_PREFERENCE", "nearest")
+    monkeypatch.setattr(settings, "MONGO_MAX_STALENESS_SECONDS", -1)
+
+    assert database.analytics_read_preference() == Nearest()
+
+
+def test_only_analytics_collections_use_the_analytics_preference(monkeypatch):
+    monkeypatch.setattr(database, "client", AsyncIOMotorClient("mongodb://127.0.0.1:1", connect=False))
+
+    assert database.get_grievances_collection().raw.read_preference == Primary()
+    assert database.get_grievances_collection(analytics=True).raw.read_preference == database.analytics_read_preference()
+    assert database.get_grievance_events_collection().read_preference == Primary()
+    assert database.get_grievance_events_collection(analytics=True).read_preference == database.analytics_read_preference()
+
+
+@pytest.mark.parametrize("urgent, analytics", [(False, True), (True, False)])
+def test_admin_listing_reads_urgent_grievances_from_primary(api, monkeypatch, urgent, analytics):
+    requested = []
+
+    def get_grievances_collection(analytics: bool = False):
+        requested.append(analytics)
+        return database.get_grievances_collection(analytics=analytics)
+
+    monkeypatch.setattr(admin, "get_grievances_collection", get_grievances_collection)
+    headers = auth_header(sub="admin-1", role="superadmin", tenant_id="city-a")
+
+    response = api.get("/api/admin/grievances", params={"urgent": urgent}, headers=headers)
+
+    assert response.status_code == 200
+    assert requested == [analytics]
+
+
+class ServerRecorder(monitoring.CommandListener):
+    """Record which server handled each command on the grievances collection."""
+
+    def __init__(self):
+        self.commands: List[Tuple[str, Tuple[str, int]]] = []
+
+    def started(self, event):
+        if event.command.get(event.command_name) == "grievances":
+            self.commands.append((event.command_name, event.connection_id))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+@pytest.mark.skipif(not REPLICA_SET_URI, reason="READ_ROUTING_MONGO_URI not set")
+def test_reads_are_routed_on_a_replica_set(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    monkeypatch.setattr(settings, "MONGO_URI", REPLICA_SET_URI)
+    monkeypatch.setattr(settings, "MONGO_DB", "grievance_read_routing_check")
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    recorder = ServerRecorder()
+    monitoring.register(recorder)
+
+    primary = MongoClient(REPLICA_SET_URI).primary
+    citizen = auth_header(sub="routing-check-citizen", role="citizen", department_ids=[])
+    superadmin = auth_header(sub="routing-check-admin", role="superadmin", department_ids=[])
+
+    def served_by(request) -> set:
+        recorder.commands.clear()
+        response = request()
+        assert response.status_code < 400
+        servers = {address for _, address in recorder.commands}
+        assert servers
+        return servers
+
+    with TestClient(app) as client:
+        submit = served_by(lambda: client.post(
+            "/api/grievances", json={"message": "Water pipe burst near the market"}, headers=citizen
+        ))
+        own_reads = served_by(lambda: client.get("/api/grievances/my-grievances", headers=citizen))
+        listing = served_by(lambda: client.get("/api/admin/grievances", headers=superadmin))
+        urgent_listing = served_by(lambda: client.get(
+            "/api/admin/grievances", params={"urgent": True}, headers=superadmin
+        ))
+
+    assert submit == {primary}
+    assert own_reads == {primary}, "citizens must read their own writes"
+    assert primary not in listing, "admin listings should be served by a secondary"
+    assert urgent_listing == {primary}
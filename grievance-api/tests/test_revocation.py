@@ -0,0 +1,130 @@
+"""
+Access token revocation: single tokens, per-user cutoffs, and syncing
+revocations written by another worker.
+"""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from app.core import security
+from app.core.config import settings
+from app.core.revocation import RevocationList
+
+
+@pytest.fixture
+def revocations(mongo, monkeypatch):
+    """A fresh revocation list used by ``decode_token``."""
+    revocation_list = RevocationList()
+    monkeypatch.setattr(security, "revocations", revocation_list)
+    return revocation_list
+
+
+def _token(user_id: str, issued_at: datetime) -> str:
+    """A token for ``user_id`` with a sub-second ``iat``, as create_access_token issues them."""
+    payload = {
+        "sub": user_id,
+        "role": "citizen",
+        "exp": issued_at + timedelta(minutes=5),
+        "iat": (issued_at - datetime(1970, 1, 1)).total_seconds(),
+    }
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+def _is_rejected(token: str) -> bool:
+    try:
+        security.decode_token(token)
+    except HTTPException as e:
+        assert e.status_code == 401
+        return True
+    return False
+
+
+def test_revoked_token_is_rejected(revocations):
+    token = security.create_access_token({"sub": "u1", "role": "citizen"})
+    other = security.create_access_token({"sub": "u1", "role": "citizen"})
+    data = security.decode_token(token)
+
+    asyncio.run(revocations.revoke_token(data.jti, data.sub, data.exp))
+
+    assert _is_rejected(token)
+    # Only that token: the user's other sessions stay valid
+    assert not _is_rejected(other)
+
+
+def test_user_cutoff_rejects_earlier_tokens(revocations):
+    before = security.create_access_token({"sub": "u1", "role": "citizen"})
+    other_user = security.create_access_token({"sub": "u2", "role": "citizen"})
+
+    asyncio.run(revocations.revoke_user("u1"))
+    after = security.create_access_token({"sub": "u1", "role": "citizen"})
+
+    assert _is_rejected(before)
+    assert not _is_rejected(after)
+    assert not _is_rejected(other_user)
+
+
+def test_user_cutoff_within_the_same_second(revocations):
+    cutoff = asyncio.run(revocations.revoke_user("u1"))
+    # iat is a float, so tokens in the cutoff's second are told apart
+    earlier = cutoff - timedelta(milliseconds=1)
+    later = cutoff + timedelta(milliseconds=1)
+
+    assert _is_rejected(_token("u1", earlier))
+    assert not _is_rejected(_token("u1", later))
+
+
+def test_tokens_without_iat_use_their_expiry(revocations):
+    asyncio.run(revocations.revoke_user("u1"))
+    expires = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    legacy = jwt.encode({"sub": "u1", "role": "citizen", "exp": expires}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+    # Issued (exp - lifetime) before the cutoff
+    assert _is_rejected(legacy)
+
+
+def test_sync_loop_picks_up_revocations_from_another_worker(mongo):
+    writer = RevocationList()
+    reader = RevocationList()
+    expires = datetime.utcnow() + timedelta(minutes=5)
+    issued = datetime.utcnow() - timedelta(seconds=1)
+
+    async def scenario():
+        await writer.revoke_token("jti-1", "u1", expires)
+        assert not reader.is_revoked("u1", "jti-1", issued)
+        # First sync reads everything and sets the watermark
+        assert await reader.sync() == 1
+        assert reader.is_revoked("u1", "jti-1", issued)
+
+        task = asyncio.create_task(reader.run(0.01))
+        try:
+            await writer.revoke_user("u2")
+            for _ in range(200):
+                if reader.is_revoked("u2", None, issued):
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+    asyncio.run(scenario())
+
+    assert reader.is_revoked("u2", "jti-2", issued)
+    assert not reader.is_revoked("u2", "jti-3", datetime.utcnow() + timedelta(seconds=1))
+    assert reader.synced_at is not None
+
+
+def test_sync_drops_expired_revocations(mongo):
+    writer = RevocationList()
+    reader = RevocationList()
+    now = datetime.utcnow()
+
+    async def scenario():
+        await writer.revoke_token("expired", "u1", now - timedelta(seconds=1))
+        await writer.revoke_token("live", "u1", now + timedelta(minutes=5))
+        await reader.sync()
+
+    asyncio.run(scenario())
+
+    assert not reader.is_revoked("u1", "expired", now)
+    assert reader.is_revoked("u1", "live", now)
+    assert len(reader) == 1
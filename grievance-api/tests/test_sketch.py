@@ -0,0 +1,106 @@
+"""DDSketch error bounds against exact percentiles on generated data."""
+import random
+from collections import defaultdict
+from datetime import datetime
+import pytest
+from app.core.sketch import DDSketch, DEFAULT_RELATIVE_ACCURACY
+from app.services.resolution_stats_service import day_start
+from scripts.generate_dataset import GrievanceGenerator
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def exact_quantile(sorted_values, q: float) -> float:
+    """Value at rank floor(q * (n - 1)), the rank DDSketch estimates."""
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+def assert_within_bound(sketch: DDSketch, values):
+    values = sorted(values)
+    for q in QUANTILES:
+        exact = exact_quantile(values, q)
+        estimate = sketch.quantile(q)
+        if exact < sketch.min_value:
+            assert estimate == 0.0
+        else:
+            assert abs(estimate - exact) / exact <= DEFAULT_RELATIVE_ACCURACY * (1 + 1e-9), (q, estimate, exact)
+
+
+@pytest.fixture(scope="module")
+def resolution_times():
+    """Seconds to resolution of generated grievances, keyed by UTC day of closure."""
+    generator = GrievanceGenerator(random.Random(42), ["citizen"], 1.0, datetime(2024, 6, 1))
+    by_day = defaultdict(list)
+    for _ in range(50000):
+        doc = generator.document()
+        if doc["status"] == "resolved":
+            by_day[day_start(doc["updated_at"])].append((doc["updated_at"] - doc["created_at"]).total_seconds())
+    return by_day
+
+
+def test_quantiles_within_relative_accuracy_on_generated_data(resolution_times):
+    values = [v for day in resolution_times.values() for v in day]
+    sketch = DDSketch()
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(sum(values) / len(values))
+    assert_within_bound(sketch, values)
+
+
+@pytest.mark.parametrize("distribution", ["lognormal", "pareto", "uniform"])
+def test_quantiles_within_relative_accuracy_for_any_distribution(distribution):
+    rng = random.Random(7)
+    draw = {
+        "lognormal": lambda: rng.lognormvariate(10, 2),
+        "pareto": lambda: rng.paretovariate(1.2) * 60,
+        "uniform": lambda: rng.uniform(0, 3600),
+    }[distribution]
+    values = [draw() for _ in range(20000)]
+    sketch = DDSketch()
+    for value in values:
+        sketch.add(value)
+    assert_within_bound(sketch, values)
+
+
+def test_merged_daily_sketches_equal_one_sketch_over_the_same_data(resolution_times):
+    whole = DDSketch()
+    merged = DDSketch()
+    for values in resolution_times.values():
+        daily = DDSketch()
+        for value in values:
+            daily.add(value)
+            whole.add(value)
+        merged.merge_bins(daily.bins, daily.zero_count, daily.sum)
+
+    assert merged.bins == whole.bins
+    assert merged.count == whole.count
+    assert merged.sum == pytest.approx(whole.sum)
+    assert [merged.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+
+
+def test_merged_date_ranges_stay_within_bound(resolution_times):
+    rng = random.Random(3)
+    days = sorted(resolution_times)
+    for _ in range(50):
+        start = rng.randrange(len(days))
+        selected = days[start:start + rng.choice([1, 7, 30, 90, 365])]
+        merged = DDSketch()
+        values = []
+        for day in selected:
+            daily = DDSketch()
+            for value in resolution_times[day]:
+                daily.add(value)
+            merged.merge_bins(daily.bins, daily.zero_count, daily.sum)
+            values.extend(resolution_times[day])
+        assert_within_bound(merged, values)
+
+
+def test_values_below_min_value_count_as_zero():
+    sketch = DDSketch()
+    for value in [0.0, 0.0005, 10.0, 20.0]:
+        sketch.add(value)
+    assert sketch.zero_count == 2
+    assert sketch.quantile(0.0) == 0.0
+    assert DDSketch().quantile(0.5) is None
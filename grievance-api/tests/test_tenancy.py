@@ -0,0 +1,182 @@
+"""
+Tenant isolation: every query on a sharded collection is scoped to a
+tenant, emails are unique per tenant, and tenants can't read each other's
+grievances.
+"""
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from mongomock.collection import Collection
+from app.core.config import settings
+from app.core.database import SHARD_KEYS, ensure_indexes, get_tenants_collection
+from app.routes.auth import _resolve_tenant
+from conftest import auth_header
+
+WATER_LEAK = "Water pipe burst on Main Street, the road is flooded"
+
+
+@pytest.fixture
+def tenants(mongo):
+    """Two registered municipalities besides the default one."""
+    async def register():
+        await get_tenants_collection().insert_many([
+            {"_id": "city-a", "name": "City A"},
+            {"_id": "city-b", "name": "City B"},
+        ])
+    asyncio.run(register())
+    return "city-a", "city-b"
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """
+    ``(collection, method, filter)`` of every query sent to a sharded collection.
+
+    Recorded on mongomock's synchronous collection, below the codec, so
+    filters are in stored form. Inserted documents are recorded as their
+    own filter. Calls mongomock makes internally (e.g. the full scan behind
+    ``aggregate``) are not recorded.
+    """
+    recorded = []
+    state = threading.local()
+
+    def record(method, filters):
+        def wrapper(self, *args, **kwargs):
+            if getattr(state, "depth", 0) == 0 and self.name in SHARD_KEYS:
+                recorded.extend((self.name, method, query) for query in filters(args, kwargs))
+            state.depth = getattr(state, "depth", 0) + 1
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                state.depth -= 1
+        original = getattr(Collection, method)
+        return wrapper
+
+    def filter_arg(args, kwargs):
+        return [args[0] if args else kwargs.get("filter", {})]
+
+    def pipeline_match(args, kwargs):
+        pipeline = args[0] if args else kwargs["pipeline"]
+        return [pipeline[0].get("$match", {}) if pipeline else {}]
+
+    def inserted(args, kwargs):
+        documents = args[0] if args else kwargs.get("document", kwargs.get("documents"))
+        return documents if isinstance(documents, list) else [documents]
+
+    for method in (
+        "find", "find_one", "count_documents", "update_one", "update_many", "replace_one",
+        "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace", "find_one_and_delete"
+    ):
+        monkeypatch.setattr(Collection, method, record(method, filter_arg))
+    monkeypatch.setattr(Collection, "aggregate", record("aggregate", pipeline_match))
+    monkeypatch.setattr(Collection, "insert_one", record("insert_one", inserted))
+    monkeypatch.setattr(Collection, "insert_many", record("insert_many", inserted))
+    return recorded
+
+
+def test_sharded_collection_indexes_lead_with_tenant(mongo):
+    asyncio.run(ensure_indexes())
+
+    for name, shard_key in SHARD_KEYS.items():
+        indexes = asyncio.run(mongo[name].index_information())
+        keys = {index: [field for field, _ in info["key"]] for index, info in indexes.items()}
+        # The shard key itself is indexed
+        assert list(shard_key) in keys.values(), name
+        for index, info in indexes.items():
+            if info.get("unique"):
+                # Unique indexes on sharded collections must be prefixed with the shard key
+                assert keys[index][:len(shard_key)] == list(shard_key), (name, index)
+
+
+def test_queries_on_sharded_collections_carry_tenant(api, tenants, no_llm, queries, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    tenant = tenants[0]
+
+    citizen = api.post("/api/auth/register", json={
+        "email": "citizen@example.com", "password": "secret123", "tenant_id": tenant
+    })
+    assert citizen.status_code == 201
+    login = api.post("/api/auth/login", json={
+        "email": "citizen@example.com", "password": "secret123", "role": "citizen", "tenant_id": tenant
+    })
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    admin = auth_header(sub="admin-1", role="superadmin", tenant_id=tenant)
+
+    first = api.post("/api/grievances", json={"message": WATER_LEAK}, headers=headers).json()
+    api.post("/api/grievances", json={"message": WATER_LEAK + " again"}, headers=headers)
+    api.post("/api/admin/grievances/batch", json=[{"message": WATER_LEAK}], headers=admin)
+    assert first["incident_id"]
+
+    requests = [
+        api.get("/api/grievances/my-grievances", headers=headers),
+        api.get(f"/api/grievances/{first['id']}", headers=headers),
+        api.get("/api/admin/grievances", headers=admin),
+        api.get("/api/admin/incidents", headers=admin),
+        api.patch(f"/api/admin/incidents/{first['incident_id']}/status", json={"status": "in_progress"}, headers=admin),
+        api.patch(f"/api/admin/grievances/{first['id']}/status", json={"status": "resolved"}, headers=admin),
+        api.get("/api/admin/analytics/transition-times", params={"to_status": "resolved"}, headers=admin),
+        api.get("/api/admin/analytics/resolution-percentiles", headers=admin),
+        api.get("/api/admin/hotspots", params={"min_count": 1}, headers=admin),
+        api.get("/api/departments", headers=headers),
+    ]
+    assert [response.status_code for response in requests] == [200] * len(requests)
+
+    assert {name for name, _, _ in queries} >= {"grievances", "grievance_events", "incidents", "users"}
+    unscoped = [(name, method, query) for name, method, query in queries if query.get("tenant_id") != tenant]
+    assert not unscoped
+
+
+def test_resolve_tenant(tenants):
+    assert asyncio.run(_resolve_tenant(None)) == settings.DEFAULT_TENANT
+    assert asyncio.run(_resolve_tenant(settings.DEFAULT_TENANT)) == settings.DEFAULT_TENANT
+    assert asyncio.run(_resolve_tenant("city-a")) == "city-a"
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(_resolve_tenant("atlantis"))
+    assert error.value.status_code == 400
+
+
+def test_emails_are_unique_per_tenant(api, tenants):
+    def register(tenant_id=None, password="secret123"):
+        body = {"email": "same@example.com", "password": password}
+        if tenant_id:
+            body["tenant_id"] = tenant_id
+        return api.post("/api/auth/register", json=body)
+
+    assert register().status_code == 201
+    assert register("city-a", password="other-secret").status_code == 201
+    assert register("city-a").status_code == 400
+    assert register(settings.DEFAULT_TENANT).status_code == 400
+    assert register("atlantis").status_code == 400
+
+    # Login finds the account of the requested tenant
+    def login(tenant_id, password):
+        return api.post("/api/auth/login", json={
+            "email": "same@example.com", "password": password, "role": "citizen", "tenant_id": tenant_id
+        })
+    assert login("city-a", "other-secret").status_code == 200
+    assert login("city-a", "secret123").status_code == 401
+    assert login(None, "secret123").status_code == 200
+
+
+def test_token_of_one_tenant_cannot_read_another_tenants_grievance(api, tenants, no_llm, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    city_a, city_b = tenants
+    citizen_a = auth_header(sub="citizen-a", role="citizen", tenant_id=city_a)
+    grievance = api.post("/api/grievances", json={"message": WATER_LEAK}, headers=citizen_a).json()
+
+    # Same user id, other tenant: ids are only unique within a tenant
+    citizen_b = auth_header(sub="citizen-a", role="citizen", tenant_id=city_b)
+    superadmin_b = auth_header(sub="admin-b", role="superadmin", tenant_id=city_b)
+
+    assert api.get(f"/api/grievances/{grievance['id']}", headers=citizen_a).status_code == 200
+    assert api.get(f"/api/grievances/{grievance['id']}", headers=citizen_b).status_code == 404
+    assert api.get(f"/api/grievances/{grievance['id']}", headers=superadmin_b).status_code == 404
+    assert api.get("/api/grievances/my-grievances", headers=citizen_b).json() == []
+    assert api.get("/api/admin/grievances", headers=superadmin_b).json() == []
+    status_update = api.patch(
+        f"/api/admin/grievances/{grievance['id']}/status", json={"status": "resolved"}, headers=superadmin_b
+    )
+    assert status_update.status_code == 404